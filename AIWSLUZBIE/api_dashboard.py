@@ -3,14 +3,20 @@
 FastAPI endpointy dla dashboardu React
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+import time
+
+# Początek zimnego startu (przed importem asystenta) - raportowany w /api/performance
+_STARTUP_BEGAN = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import json
 import os
 import sys
+import threading
 from pydantic import BaseModel
 
 # Dodaj ścieżkę do system/
@@ -27,6 +33,11 @@ try:
         AdministrativeCase,
         create_demo_assistant
     )
+    from response_cache import ResponseCache
+    from audit_store import AuditLogStore
+    from llm_gateway import get_gateway
+    from interaction_log import InteractionLog
+    from job_queue import JobQueue
     ASSISTANT_AVAILABLE = True
 except ImportError as e:
     ASSISTANT_AVAILABLE = False
@@ -47,6 +58,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Zimny start: import modułów i pierwsze obsłużone zapytanie (sekundy od _STARTUP_BEGAN)
+cold_start: Dict[str, Optional[float]] = {
+    "import_seconds": round(time.perf_counter() - _STARTUP_BEGAN, 4),
+    "first_request_seconds": None,
+    "first_request_path": None
+}
+
+@app.middleware("http")
+async def measure_cold_start(request: Request, call_next):
+    """Pomiar czasu do pierwszego obsłużonego zapytania"""
+    response = await call_next(request)
+    if cold_start["first_request_seconds"] is None:
+        cold_start["first_request_seconds"] = round(time.perf_counter() - _STARTUP_BEGAN, 4)
+        cold_start["first_request_path"] = request.url.path
+    return response
+
 # Globalna instancja asystenta
 assistant_instance: Optional[HAMAAdministrativeAssistant] = None
 
@@ -55,12 +82,75 @@ def get_assistant() -> HAMAAdministrativeAssistant:
     global assistant_instance
     if assistant_instance is None:
         if ASSISTANT_AVAILABLE:
-            adapter = GeminiCognitiveAdapter(None, use_local_model=True)
-            assistant_instance = HAMAAdministrativeAssistant(adapter)
+            response_cache = ResponseCache(
+                db_path=os.environ.get('LLM_CACHE_PATH', os.path.join(_current_dir, 'llm_cache', 'responses.sqlite'))
+            )
+            audit_store = AuditLogStore(
+                db_path=os.environ.get('AUDIT_LOG_PATH', os.path.join(_current_dir, 'audit_log', 'audit.sqlite'))
+            )
+            interaction_log = InteractionLog(
+                journal_path=os.environ.get('INTERACTION_LOG_PATH', os.path.join(_current_dir, 'interaction_log', 'interactions.jsonl.gz'))
+            )
+            adapter = GeminiCognitiveAdapter(None, use_local_model=True, response_cache=response_cache,
+                                             interaction_log=interaction_log)
+            assistant_instance = HAMAAdministrativeAssistant(adapter, audit_store=audit_store)
+            if os.environ.get('PRECEDENT_WARMUP', '1') != '0':
+                # Rozgrzanie cache precedensów w tle - nie opóźnia pierwszego zapytania
+                threading.Thread(target=assistant_instance.warm_up_precedent_cache,
+                                 name="precedent-warmup", daemon=True).start()
         else:
             raise HTTPException(status_code=503, detail="Asystent nie jest dostępny")
     return assistant_instance
 
+# Kolejka zadań w tle (analizy, projekty decyzji) - współbieżność z JOB_WORKERS
+job_queue_instance: Optional["JobQueue"] = None
+
+def get_job_queue() -> "JobQueue":
+    """Pobierz lub utwórz kolejkę zadań w tle"""
+    global job_queue_instance
+    if job_queue_instance is None:
+        if not ASSISTANT_AVAILABLE:
+            raise HTTPException(status_code=503, detail="Asystent nie jest dostępny")
+        queue = JobQueue(
+            max_workers=int(os.environ.get('JOB_WORKERS', '2')),
+            db_path=os.environ.get('JOB_QUEUE_PATH', os.path.join(_current_dir, 'job_queue', 'jobs.sqlite'))
+        )
+        queue.register("analyze_case", _run_analysis_job)
+        queue.register("generate_decision", _run_decision_job)
+        job_queue_instance = queue
+    return job_queue_instance
+
+def _run_analysis_job(context, case_id: str) -> Dict[str, Any]:
+    analysis = get_assistant().analyze_case(case_id, progress_callback=context.report)
+    if "error" in analysis:
+        raise ValueError(analysis["error"])
+    return analysis
+
+def _run_decision_job(context, case_id: str, decision_type: str) -> Dict[str, Any]:
+    draft = get_assistant().generate_decision_draft(case_id, decision_type, progress_callback=context.report)
+    return _draft_to_dict(draft)
+
+def _draft_to_dict(draft) -> Dict[str, Any]:
+    return {
+        "case_id": draft.case_id,
+        "decision_type": draft.decision_type,
+        "factual_justification": draft.factual_justification,
+        "legal_justification": draft.legal_justification,
+        "decision_text": draft.decision_text,
+        "legal_references": draft.legal_references,
+        "compliance_checks": draft.compliance_checks,
+        "generated_at": draft.generated_at.isoformat()
+    }
+
+def _job_accepted(job: Dict[str, Any]) -> JSONResponse:
+    """Odpowiedź 202 z identyfikatorem zadania"""
+    return JSONResponse(status_code=202, content={
+        "job_id": job["job_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "status_url": f"/api/jobs/{job['job_id']}"
+    })
+
 # ============================================================================
 # MODELE PYDANTIC
 # ============================================================================
@@ -124,25 +214,12 @@ async def get_dashboard_stats():
     try:
         assistant = get_assistant()
         
-        # Statystyki spraw
-        total_cases = len(assistant.cases)
-        cases_by_status = {}
-        cases_by_type = {}
-        cases_by_risk = {"niski": 0, "średni": 0, "wysoki": 0, "krytyczny": 0}
-        
-        for case in assistant.cases.values():
-            # Status
-            status = case.status
-            cases_by_status[status] = cases_by_status.get(status, 0) + 1
-            
-            # Typ
-            case_type = case.case_type
-            cases_by_type[case_type] = cases_by_type.get(case_type, 0) + 1
-            
-            # Ryzyko
-            if case.risk_assessment:
-                risk_level = case.risk_assessment.get("level", "średni")
-                cases_by_risk[risk_level] = cases_by_risk.get(risk_level, 0) + 1
+        # Statystyki spraw - agregaty przyrostowe (O(1))
+        case_stats = assistant.case_stats.get_stats()
+        total_cases = case_stats["total_cases"]
+        cases_by_status = case_stats["cases_by_status"]
+        cases_by_type = case_stats["cases_by_type"]
+        cases_by_risk = case_stats["cases_by_risk"]
         
         # Metryki wydajności
         metrics = assistant.get_performance_metrics()
@@ -258,11 +335,17 @@ async def create_case(case_data: CaseCreate):
         raise HTTPException(status_code=500, detail=f"Błąd tworzenia sprawy: {str(e)}")
 
 @app.post("/api/cases/{case_id}/analyze")
-async def analyze_case(case_id: str):
-    """Analiza sprawy"""
+async def analyze_case(case_id: str, wait: bool = False):
+    """Analiza sprawy - domyślnie zadanie w tle (202 + job_id), wait=true: wynik w odpowiedzi"""
     try:
         assistant = get_assistant()
-        analysis = assistant.analyze_case(case_id)
+        if not wait:
+            if case_id not in assistant.cases:
+                raise HTTPException(status_code=404, detail=f"Sprawa {case_id} nie istnieje")
+            return _job_accepted(get_job_queue().submit("analyze_case", {"case_id": case_id}))
+        
+        # Analiza dokumentów w puli wątków, końcowe wywołanie modelu asynchronicznie
+        analysis = await assistant.aanalyze_case(case_id)
         
         if "error" in analysis:
             raise HTTPException(status_code=404, detail=analysis["error"])
@@ -274,27 +357,48 @@ async def analyze_case(case_id: str):
         raise HTTPException(status_code=500, detail=f"Błąd analizy sprawy: {str(e)}")
 
 @app.post("/api/cases/{case_id}/generate-decision")
-async def generate_decision(case_id: str, decision_type: str = "pozytywna"):
-    """Generowanie projektu decyzji"""
+async def generate_decision(case_id: str, decision_type: str = "pozytywna", wait: bool = False):
+    """Generowanie projektu decyzji - domyślnie zadanie w tle (202 + job_id), wait=true: wynik w odpowiedzi"""
     try:
         assistant = get_assistant()
-        draft = assistant.generate_decision_draft(case_id, decision_type)
+        if not wait:
+            if case_id not in assistant.cases:
+                raise HTTPException(status_code=404, detail=f"Sprawa {case_id} nie istnieje")
+            return _job_accepted(get_job_queue().submit(
+                "generate_decision", {"case_id": case_id, "decision_type": decision_type}
+            ))
         
-        return {
-            "case_id": draft.case_id,
-            "decision_type": draft.decision_type,
-            "factual_justification": draft.factual_justification,
-            "legal_justification": draft.legal_justification,
-            "decision_text": draft.decision_text,
-            "legal_references": draft.legal_references,
-            "compliance_checks": draft.compliance_checks,
-            "generated_at": draft.generated_at.isoformat()
-        }
+        draft = await assistant.agenerate_decision_draft(case_id, decision_type)
+        return _draft_to_dict(draft)
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Błąd generowania decyzji: {str(e)}")
 
+@app.get("/api/jobs")
+async def list_jobs(status: Optional[str] = None, kind: Optional[str] = None, limit: int = 50, offset: int = 0):
+    """Lista zadań w tle (od najnowszych)"""
+    jobs = get_job_queue().list_jobs(status=status, kind=kind, limit=limit, offset=offset)
+    return {"jobs": jobs, "count": len(jobs)}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status zadania: etap, postęp, wyniki częściowe, wynik lub błąd"""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Zadanie {job_id} nie istnieje")
+    return job
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Anulowanie zadania (oczekujące - od razu, wykonywane - po bieżącym etapie)"""
+    job = get_job_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Zadanie {job_id} nie istnieje")
+    return job
+
 @app.get("/api/performance")
 async def get_performance_metrics():
     """Metryki wydajności"""
@@ -303,19 +407,44 @@ async def get_performance_metrics():
         metrics = assistant.get_performance_metrics()
         
         # Dodatkowe metryki
-        total_cases = len(assistant.cases)
-        cases_with_decisions = sum(1 for c in assistant.cases.values() if c.decision_proposal)
+        case_stats = assistant.case_stats.get_stats()
+        total_cases = case_stats["total_cases"]
+        cases_with_decisions = case_stats["cases_with_decisions"]
         
         return {
             **metrics,
             "total_cases": total_cases,
             "cases_with_decisions": cases_with_decisions,
             "decision_rate": round(cases_with_decisions / total_cases * 100, 2) if total_cases > 0 else 0,
+            "llm_gateway": get_gateway().get_stats(),
+            "cold_start": cold_start,
+            "jobs": get_job_queue().get_stats(),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Błąd pobierania metryk: {str(e)}")
 
+@app.get("/api/metrics/stages")
+async def get_stage_metrics(format: str = "json"):
+    """
+    Czasy etapów potoku (chunking, guardrails, llm_call, precedent_search, parsing...)
+    
+    format: json (percentyle p50/p95/p99), export (liczniki kubełków do łączenia między
+    instancjami - StageMetrics.merge) lub prometheus (format tekstowy)
+    """
+    metrics = get_assistant().stage_metrics
+    if format == "prometheus":
+        return PlainTextResponse(metrics.to_prometheus(), media_type="text/plain; version=0.0.4")
+    if format == "export":
+        return metrics.export()
+    if format != "json":
+        raise HTTPException(status_code=400, detail=f"Nieznany format: {format} (json/export/prometheus)")
+    return {
+        "stages": metrics.snapshot(),
+        "since": datetime.fromtimestamp(metrics.started_at).isoformat(),
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.get("/api/deadlines")
 async def get_deadlines(days_ahead: int = 30):
     """Lista zbliżających się terminów"""
@@ -332,15 +461,27 @@ async def get_deadlines(days_ahead: int = 30):
         raise HTTPException(status_code=500, detail=f"Błąd pobierania terminów: {str(e)}")
 
 @app.get("/api/audit-log")
-async def get_audit_log(limit: int = 50):
-    """Audit log"""
+async def get_audit_log(limit: int = 50, offset: int = 0, operation: Optional[str] = None,
+                        status: Optional[str] = None, date_from: Optional[str] = None,
+                        date_to: Optional[str] = None):
+    """Audit log (stronicowany, od najnowszych stron)"""
     try:
         assistant = get_assistant()
-        log = assistant.export_audit_log()
+        filters = {
+            key: value for key, value in {
+                "operation": operation,
+                "status": status,
+                "date_from": date_from,
+                "date_to": date_to
+            }.items() if value is not None
+        }
+        log = assistant.export_audit_log(filters, limit=limit, offset=offset)
         
         return {
-            "log": log[-limit:],  # Ostatnie N wpisów
-            "total": len(log)
+            "log": log,  # Strona N wpisów (chronologicznie)
+            "total": assistant.guardrails.audit_log.count(filters),
+            "limit": limit,
+            "offset": offset
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Błąd pobierania audit log: {str(e)}")
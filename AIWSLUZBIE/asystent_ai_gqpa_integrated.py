@@ -26,11 +26,17 @@ import sys
 import json
 import time
 import pickle
+import asyncio
+import functools
 import random
+import threading
+import importlib.util
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable
 from dataclasses import dataclass, field
 from enum import Enum
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -47,37 +53,62 @@ print("""
 ╚══════════════════════════════════════════════════════════════════╝
 """)
 
-# Import podstawowych bibliotek
-try:
-    from google import genai  # type: ignore
-    from google.genai import types as genai_types  # type: ignore
-    GEMINI_AVAILABLE = True
-except ImportError:
-    # Fallback do starego SDK (dla kompatybilności)
+def _module_available(name: str) -> bool:
+    """Sprawdzenie, czy moduł jest zainstalowany - bez jego importu"""
     try:
-        import google.generativeai as genai  # type: ignore
-        genai_types = None
-        GEMINI_AVAILABLE = True
-        print("⚠️ Używam starego SDK google.generativeai - zalecane: pip install google-genai")
+        return importlib.util.find_spec(name) is not None
     except ImportError:
-        GEMINI_AVAILABLE = False
-        genai = None
-        genai_types = None
-        print("ℹ️ Google Generative AI nie dostępne - ustaw GOOGLE_API_KEY")
+        return False
 
-try:
-    import torch  # type: ignore
-    import torch.nn as nn  # type: ignore
-    TORCH_AVAILABLE = True
-    print(f"✅ PyTorch {torch.__version__} dostępny")
-except ImportError:
-    TORCH_AVAILABLE = False
-    torch = None
-    nn = None
+
+# Import podstawowych bibliotek - SDK Gemini importowany leniwie (przy konfiguracji klienta)
+GEMINI_AVAILABLE = _module_available("google.genai") or _module_available("google.generativeai")
+genai = None
+genai_types = None
+if not GEMINI_AVAILABLE:
+    print("ℹ️ Google Generative AI nie dostępne - ustaw GOOGLE_API_KEY")
+
+
+def _load_genai() -> bool:
+    """Import SDK Gemini przy pierwszym użyciu - True, jeśli dostępny"""
+    global genai, genai_types, GEMINI_AVAILABLE
+    if genai is None and GEMINI_AVAILABLE:
+        try:
+            from google import genai as _genai  # type: ignore
+            from google.genai import types as _genai_types  # type: ignore
+            genai, genai_types = _genai, _genai_types
+        except ImportError:
+            # Fallback do starego SDK (dla kompatybilności)
+            try:
+                import google.generativeai as _genai  # type: ignore
+                genai = _genai
+                print("⚠️ Używam starego SDK google.generativeai - zalecane: pip install google-genai")
+            except ImportError:
+                GEMINI_AVAILABLE = False
+                print("ℹ️ Google Generative AI nie dostępne - ustaw GOOGLE_API_KEY")
+    return genai is not None
+
+# PyTorch importowany leniwie - dopiero przy pierwszym użyciu HAMA2 Core (szybki start)
+TORCH_AVAILABLE = importlib.util.find_spec("torch") is not None
+torch = None
+nn = None
+if not TORCH_AVAILABLE:
     print("ℹ️ PyTorch nie dostępne - niektóre funkcje będą ograniczone (nie wymagane dla Ollama)")
 
-import pandas as pd
-import numpy as np
+
+def _load_torch() -> bool:
+    """Import PyTorch przy pierwszym użyciu - True, jeśli dostępny"""
+    global torch, nn, TORCH_AVAILABLE
+    if torch is None and TORCH_AVAILABLE:
+        try:
+            import torch as _torch  # type: ignore
+            import torch.nn as _nn  # type: ignore
+            torch, nn = _torch, _nn
+            print(f"✅ PyTorch {torch.__version__} dostępny")
+        except ImportError:
+            TORCH_AVAILABLE = False
+            print("ℹ️ PyTorch nie dostępne - niektóre funkcje będą ograniczone (nie wymagane dla Ollama)")
+    return torch is not None
 
 # ============================================================================
 # IMPORT HAMA DIAMOND CORE (BACKGROUND IP)
@@ -104,12 +135,12 @@ except ImportError:
 # KONFIGURACJA MODELI
 # ============================================================================
 
-# Konfiguracja modelu Gemini (domyślny)
-GEMINI_MODEL_NAME = "gemini-2.5-flash"  # Domyślnie używany model Gemini
+# Konfiguracja modelu Gemini (domyślny) - wspólna z adapterami (model_config.py)
+from model_config import GEMINI_MODEL_NAME
 
 def configure_gemini():
     """Konfiguracja modelu Gemini - obsługuje nowy SDK (google-genai) i stary (google.generativeai)"""
-    if not GEMINI_AVAILABLE or genai is None:
+    if not GEMINI_AVAILABLE or not _load_genai():
         return None
     
     try:
@@ -182,7 +213,27 @@ def configure_gemini():
         print(f"⚠️ Błąd konfiguracji Gemini: {e}")
         return None
 
-gemini_client = configure_gemini() if GEMINI_AVAILABLE else None
+_gemini_client = None
+_gemini_client_configured = False
+_gemini_client_lock = threading.Lock()
+
+
+def get_gemini_client():
+    """Klient Gemini konfigurowany przy pierwszym użyciu (nie przy imporcie modułu)"""
+    global _gemini_client, _gemini_client_configured
+    if not _gemini_client_configured:
+        with _gemini_client_lock:
+            if not _gemini_client_configured:
+                _gemini_client = configure_gemini() if GEMINI_AVAILABLE else None
+                _gemini_client_configured = True
+    return _gemini_client
+
+
+def __getattr__(name: str):
+    # Zgodność wsteczna: asystent_ai_gqpa_integrated.gemini_client
+    if name == "gemini_client":
+        return get_gemini_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # ============================================================================
 # TYPY DANYCH ADMINISTRACYJNYCH
@@ -236,11 +287,17 @@ class DecisionDraft:
 class SecurityGuardrails:
     """System zabezpieczeń i guardrails dla asystenta AI"""
     
-    def __init__(self):
+    def __init__(self, audit_store=None):
+        """
+        Args:
+            audit_store: Opcjonalny magazyn logu audytowego (audit_store.AuditLogStore),
+                         domyślnie bufor 1000 ostatnich wpisów w pamięci
+        """
+        from audit_store import AuditLogStore
         self.max_document_size = 10 * 1024 * 1024  # 10MB
         self.max_query_length = 10000
         self.blocked_keywords = ["usuń", "usunąć", "kasuj", "delete", "drop"]
-        self.audit_log: List[Dict] = []
+        self.audit_log = audit_store if audit_store is not None else AuditLogStore(max_memory_entries=1000)
         
     def validate_input(self, data: Any, data_type: str = "document") -> Tuple[bool, str]:
         """Walidacja danych wejściowych"""
@@ -276,11 +333,8 @@ class SecurityGuardrails:
             "user": user,
             "details": details
         }
+        # Bufor cykliczny - bez kopiowania historii
         self.audit_log.append(log_entry)
-        
-        # Ograniczenie rozmiaru logu
-        if len(self.audit_log) > 1000:
-            self.audit_log = self.audit_log[-1000:]
     
     def check_rodo_compliance(self, data: Dict) -> Tuple[bool, List[str]]:
         """Sprawdzenie zgodności z RODO"""
@@ -407,14 +461,19 @@ class HAMA2CognitiveConfig:
         self.weight_decay = 0.01
         self.dropout_rate = 0.1
 
-class HAMA2CognitiveCore(nn.Module if TORCH_AVAILABLE else object):  # type: ignore
-    """HAMA2 Cognitive Core - sieć neuronowa z emergentnymi właściwościami"""
+class HAMA2CognitiveCore:
+    """
+    HAMA2 Cognitive Core - sieć neuronowa z emergentnymi właściwościami
+    Wariant z nn.Module tworzy create_hama2_core() - PyTorch importowany dopiero wtedy
+    """
     
     def __init__(self, config: HAMA2CognitiveConfig):
-        if TORCH_AVAILABLE and nn is not None:
+        torch_enabled = nn is not None and isinstance(self, nn.Module)
+        if torch_enabled:
             super().__init__()  # type: ignore
+        self._torch_enabled = torch_enabled
         self.config = config
-        if not TORCH_AVAILABLE or nn is None:
+        if not torch_enabled:
             self.cognitive_embedding = None  # type: ignore
             self.lstm = None  # type: ignore
             self.cognitive_attention = None  # type: ignore
@@ -432,14 +491,14 @@ class HAMA2CognitiveCore(nn.Module if TORCH_AVAILABLE else object):  # type: ign
         self.memory_buffers = {}
 
     def _init_emergent_state(self):
-        if not TORCH_AVAILABLE or torch is None:
+        if not self._torch_enabled:
             return
         self.register_buffer('emergent_state', torch.zeros(1))  # type: ignore
         self.register_buffer('chaos_level', torch.tensor(self.config.initial_chaos))  # type: ignore
         self.register_buffer('memory_influence', torch.tensor(self.config.initial_memory_influence))  # type: ignore
 
     def forward(self, x: Optional[Any] = None, cognitive_data: Optional[Dict[str, Any]] = None, hidden: Optional[Tuple] = None):
-        if not TORCH_AVAILABLE or torch is None:
+        if not self._torch_enabled:
             return None, None
         batch_size, seq_len = 1, 1
         device = next(self.parameters()).device  # type: ignore
@@ -453,12 +512,12 @@ class HAMA2CognitiveCore(nn.Module if TORCH_AVAILABLE else object):  # type: ign
         return output, hidden
 
     def update_emergent_state(self, output, input_tensor, loss=None, cognitive_feedback=None):
-        if cognitive_feedback and TORCH_AVAILABLE and torch is not None:
+        if cognitive_feedback and self._torch_enabled:
             novelty = cognitive_feedback.get('novelty', 0.5)
             self.chaos_level = torch.clamp(torch.tensor(0.15 + (novelty - 0.5) * 0.2), self.config.chaos_range[0], self.config.chaos_range[1])  # type: ignore
 
     def get_emergent_metrics(self):
-        if not TORCH_AVAILABLE or torch is None:
+        if not self._torch_enabled:
             return {
                 'chaos_level': 0.15,
                 'emergent_state': 0.0,
@@ -470,6 +529,18 @@ class HAMA2CognitiveCore(nn.Module if TORCH_AVAILABLE else object):  # type: ign
             'cognitive_complexity': (self.chaos_level.item() if hasattr(self.chaos_level, 'item') else float(self.chaos_level)) * 2.0
         }
 
+_HAMA2_TORCH_CORE = None
+
+
+def create_hama2_core(config: HAMA2CognitiveConfig) -> HAMA2CognitiveCore:
+    """HAMA2 Core jako nn.Module, jeśli PyTorch jest dostępny (import przy pierwszym wywołaniu)"""
+    global _HAMA2_TORCH_CORE
+    if not _load_torch():
+        return HAMA2CognitiveCore(config)
+    if _HAMA2_TORCH_CORE is None:
+        _HAMA2_TORCH_CORE = type("HAMA2CognitiveCore", (HAMA2CognitiveCore, nn.Module), {})
+    return _HAMA2_TORCH_CORE(config)
+
 # ============================================================================
 # MODUŁY KOGNITYWNE
 # ============================================================================
@@ -523,9 +594,15 @@ class EmergentCognitiveIntegrator:
     def __init__(self, cognitive_agent):
         self.cognitive_agent = cognitive_agent
         self.config = HAMA2CognitiveConfig()
-        self.hama2_core = HAMA2CognitiveCore(self.config)
+        self._hama2_core = None  # Sieć tworzona przy pierwszym użyciu (import PyTorch, wagi)
         self.integration_cycles = 0
     
+    @property
+    def hama2_core(self) -> HAMA2CognitiveCore:
+        if self._hama2_core is None:
+            self._hama2_core = create_hama2_core(self.config)
+        return self._hama2_core
+    
     def integrate_cognitive_cycle(self):
         self.integration_cycles += 1
         cognitive_data = self._prepare_cognitive_data()
@@ -543,7 +620,7 @@ class EmergentCognitiveIntegrator:
         }
     
     def _update_emergent_core(self, cognitive_data):
-        if not TORCH_AVAILABLE or torch is None:
+        if not _load_torch():
             return {}
         input_tensor = torch.randint(0, self.config.vocab_size, (1, 10))  # type: ignore
         output, _ = self.hama2_core(input_tensor, cognitive_data)  # type: ignore
@@ -685,7 +762,7 @@ Jeśli to Fake News, wyjaśnij dlaczego (sprzeczność z wiedzą, brak logiki, p
         if is_fake_detected:
             # Sztuczne wywołanie "szoku" w sieci neuronowej
             if hasattr(self.agent, 'emergent_integrator'):
-                if hasattr(self.agent.emergent_integrator, 'hama2_core') and TORCH_AVAILABLE and torch is not None:
+                if hasattr(self.agent.emergent_integrator, 'hama2_core') and _load_torch():
                     with torch.no_grad():  # type: ignore
                         self.agent.emergent_integrator.hama2_core.chaos_level += 0.3  # type: ignore
                     chaos_reaction = self.agent.emergent_integrator.hama2_core.chaos_level.item()  # type: ignore
@@ -704,25 +781,40 @@ Jeśli to Fake News, wyjaśnij dlaczego (sprzeczność z wiedzą, brak logiki, p
 class GeminiCognitiveAdapter:
     """Adapter łączący Gemini z systemem kognitywnym - obsługuje nowy SDK (google-genai) i stary (google.generativeai)"""
     
-    def __init__(self, gemini_client_or_model, cognitive_agent=None, use_local_model: bool = False):
+    def __init__(self, gemini_client_or_model, cognitive_agent=None, use_local_model: bool = False,
+                 response_cache=None, interaction_log=None, stage_metrics=None, model_backend: Optional[str] = None):
+        """
+        Args:
+            model_backend: Backend LocalModelAdapter przy use_local_model=True - gemini, auto, huggingface
+                lub fake (adapter testowy bez sieci); None = zmienna MODEL_BACKEND, domyślnie gemini
+        """
+        from interaction_log import InteractionLog
+        from stage_metrics import get_stage_metrics
         self.gemini = gemini_client_or_model
         self.agent = cognitive_agent
         self.conversation_history = []
-        self.interaction_log = []
+        # Ograniczony log interakcji (skróty odpowiedzi, statystyki O(1)) - np. InteractionLog(journal_path=...)
+        self.interaction_log = interaction_log if interaction_log is not None else InteractionLog()
         self.guardrails = SecurityGuardrails()
+        # Histogramy czasu etapów (guardrails, wywołania modelu) - domyślnie rejestr procesu
+        self.stage_metrics = stage_metrics if stage_metrics is not None else get_stage_metrics()
+        
+        # Opcjonalny cache odpowiedzi (np. response_cache.ResponseCache)
+        self.response_cache = response_cache
         
         # Sprawdź czy to nowy SDK (Client) czy stary (GenerativeModel)
         self.is_new_sdk = hasattr(self.gemini, 'models') if self.gemini else False
         
         # Obsługa Gemini API - PRIORYTET
         self.use_local_model = use_local_model
+        self.model_backend = model_backend or os.environ.get('MODEL_BACKEND', 'gemini')
         self.local_adapter = None
         if use_local_model and LOCAL_MODELS_AVAILABLE and LocalModelAdapter:
             try:
-                # Użyj Gemini API jako domyślnego
-                self.local_adapter = LocalModelAdapter(preferred_backend="gemini")
+                # Gemini API domyślnie, fake - testy przepustowości bez sieci
+                self.local_adapter = LocalModelAdapter(preferred_backend=self.model_backend)
                 if self.local_adapter.is_available():
-                    print("✅ Używam Gemini API")
+                    print(f"✅ Używam backendu modelu: {self.local_adapter.backend_name}")
                 else:
                     print("⚠️ Gemini API nie dostępne!")
                     print("   Wskazówka: Ustaw zmienną środowiskową GOOGLE_API_KEY lub GEMINI_API_KEY")
@@ -735,33 +827,13 @@ class GeminiCognitiveAdapter:
             print("❌ Gemini adapter nie jest dostępny - zainstaluj google-genai: pip install google-genai")
             raise Exception("Gemini adapter nie dostępny")
     
-    def cognitive_query(self, prompt: str, context: Optional[Dict[str, Any]] = None, json_mode: bool = False) -> Dict[str, Any]:
-        """Wykonanie zapytania kognitywnego z guardrails"""
+    def cognitive_query(self, prompt: str, context: Optional[Dict[str, Any]] = None, json_mode: bool = False,
+                        priority: str = "interactive") -> Dict[str, Any]:
+        """Wykonanie zapytania kognitywnego z guardrails (priority: kolejka bramki LLM - interactive/batch)"""
         
-        # Walidacja wejścia
-        is_valid, error_msg = self.guardrails.validate_input(prompt, "query")
-        if not is_valid:
-            return {
-                'response': f"Błąd walidacji: {error_msg}",
-                'success': False,
-                'error': error_msg,
-                'latency': 0.0
-            }
-        
-        # Logowanie
-        self.guardrails.log_operation("query", "system", {"prompt_length": len(prompt)})
-        
-        enriched_prompt = f"""
-Kontekst Administracyjny:
-- System: Asystent AI dla Departamentu Turystyki MSiT
-- Cel: Wsparcie orzeczników w podejmowaniu decyzji administracyjnych
-- Wymagania: Zgodność z Kodeksem postępowania administracyjnego
-
-Zapytanie:
-{prompt}
-
-Odpowiedz profesjonalnie, w języku prawniczym, z uwzględnieniem kontekstu administracyjnego.
-"""
+        enriched_prompt, cache_key, early_result = self._prepare_query(prompt, json_mode)
+        if early_result is not None:
+            return early_result
         
         start_time = time.time()
         try:
@@ -773,7 +845,8 @@ Odpowiedz profesjonalnie, w języku prawniczym, z uwzględnieniem kontekstu admi
                     top_p=0.95,
                     max_tokens=2048,
                     json_mode=json_mode,
-                    format='json' if json_mode else None
+                    format='json' if json_mode else None,
+                    priority=priority
                 )
                 response_text = result.get('response', '')
                 success = result.get('success', False)
@@ -781,25 +854,40 @@ Odpowiedz profesjonalnie, w języku prawniczym, z uwzględnieniem kontekstu admi
                 latency = result.get('latency', time.time() - start_time)
             # FALLBACK: Bezpośrednie API (Gemini) - tylko jeśli local_adapter nie jest używany
             elif not self.use_local_model and self.gemini is not None:
+                from llm_gateway import get_gateway
+                from response_cache import make_cache_key
+                
                 # Nowy SDK (google-genai) - używa client.models.generate_content()
                 if self.is_new_sdk:
-                    # Użyj globalnej zmiennej GEMINI_MODEL_NAME
-                    import asystent_ai_gqpa_integrated
-                    model_name = getattr(asystent_ai_gqpa_integrated, 'GEMINI_MODEL_NAME', 'gemini-2.0-flash-exp')
-                    response = self.gemini.models.generate_content(
+                    # Model z model_config (GEMINI_MODEL_NAME)
+                    model_name = GEMINI_MODEL_NAME
+                    config = {
+                        'temperature': 0.7,
+                        'top_p': 0.95,
+                        'top_k': 40,
+                        'max_output_tokens': 2048,
+                    }
+                    if json_mode:
+                        # Natywny JSON Mode - odpowiedź bez otaczającego tekstu
+                        config['response_mime_type'] = 'application/json'
+                    response = get_gateway().call(
+                        "gemini", self.gemini.models.generate_content,
+                        priority=priority,
+                        coalesce_key=make_cache_key(enriched_prompt, model_name, config),
                         model=model_name,
                         contents=enriched_prompt,
-                        config={
-                            'temperature': 0.7,
-                            'top_p': 0.95,
-                            'top_k': 40,
-                            'max_output_tokens': 2048,
-                        }
+                        config=config
                     )
                     response_text = response.text
                 else:
                     # Stary SDK (google.generativeai) - używa model.generate_content()
-                    response = self.gemini.generate_content(enriched_prompt)
+                    sdk_kwargs = {'generation_config': {'response_mime_type': 'application/json'}} if json_mode else {}
+                    response = get_gateway().call(
+                        "gemini", self.gemini.generate_content, enriched_prompt,
+                        priority=priority,
+                        coalesce_key=make_cache_key(enriched_prompt, GEMINI_MODEL_NAME, sdk_kwargs),
+                        **sdk_kwargs
+                    )
                     response_text = response.text
                 
                 success = True
@@ -810,7 +898,7 @@ Odpowiedz profesjonalnie, w języku prawniczym, z uwzględnieniem kontekstu admi
                 if self.use_local_model:
                     # Próba użycia Gemini adaptera mimo wcześniejszego sprawdzenia
                     if self.local_adapter:
-                        result = self.local_adapter.generate(enriched_prompt)
+                        result = self.local_adapter.generate(enriched_prompt, priority=priority)
                         response_text = result.get('response', '')
                         success = result.get('success', False)
                         error = result.get('error', 'Gemini API nie odpowiedział')
@@ -826,25 +914,142 @@ Odpowiedz profesjonalnie, w języku prawniczym, z uwzględnieniem kontekstu admi
                     success = True
                     error = None
                     latency = 0.1
+            self.stage_metrics.observe("llm_call", time.time() - start_time)
             
             # Sanityzacja wyjścia
-            response_text = self.guardrails.sanitize_output(response_text)
+            with self.stage_metrics.timer("guardrails"):
+                response_text = self.guardrails.sanitize_output(response_text)
             
         except Exception as e:
             response_text = f"Error: {str(e)}"
             success = False
             error = str(e)
             latency = time.time() - start_time
+            self.stage_metrics.observe("llm_call", latency)
+        
+        return self._finalize_query(prompt, response_text, success, error, latency, cache_key)
+    
+    async def acognitive_query(self, prompt: str, context: Optional[Dict[str, Any]] = None, json_mode: bool = False,
+                               priority: str = "interactive") -> Dict[str, Any]:
+        """Asynchroniczne zapytanie kognitywne - nie blokuje pętli zdarzeń (np. endpointów FastAPI)"""
+        # Ścieżki bez adaptera asynchronicznego (SDK bezpośrednio, symulacja) - w puli wątków
+        if not (self.use_local_model and self.local_adapter and self.local_adapter.is_available()
+                and hasattr(self.local_adapter, 'agenerate')):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, functools.partial(self.cognitive_query, prompt, context, json_mode, priority)
+            )
+        
+        enriched_prompt, cache_key, early_result = self._prepare_query(prompt, json_mode)
+        if early_result is not None:
+            return early_result
+        
+        start_time = time.time()
+        try:
+            result = await self.local_adapter.agenerate(
+                enriched_prompt,
+                temperature=0.7,
+                top_p=0.95,
+                max_tokens=2048,
+                json_mode=json_mode,
+                format='json' if json_mode else None,
+                priority=priority
+            )
+            self.stage_metrics.observe("llm_call", time.time() - start_time)
+            with self.stage_metrics.timer("guardrails"):
+                response_text = self.guardrails.sanitize_output(result.get('response', ''))
+            success = result.get('success', False)
+            error = result.get('error')
+            latency = result.get('latency', time.time() - start_time)
+        except Exception as e:
+            response_text = f"Error: {str(e)}"
+            success = False
+            error = str(e)
+            latency = time.time() - start_time
+            self.stage_metrics.observe("llm_call", latency)
+        
+        return self._finalize_query(prompt, response_text, success, error, latency, cache_key)
+    
+    def _prepare_query(self, prompt: str, json_mode: bool) -> Tuple[str, Optional[str], Optional[Dict[str, Any]]]:
+        """Walidacja, wzbogacenie promptu i odczyt cache (enriched_prompt, cache_key, gotowy_wynik)"""
+        
+        # Walidacja wejścia i logowanie
+        with self.stage_metrics.timer("guardrails"):
+            is_valid, error_msg = self.guardrails.validate_input(prompt, "query")
+            if is_valid:
+                self.guardrails.log_operation("query", "system", {"prompt_length": len(prompt)})
+        if not is_valid:
+            return "", None, {
+                'response': f"Błąd walidacji: {error_msg}",
+                'success': False,
+                'error': error_msg,
+                'latency': 0.0
+            }
         
+        enriched_prompt = f"""
+Kontekst Administracyjny:
+- System: Asystent AI dla Departamentu Turystyki MSiT
+- Cel: Wsparcie orzeczników w podejmowaniu decyzji administracyjnych
+- Wymagania: Zgodność z Kodeksem postępowania administracyjnego
+
+Zapytanie:
+{prompt}
+
+Odpowiedz profesjonalnie, w języku prawniczym, z uwzględnieniem kontekstu administracyjnego.
+"""
+        
+        start_time = time.time()
+        
+        # Cache odpowiedzi - klucz: prompt + model + parametry generowania
+        cache_key = None
+        if self.response_cache is not None:
+            from response_cache import make_cache_key
+            generation_params = {
+                'temperature': 0.7,
+                'top_p': 0.95,
+                'top_k': 40,
+                'max_tokens': 2048,
+                'json_mode': json_mode
+            }
+            cache_key = make_cache_key(enriched_prompt, self._get_model_name(), generation_params)
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                latency = time.time() - start_time
+                self.interaction_log.append({
+                    'timestamp': datetime.now().isoformat(),
+                    'prompt': prompt[:200],
+                    'response': cached['response'],
+                    'latency': latency,
+                    'success': True,
+                    'cached': True
+                })
+                return enriched_prompt, cache_key, {
+                    'response': cached['response'],
+                    'success': True,
+                    'error': None,
+                    'latency': latency,
+                    'cached': True,
+                    'cognitive_state': {'mode': 'production', 'confidence': 0.85}
+                }
+        
+        return enriched_prompt, cache_key, None
+    
+    def _finalize_query(self, prompt: str, response_text: str, success: bool, error: Optional[str],
+                        latency: float, cache_key: Optional[str]) -> Dict[str, Any]:
+        """Logowanie interakcji, zapis do cache i budowa wyniku"""
         # Logowanie interakcji
         self.interaction_log.append({
             'timestamp': datetime.now().isoformat(),
             'prompt': prompt[:200],
-            'response_length': len(response_text),
+            'response': response_text,
             'latency': latency,
             'success': success
         })
         
+        # Zapis do cache tylko udanych odpowiedzi
+        if cache_key is not None and success:
+            self.response_cache.set(cache_key, {'response': response_text})
+        
         return {
             'response': response_text,
             'success': success,
@@ -852,41 +1057,162 @@ Odpowiedz profesjonalnie, w języku prawniczym, z uwzględnieniem kontekstu admi
             'latency': latency,
             'cognitive_state': {'mode': 'production', 'confidence': 0.85}
         }
+    
+    def get_interaction_statistics(self) -> Dict[str, Any]:
+        """Statystyki interakcji z modelem (liczniki i histogram opóźnień - bez przeglądania logu)"""
+        return self.interaction_log.get_stats()
+    
+    def _get_model_name(self) -> str:
+        """Nazwa modelu obsługującego zapytania (część klucza cache)"""
+        if self.use_local_model and self.local_adapter is not None:
+            active = getattr(self.local_adapter, 'active_adapter', None)
+            if active is not None and getattr(active, 'model_name', None):
+                return active.model_name
+        if self.gemini is None:
+            return 'simulation'
+        return GEMINI_MODEL_NAME
 
 # ============================================================================
 # MODUŁ ANALIZY DOKUMENTÓW
 # ============================================================================
 
+# Schematy odpowiedzi JSON (walidacja w structured_output.extract_json)
+DOCUMENT_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "required": ["key_facts"],
+    "properties": {
+        "key_facts": {"type": ["array", "string"]},
+        "legal_references": {"type": ["array", "string"]},
+        "risk_factors": {"type": ["array", "string"]},
+        "confidence": {"type": ["number", "string"]}
+    }
+}
+
+CASE_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "required": ["risk_level"],
+    "properties": {
+        "summary": {"type": "string"},
+        "risk_level": {"type": "string"},
+        "legal_issues": {"type": "array"},
+        "recommendations": {"type": ["string", "array"]},
+        "risk_factors": {"type": "array"}
+    }
+}
+
 class DocumentAnalyzer:
     """Moduł analizy dokumentów administracyjnych"""
     
-    def __init__(self, adapter: GeminiCognitiveAdapter):
+    def __init__(self, adapter: GeminiCognitiveAdapter, chunk_size: int = 2000, chunk_overlap: int = 200,
+                 max_chunk_concurrency: int = 4, max_tokens_per_document: int = 8000,
+                 analysis_cache_size: int = 256):
+        """
+        Args:
+            adapter: Adapter modelu
+            chunk_size: Maksymalna długość fragmentu (znaki)
+            chunk_overlap: Nakładka między fragmentami (znaki)
+            max_chunk_concurrency: Maksymalna liczba fragmentów analizowanych równolegle - łącznie
+                dla wszystkich dokumentów (jedna pula wątków analizatora)
+            max_tokens_per_document: Budżet tokenów wejściowych na dokument (ok. 4 znaki = 1 token)
+            analysis_cache_size: Maksymalna liczba zapamiętanych analiz fragmentów (LRU)
+        """
+        from document_chunker import DocumentChunker
+        from stage_metrics import get_stage_metrics
         self.adapter = adapter
-        self.analysis_cache = {}
+        self.stage_metrics = getattr(adapter, 'stage_metrics', None) or get_stage_metrics()
+        self.chunker = DocumentChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        self.max_chunk_concurrency = max(1, max_chunk_concurrency)
+        self.max_tokens_per_document = max_tokens_per_document
+        # Cache LRU analiz fragmentów po hashu promptu (treść, fragment, sprawa)
+        self.analysis_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.analysis_cache_size = max(0, analysis_cache_size)
+        self._cache_lock = threading.Lock()
+        # Wspólna pula fragmentów - dokumenty analizowane równolegle nie mnożą wątków
+        self._chunk_pool: Optional[ThreadPoolExecutor] = None
+        self._chunk_pool_lock = threading.Lock()
     
     def analyze_document(self, document: Dict[str, Any], case: AdministrativeCase) -> DocumentAnalysis:
-        """Analiza pojedynczego dokumentu z użyciem JSON Mode"""
+        """Analiza dokumentu (map-reduce po wszystkich fragmentach) z użyciem JSON Mode"""
         start_time = time.time()
         
-        doc_content = document.get('content', '')
         doc_type = document.get('type', 'unknown')
         
-        # Chunkowanie dla długich dokumentów
-        from document_chunker import DocumentChunker
-        chunker = DocumentChunker(chunk_size=2000, chunk_overlap=200)
+        # Chunkowanie - krótkie dokumenty dają jeden fragment
+        with self.stage_metrics.timer("chunking"):
+            chunks = self.chunker.chunk_document(document)
+        
+        # Budżet tokenów - analizuj tyle fragmentów, ile się zmieści
+        selected_chunks = []
+        used_tokens = 0
+        for chunk in chunks:
+            chunk_tokens = self._estimate_tokens(chunk['content'])
+            if selected_chunks and used_tokens + chunk_tokens > self.max_tokens_per_document:
+                break
+            selected_chunks.append(chunk)
+            used_tokens += chunk_tokens
+        
+        # Map: analiza fragmentów (równolegle we wspólnej puli; jeden fragment - w bieżącym wątku)
+        if len(selected_chunks) <= 1 or self.max_chunk_concurrency <= 1:
+            chunk_results = [self._analyze_chunk(chunk, doc_type, case) for chunk in selected_chunks]
+        else:
+            pool = self._get_chunk_pool()
+            futures = [pool.submit(self._analyze_chunk, chunk, doc_type, case) for chunk in selected_chunks]
+            try:
+                chunk_results = [future.result() for future in futures]
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        
+        # Reduce: scalenie wyników fragmentów
+        merged = self._merge_chunk_results(chunk_results)
+        if len(selected_chunks) < len(chunks):
+            merged['risk_factors'].append(
+                f"Dokument przekracza budżet analizy - przeanalizowano {len(selected_chunks)} z {len(chunks)} fragmentów"
+            )
+        
+        processing_time = time.time() - start_time
+        
+        return DocumentAnalysis(
+            document_id=f"DOC-{case.case_id}-{doc_type}",
+            document_type=doc_type,
+            key_facts=merged['key_facts'],
+            legal_references=merged['legal_references'],
+            risk_factors=merged['risk_factors'],
+            confidence=merged['confidence'],
+            processing_time=processing_time
+        )
+    
+    def _get_chunk_pool(self) -> ThreadPoolExecutor:
+        with self._chunk_pool_lock:
+            if self._chunk_pool is None:
+                self._chunk_pool = ThreadPoolExecutor(
+                    max_workers=self.max_chunk_concurrency, thread_name_prefix="chunk-analysis"
+                )
+            return self._chunk_pool
+    
+    def close(self):
+        """Zamknięcie puli wątków fragmentów"""
+        with self._chunk_pool_lock:
+            if self._chunk_pool is not None:
+                self._chunk_pool.shutdown(wait=False)
+                self._chunk_pool = None
+    
+    def _analyze_chunk(self, chunk: Dict[str, Any], doc_type: str, case: AdministrativeCase) -> Dict[str, Any]:
+        """Analiza pojedynczego fragmentu z cache LRU po hashu promptu"""
+        import hashlib
         
-        # Jeśli dokument jest długi, podziel na fragmenty
-        if len(doc_content) > 2000:
-            chunks = chunker.chunk_document(document)
-            # Analizuj pierwszy chunk (lub można analizować wszystkie i łączyć)
-            doc_content = chunks[0].get('content', doc_content[:2000])
+        chunk_content = chunk.get('content', '')
+        fragment_info = ""
+        if chunk.get('total_chunks', 1) > 1:
+            fragment_info = f"\n- Fragment: {chunk['chunk_index'] + 1} z {chunk['total_chunks']}"
         
         prompt = f"""
 Jesteś ekspertem analizującym dokumenty administracyjne w sprawie turystycznej.
 
 DOKUMENT:
-- Typ: {doc_type}
-- Treść: {doc_content[:2000]}
+- Typ: {doc_type}{fragment_info}
+- Treść: {chunk_content[:self.chunker.chunk_size]}
 
 SPRAWA:
 - ID: {case.case_id}
@@ -907,29 +1233,67 @@ Odpowiedz TYLKO w formacie JSON:
 }}
 """
         
-        # Użyj JSON Mode
-        response = self.adapter.cognitive_query(prompt, json_mode=True)
-        analysis_text = response['response']
+        # Klucz cache = wszystko, co trafia do promptu
+        cache_key = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
         
-        # Parsowanie JSON zamiast regex
-        parsed_data = self._parse_json_response(analysis_text)
+        # Użyj JSON Mode - fragmenty długiego dokumentu w kolejce batch bramki LLM
+        priority = "batch" if chunk.get('total_chunks', 1) > 1 else "interactive"
+        response = self.adapter.cognitive_query(prompt, json_mode=True, priority=priority)
         
-        key_facts = parsed_data.get('key_facts', [])
-        legal_refs = parsed_data.get('legal_references', [])
-        risk_factors = parsed_data.get('risk_factors', [])
-        confidence = parsed_data.get('confidence', 0.7)
+        # Parsowanie JSON zamiast regex
+        with self.stage_metrics.timer("parsing"):
+            parsed_data = self._parse_json_response(response['response'])
         
-        processing_time = time.time() - start_time
+        if response.get('success', False):
+            self._cache_put(cache_key, parsed_data)
+        return parsed_data
+    
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._cache_lock:
+            entry = self.analysis_cache.get(key)
+            if entry is not None:
+                self.analysis_cache.move_to_end(key)
+            return entry
+    
+    def _cache_put(self, key: str, result: Dict[str, Any]):
+        if not self.analysis_cache_size:
+            return
+        with self._cache_lock:
+            self.analysis_cache[key] = result
+            self.analysis_cache.move_to_end(key)
+            while len(self.analysis_cache) > self.analysis_cache_size:
+                self.analysis_cache.popitem(last=False)
+    
+    def _merge_chunk_results(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Scalenie wyników fragmentów (unikalne wartości w kolejności, średnia pewność)"""
+        merged: Dict[str, Any] = {'key_facts': [], 'legal_references': [], 'risk_factors': []}
+        confidences = []
+        
+        for result in results:
+            for field_name in merged:
+                values = result.get(field_name, [])
+                if isinstance(values, str):
+                    values = [values]
+                for value in values:
+                    if value not in merged[field_name]:
+                        merged[field_name].append(value)
+            
+            try:
+                confidence = float(result.get('confidence', 0.7))
+            except (TypeError, ValueError):
+                confidence = 0.7
+            confidences.append(confidence / 100.0 if confidence > 1 else confidence)
         
-        return DocumentAnalysis(
-            document_id=f"DOC-{case.case_id}-{doc_type}",
-            document_type=doc_type,
-            key_facts=key_facts,
-            legal_references=legal_refs,
-            risk_factors=risk_factors,
-            confidence=confidence,
-            processing_time=processing_time
-        )
+        merged['confidence'] = sum(confidences) / len(confidences) if confidences else 0.7
+        return merged
+    
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """Przybliżona liczba tokenów (ok. 4 znaki na token)"""
+        return max(1, len(text) // 4)
     
     def _extract_key_facts(self, text: str) -> List[str]:
         """Ekstrakcja kluczowych faktów"""
@@ -974,23 +1338,13 @@ Odpowiedz TYLKO w formacie JSON:
         return 0.7  # Domyślna wartość
     
     def _parse_json_response(self, text: str) -> Dict[str, Any]:
-        """Parsowanie odpowiedzi JSON z fallback do regex"""
-        import json
-        import re
+        """Parsowanie odpowiedzi JSON (parser przyrostowy + schemat) z fallback do regex"""
+        from structured_output import extract_json
         
-        # Próba wyciągnięcia JSON z odpowiedzi
-        # Szukaj bloku JSON (może być otoczony tekstem)
-        json_pattern = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}'
-        matches = re.findall(json_pattern, text, re.DOTALL)
-        
-        for match in matches:
-            try:
-                parsed = json.loads(match)
-                # Walidacja struktury
-                if isinstance(parsed, dict):
-                    return parsed
-            except json.JSONDecodeError:
-                continue
+        # Obiekt JSON może być otoczony tekstem lub ucięty limitem tokenów
+        parsed = extract_json(text, DOCUMENT_ANALYSIS_SCHEMA)
+        if parsed is not None:
+            return parsed
         
         # Fallback: parsowanie regex (dla kompatybilności wstecznej)
         return {
@@ -1007,7 +1361,9 @@ Odpowiedz TYLKO w formacie JSON:
 class ExternalSystemsIntegration:
     """Moduł integracji z systemami zewnętrznymi z Vector Database (RAG)"""
     
-    def __init__(self):
+    def __init__(self, precedent_cache_ttl: Optional[float] = 900.0, stage_metrics=None):
+        from precedent_cache import PrecedentSearchCache
+        from stage_metrics import get_stage_metrics
         self.cbosa_available = False  # Baza orzeczeń CBOSA
         self.legal_registers = {
             "kpa": "Kodeks postępowania administracyjnego",
@@ -1016,25 +1372,58 @@ class ExternalSystemsIntegration:
         }
         self.precedents_database = []
         
-        # Vector Database dla RAG
+        # Vector Database dla RAG - tworzona przy pierwszym wyszukiwaniu (ChromaDB, indeks na dysku)
+        self._vector_db = None
+        self._vector_db_loaded = False
+        self._vector_db_lock = threading.Lock()
+        
+        # Cache wyników wyszukiwania (TTL, unieważniany po zmianie bazy precedensów)
+        self.precedent_cache = PrecedentSearchCache(ttl_seconds=precedent_cache_ttl)
+        self.stage_metrics = stage_metrics if stage_metrics is not None else get_stage_metrics()
+    
+    @property
+    def vector_db(self):
+        if not self._vector_db_loaded:
+            with self._vector_db_lock:
+                if not self._vector_db_loaded:
+                    self._vector_db = self._create_vector_db()
+                    self._vector_db_loaded = True
+        return self._vector_db
+    
+    @vector_db.setter
+    def vector_db(self, value):
+        self._vector_db = value
+        self._vector_db_loaded = True
+    
+    @staticmethod
+    def _create_vector_db():
         try:
             from vector_db import VectorDatabase
-            self.vector_db = VectorDatabase()
-            if self.vector_db.available:
-                # Załaduj przykładowe precedensy przy pierwszym uruchomieniu
-                if self.vector_db.get_stats()['total_documents'] == 0:
-                    self.vector_db.load_sample_precedents()
+            vector_db = VectorDatabase()
+            # Załaduj przykładowe precedensy przy pierwszym uruchomieniu (ChromaDB lub indeks lokalny)
+            if vector_db.get_stats()['total_documents'] == 0:
+                vector_db.load_sample_precedents()
+            return vector_db
         except ImportError:
-            self.vector_db = None
             print("ℹ️ Vector Database nie dostępna - używam symulacji")
+            return None
     
-    def search_precedents(self, case_type: str, keywords: List[str]) -> List[Dict]:
-        """Wyszukiwanie precedensów w bazie orzeczeń z użyciem Vector DB (RAG)"""
-        # Użyj Vector Database jeśli dostępna
-        if self.vector_db and self.vector_db.available:
+    def search_precedents(self, case_type: str, keywords: List[str], n_results: int = 5) -> List[Dict]:
+        """Wyszukiwanie precedensów w bazie orzeczeń z użyciem Vector DB (RAG) - przez cache wyników"""
+        with self.stage_metrics.timer("precedent_search"):
+            return self._search_precedents(case_type, keywords, n_results)
+    
+    def _search_precedents(self, case_type: str, keywords: List[str], n_results: int) -> List[Dict]:
+        # Użyj Vector Database (ChromaDB lub lokalny indeks wektorowy)
+        if self.vector_db:
             # Utwórz zapytanie z keywords
             query = f"{case_type} {' '.join(keywords)}"
-            results = self.vector_db.search_precedents(query, case_type=case_type, n_results=5)
+            key = self.precedent_cache.make_key(case_type, query, n_results)
+            version = getattr(self.vector_db, 'version', 0)
+            results = self.precedent_cache.get(key, version)
+            if results is None:
+                results = self.vector_db.search_precedents(query, case_type=case_type, n_results=n_results)
+                self.precedent_cache.put(key, results, version)
             return results
         
         # Fallback: symulacja wyszukiwania
@@ -1045,6 +1434,29 @@ class ExternalSystemsIntegration:
         
         return precedents[:5]  # Max 5 precedensów
     
+    def add_precedent(self, precedent: Dict[str, Any]) -> bool:
+        """Dodanie precedensu (Vector DB lub lista symulacji) - unieważnia cache typu sprawy"""
+        if self.vector_db:
+            added = self.vector_db.add_precedent(precedent)
+        else:
+            self.precedents_database.append(precedent)
+            added = True
+        self.precedent_cache.invalidate(precedent.get('case_type') or None)
+        return added
+    
+    def warm_up_precedents(self, case_types: List[str]) -> int:
+        """
+        Wstępne wyszukanie precedensów dla typów spraw (zapytanie jak przy generowaniu decyzji)
+        
+        Returns:
+            Liczba typów spraw z wynikami w cache
+        """
+        warmed = 0
+        for case_type in dict.fromkeys(case_types):
+            if self.search_precedents(case_type, [case_type]):
+                warmed += 1
+        return warmed
+    
     def check_legal_compliance(self, decision_draft: DecisionDraft) -> Dict[str, bool]:
         """Sprawdzenie zgodności z przepisami prawnymi"""
         compliance = {
@@ -1068,6 +1480,10 @@ class ExternalSystemsIntegration:
 # GŁÓWNY ASYSTENT AI DLA ORZECZNIKÓW (GQPA INTEGRATED)
 # ============================================================================
 
+def _no_progress(stage: str, progress: Optional[float] = None, partial: Optional[Dict[str, Any]] = None):
+    """Callback postępu bez efektu (wywołania bez zadania w tle)"""
+
+
 class HAMAAdministrativeAssistant:
     """
     Główny moduł asystenta AI z integracją GQPA
@@ -1076,11 +1492,20 @@ class HAMAAdministrativeAssistant:
     GQPA jest utworem współautorskim i nie podlega przeniesieniu praw.
     """
     
-    def __init__(self, gemini_adapter: GeminiCognitiveAdapter):
+    def __init__(self, gemini_adapter: GeminiCognitiveAdapter, max_concurrency: int = 4, audit_store=None):
+        """
+        Args:
+            gemini_adapter: Adapter modelu
+            max_concurrency: Maksymalna liczba dokumentów analizowanych równolegle
+            audit_store: Opcjonalny trwały magazyn logu audytowego (audit_store.AuditLogStore)
+        """
         self.adapter = gemini_adapter
         self.document_analyzer = DocumentAnalyzer(gemini_adapter)
-        self.external_systems = ExternalSystemsIntegration()
-        self.guardrails = SecurityGuardrails()
+        # Histogramy czasu etapów wspólne z adapterem (stage_metrics.StageMetrics)
+        self.stage_metrics = self.document_analyzer.stage_metrics
+        self.external_systems = ExternalSystemsIntegration(stage_metrics=self.stage_metrics)
+        self.guardrails = SecurityGuardrails(audit_store=audit_store)
+        self.max_concurrency = max(1, max_concurrency)
         
         # Informacja o GQPA (Background IP)
         self.hama_info = HAMA_INFO if HAMA_INFO else None
@@ -1089,8 +1514,11 @@ class HAMAAdministrativeAssistant:
             print(f"   Status: {self.hama_info['status']}")
         
         # Baza spraw
+        from case_statistics import CaseStatistics
+        from deadline_index import DeadlineIndex
         self.cases: Dict[str, AdministrativeCase] = {}
-        self.deadlines: List[Dict] = []
+        self.deadlines = DeadlineIndex()  # Sprawy uporządkowane po terminie
+        self.case_stats = CaseStatistics()  # Agregaty dashboardu aktualizowane przyrostowo
         
         # Baza wiedzy prawniczej
         self.legal_knowledge_base = self._initialize_legal_knowledge()
@@ -1099,9 +1527,11 @@ class HAMAAdministrativeAssistant:
         self.performance_metrics = {
             'total_cases': 0,
             'total_analyses': 0,
+            'total_decisions': 0,
             'avg_analysis_time': 0.0,
             'avg_decision_generation_time': 0.0
         }
+        self._metrics_lock = threading.Lock()
         
         # Truth Guardian (COI) - System immunologiczny kognitywny
         self.cognitive_agent = EnhancedCognitiveAgent()
@@ -1159,12 +1589,8 @@ class HAMAAdministrativeAssistant:
             print(f"⚠️ Uwagi RODO: {', '.join(rodo_issues)}")
         
         self.cases[case.case_id] = case
-        if case.deadline:
-            self.deadlines.append({
-                "case_id": case.case_id,
-                "deadline": case.deadline,
-                "priority": self._calculate_priority(case)
-            })
+        self.case_stats.observe(case)
+        self.deadlines.add(case.case_id, case.deadline)
         
         self.performance_metrics['total_cases'] += 1
         self.guardrails.log_operation("add_case", "system", {"case_id": case.case_id})
@@ -1186,27 +1612,73 @@ class HAMAAdministrativeAssistant:
         else:
             return "niski"
     
-    def analyze_case(self, case_id: str) -> Dict[str, Any]:
-        """Kompleksowa analiza sprawy administracyjnej"""
+    def analyze_case(self, case_id: str, progress_callback: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
+        """
+        Kompleksowa analiza sprawy administracyjnej
+        
+        Args:
+            case_id: Identyfikator sprawy
+            progress_callback: Opcjonalnie callback(stage, progress, partial) po każdym etapie
+                (np. JobContext.report - wyjątek z callbacku przerywa analizę)
+        """
         if case_id not in self.cases:
             return {"error": f"Sprawa {case_id} nie istnieje"}
         
         case = self.cases[case_id]
         start_time = time.time()
+        report = progress_callback or _no_progress
         
-        # 1. Analiza dokumentów
-        document_analyses = []
-        for doc in case.documents:
-            analysis = self.document_analyzer.analyze_document(doc, case)
-            document_analyses.append(analysis)
-        
-        # 2. Wyszukiwanie precedensów
-        precedents = self.external_systems.search_precedents(
-            case.case_type,
-            [case.case_type] + [doc.get('type', '') for doc in case.documents]
-        )
+        # 1-2. Analiza dokumentów równolegle z wyszukiwaniem precedensów
+        document_analyses, precedents = self._gather_case_context(case, report)
         
         # 3. Analiza kognitywna z użyciem JSON Mode
+        prompt = self._case_analysis_prompt(case, document_analyses, precedents)
+        response = self.adapter.cognitive_query(prompt, json_mode=True)
+        return self._complete_case_analysis(case, response, document_analyses, precedents, start_time, report)
+    
+    async def aanalyze_case(self, case_id: str) -> Dict[str, Any]:
+        """
+        Analiza sprawy dla endpointów asynchronicznych (FastAPI)
+        
+        Analiza dokumentów i precedensy - w puli wątków; końcowe wywołanie modelu
+        przez acognitive_query, bez zajmowania wątku na czas generowania.
+        """
+        if case_id not in self.cases:
+            return {"error": f"Sprawa {case_id} nie istnieje"}
+        
+        case = self.cases[case_id]
+        start_time = time.time()
+        report = _no_progress
+        
+        loop = asyncio.get_running_loop()
+        document_analyses, precedents = await loop.run_in_executor(
+            None, self._gather_case_context, case, report
+        )
+        prompt = self._case_analysis_prompt(case, document_analyses, precedents)
+        response = await self.adapter.acognitive_query(prompt, json_mode=True)
+        return self._complete_case_analysis(case, response, document_analyses, precedents, start_time, report)
+    
+    def _gather_case_context(self, case: AdministrativeCase,
+                             report: Callable[..., None]) -> Tuple[List[DocumentAnalysis], List[Dict]]:
+        """Analizy dokumentów i precedensy sprawy (wyszukiwanie precedensów w tle)"""
+        report("documents", 0.0)
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="precedents") as precedent_pool:
+            precedents_future = precedent_pool.submit(
+                self.external_systems.search_precedents,
+                case.case_type,
+                [case.case_type] + [doc.get('type', '') for doc in case.documents]
+            )
+            document_analyses = self._analyze_documents(case, progress_callback=report)
+            precedents = precedents_future.result()
+        report("cognitive_analysis", 0.8, {
+            "precedents_found": len(precedents),
+            "document_analyses": self._document_analyses_summary(document_analyses)
+        })
+        return document_analyses, precedents
+    
+    def _case_analysis_prompt(self, case: AdministrativeCase, document_analyses: List[DocumentAnalysis],
+                              precedents: List[Dict]) -> str:
+        """Prompt analizy kognitywnej (JSON Mode)"""
         prompt = f"""
 Jesteś asystentem AI dla orzecznika w Departamencie Turystyki MSiT.
 
@@ -1239,12 +1711,18 @@ Odpowiedz TYLKO w formacie JSON:
   "risk_factors": ["czynnik1", "czynnik2"]
 }}
 """
-        
-        response = self.adapter.cognitive_query(prompt, json_mode=True)
+        return prompt
+    
+    def _complete_case_analysis(self, case: AdministrativeCase, response: Dict[str, Any],
+                                document_analyses: List[DocumentAnalysis], precedents: List[Dict],
+                                start_time: float, report: Callable[..., None]) -> Dict[str, Any]:
+        """Parsowanie odpowiedzi modelu, aktualizacja sprawy i metryk"""
         analysis_text = response['response']
+        report("finalizing", 0.95)
         
         # Parsowanie JSON z fallback do regex
-        parsed_data = self._parse_analysis_json(analysis_text)
+        with self.stage_metrics.timer("parsing"):
+            parsed_data = self._parse_analysis_json(analysis_text)
         
         risk_level = parsed_data.get('risk_level', 'średni')
         legal_issues = parsed_data.get('legal_issues', [])
@@ -1260,33 +1738,63 @@ Odpowiedz TYLKO w formacie JSON:
         case.legal_issues = legal_issues
         case.historical_precedents = [p.get('id', '') for p in precedents]
         case.updated_at = datetime.now()
+        self.case_stats.observe(case)
         
         # Aktualizacja metryk
         analysis_time = time.time() - start_time
-        self.performance_metrics['total_analyses'] += 1
-        self.performance_metrics['avg_analysis_time'] = (
-            (self.performance_metrics['avg_analysis_time'] * (self.performance_metrics['total_analyses'] - 1) + analysis_time) 
-            / self.performance_metrics['total_analyses']
-        )
+        self.stage_metrics.observe("analyze_case", analysis_time)
+        self._update_average('total_analyses', 'avg_analysis_time', analysis_time)
         
         return {
-            "case_id": case_id,
+            "case_id": case.case_id,
             "summary": analysis_text[:500],
             "risk_assessment": case.risk_assessment,
             "legal_issues": legal_issues,
             "recommendations": recommendations,
             "precedents_found": len(precedents),
             "analysis_time": analysis_time,
-            "document_analyses": [
-                {
-                    "type": da.document_type,
-                    "key_facts_count": len(da.key_facts),
-                    "confidence": da.confidence
-                }
-                for da in document_analyses
-            ]
+            "document_analyses": self._document_analyses_summary(document_analyses)
         }
     
+    @staticmethod
+    def _document_analyses_summary(document_analyses: List[DocumentAnalysis]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "type": da.document_type,
+                "key_facts_count": len(da.key_facts),
+                "confidence": da.confidence
+            }
+            for da in document_analyses
+        ]
+    
+    def _analyze_documents(self, case: AdministrativeCase,
+                           progress_callback: Optional[Callable[..., None]] = None) -> List[DocumentAnalysis]:
+        """Równoległa analiza dokumentów sprawy (wyniki w kolejności dokumentów)"""
+        total = len(case.documents)
+        workers = min(self.max_concurrency, total)
+        analyses: List[DocumentAnalysis] = []
+        
+        def collect(results):
+            # Postęp analizy dokumentów: 0-80% całej analizy sprawy
+            for analysis in results:
+                analyses.append(analysis)
+                if progress_callback:
+                    progress_callback("documents", 0.8 * len(analyses) / total)
+            return analyses
+        
+        if workers <= 1:
+            return collect(self.document_analyzer.analyze_document(doc, case) for doc in case.documents)
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="doc-analysis") as pool:
+            futures = [pool.submit(self.document_analyzer.analyze_document, doc, case) for doc in case.documents]
+            try:
+                return collect(future.result() for future in futures)
+            except BaseException:
+                # Przerwanie (np. anulowanie zadania) - bez uruchamiania pozostałych dokumentów
+                for future in futures:
+                    future.cancel()
+                raise
+    
     def _extract_risk_level(self, text: str) -> str:
         """Ekstrakcja poziomu ryzyka"""
         text_lower = text.lower()
@@ -1325,17 +1833,48 @@ Odpowiedz TYLKO w formacie JSON:
                 factors.append(line.strip())
         return factors[:5]
     
-    def generate_decision_draft(self, case_id: str, decision_type: str = "pozytywna") -> DecisionDraft:
-        """Generowanie projektu decyzji administracyjnej"""
+    def generate_decision_draft(self, case_id: str, decision_type: str = "pozytywna",
+                                progress_callback: Optional[Callable[..., None]] = None) -> DecisionDraft:
+        """
+        Generowanie projektu decyzji administracyjnej
+        
+        Args:
+            case_id: Identyfikator sprawy
+            decision_type: Typ decyzji (pozytywna/negatywna...)
+            progress_callback: Opcjonalnie callback(stage, progress, partial) po każdym etapie
+        """
         if case_id not in self.cases:
             raise ValueError(f"Sprawa {case_id} nie istnieje")
         
         case = self.cases[case_id]
         start_time = time.time()
+        report = progress_callback or _no_progress
         
         # Przygotowanie kontekstu
+        report("precedents", 0.0)
         precedents = self.external_systems.search_precedents(case.case_type, [case.case_type])
+        report("generation", 0.2, {"precedents_found": len(precedents)})
         
+        response = self.adapter.cognitive_query(self._decision_prompt(case, decision_type, precedents))
+        return self._complete_decision_draft(case, decision_type, response, start_time, report)
+    
+    async def agenerate_decision_draft(self, case_id: str, decision_type: str = "pozytywna") -> DecisionDraft:
+        """Generowanie projektu decyzji dla endpointów asynchronicznych (wywołanie modelu przez acognitive_query)"""
+        if case_id not in self.cases:
+            raise ValueError(f"Sprawa {case_id} nie istnieje")
+        
+        case = self.cases[case_id]
+        start_time = time.time()
+        
+        loop = asyncio.get_running_loop()
+        precedents = await loop.run_in_executor(
+            None, self.external_systems.search_precedents, case.case_type, [case.case_type]
+        )
+        response = await self.adapter.acognitive_query(self._decision_prompt(case, decision_type, precedents))
+        return self._complete_decision_draft(case, decision_type, response, start_time, _no_progress)
+    
+    def _decision_prompt(self, case: AdministrativeCase, decision_type: str, precedents: List[Dict]) -> str:
+        """Prompt projektu decyzji"""
         prompt = f"""
 Jesteś asystentem AI generującym projekt decyzji administracyjnej zgodnie z Kodeksem postępowania administracyjnego.
 
@@ -1362,21 +1901,26 @@ Wygeneruj kompletny projekt decyzji w formacie:
 2. UZASADNIENIE PRAWNE
 3. ROZSTRZYGNIĘCIE
 """
-        
-        response = self.adapter.cognitive_query(prompt)
+        return prompt
+    
+    def _complete_decision_draft(self, case: AdministrativeCase, decision_type: str, response: Dict[str, Any],
+                                 start_time: float, report: Callable[..., None]) -> DecisionDraft:
+        """Parsowanie projektu decyzji, weryfikacja zgodności i aktualizacja sprawy"""
         decision_text = response['response']
+        report("compliance", 0.9)
         
         # Parsowanie decyzji
-        factual_justification = self._extract_section(decision_text, "uzasadnienie faktyczne")
-        legal_justification = self._extract_section(decision_text, "uzasadnienie prawne")
-        decision_section = self._extract_section(decision_text, "rozstrzygnięcie")
-        
-        # Ekstrakcja odniesień prawnych
-        legal_references = self._extract_legal_references(decision_text)
+        with self.stage_metrics.timer("parsing"):
+            factual_justification = self._extract_section(decision_text, "uzasadnienie faktyczne")
+            legal_justification = self._extract_section(decision_text, "uzasadnienie prawne")
+            decision_section = self._extract_section(decision_text, "rozstrzygnięcie")
+            
+            # Ekstrakcja odniesień prawnych
+            legal_references = self._extract_legal_references(decision_text)
         
         # Sprawdzenie zgodności
         draft = DecisionDraft(
-            case_id=case_id,
+            case_id=case.case_id,
             decision_type=decision_type,
             factual_justification=factual_justification,
             legal_justification=legal_justification,
@@ -1391,32 +1935,29 @@ Wygeneruj kompletny projekt decyzji w formacie:
         # Aktualizacja sprawy
         case.decision_proposal = decision_text
         case.updated_at = datetime.now()
+        self.case_stats.observe(case)
         
         # Aktualizacja metryk
         generation_time = time.time() - start_time
-        self.performance_metrics['avg_decision_generation_time'] = (
-            (self.performance_metrics['avg_decision_generation_time'] * (self.performance_metrics['total_analyses'] - 1) + generation_time)
-            / max(self.performance_metrics['total_analyses'], 1)
-        )
+        self.stage_metrics.observe("generate_decision", generation_time)
+        self._update_average('total_decisions', 'avg_decision_generation_time', generation_time)
         
         return draft
     
+    def _update_average(self, count_key: str, average_key: str, value: float):
+        """Licznik i średnia krocząca w performance_metrics (średnia względem własnego licznika)"""
+        with self._metrics_lock:
+            metrics = self.performance_metrics
+            metrics[count_key] += 1
+            metrics[average_key] += (value - metrics[average_key]) / metrics[count_key]
+    
     def _parse_analysis_json(self, text: str) -> Dict[str, Any]:
-        """Parsowanie odpowiedzi analizy w formacie JSON"""
-        import json
-        import re
+        """Parsowanie odpowiedzi analizy w formacie JSON (parser przyrostowy + schemat)"""
+        from structured_output import extract_json
         
-        # Próba wyciągnięcia JSON
-        json_pattern = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}'
-        matches = re.findall(json_pattern, text, re.DOTALL)
-        
-        for match in matches:
-            try:
-                parsed = json.loads(match)
-                if isinstance(parsed, dict):
-                    return parsed
-            except json.JSONDecodeError:
-                continue
+        parsed = extract_json(text, CASE_ANALYSIS_SCHEMA)
+        if parsed is not None:
+            return parsed
         
         # Fallback: regex parsing
         return {
@@ -1463,27 +2004,36 @@ Wygeneruj kompletny projekt decyzji w formacie:
             refs.extend(matches)
         return list(set(refs))[:10]  # Unikalne, max 10
     
-    def check_deadlines(self, days_ahead: int = 7) -> List[Dict]:
-        """Sprawdzanie zbliżających się terminów"""
+    def update_deadline(self, case_id: str, deadline: Optional[datetime]) -> bool:
+        """Zmiana terminu sprawy (z aktualizacją indeksu terminów)"""
+        if case_id not in self.cases:
+            return False
+        
+        case = self.cases[case_id]
+        case.deadline = deadline
+        case.updated_at = datetime.now()
+        self.deadlines.add(case_id, deadline)
+        return True
+    
+    def check_deadlines(self, days_ahead: int = 7, include_overdue: bool = True) -> List[Dict]:
+        """Sprawdzanie zbliżających się terminów (z indeksu - bez skanowania wszystkich spraw)"""
         upcoming = []
         now = datetime.now()
         threshold = now + timedelta(days=days_ahead)
         
-        for case_id, case in self.cases.items():
-            if case.deadline and case.deadline <= threshold:
-                days_left = (case.deadline - now).days
-                priority = self._calculate_priority(case)
-                
-                upcoming.append({
-                    "case_id": case_id,
-                    "case_type": case.case_type,
-                    "deadline": case.deadline.isoformat(),
-                    "days_left": days_left,
-                    "priority": priority,
-                    "status": case.status
-                })
+        for deadline, case_id in self.deadlines.due_before(threshold, since=None if include_overdue else now):
+            case = self.cases[case_id]
+            upcoming.append({
+                "case_id": case_id,
+                "case_type": case.case_type,
+                "deadline": deadline.isoformat(),
+                "days_left": (deadline - now).days,
+                "priority": self._calculate_priority(case),
+                "status": case.status
+            })
         
-        return sorted(upcoming, key=lambda x: x['days_left'])
+        # Indeks jest posortowany po terminie - kolejność zgodna z days_left
+        return upcoming
     
     def get_case_summary(self, case_id: str) -> Optional[Dict]:
         """Pobranie podsumowania sprawy"""
@@ -1505,13 +2055,45 @@ Wygeneruj kompletny projekt decyzji w formacie:
             "updated_at": case.updated_at.isoformat()
         }
     
+    def get_case_statistics(self, verify: bool = False) -> Dict:
+        """
+        Statystyki spraw z agregatów przyrostowych
+        
+        Args:
+            verify: Jeśli True, porównuje agregaty z pełnym przeliczeniem i odbudowuje je przy rozbieżności
+        """
+        if verify and not self.case_stats.check_consistency(self.cases.values()):
+            self.case_stats.rebuild(self.cases.values())
+        return self.case_stats.get_stats()
+    
+    def warm_up_precedent_cache(self) -> int:
+        """Rozgrzanie cache precedensów dla wszystkich znanych typów spraw (procedury + bieżące sprawy)"""
+        case_types = list(self.legal_knowledge_base.get("procedury", {}))
+        case_types.extend(case.case_type for case in list(self.cases.values()))
+        return self.external_systems.warm_up_precedents(case_types)
+    
     def get_performance_metrics(self) -> Dict:
         """Pobranie metryk wydajności"""
-        return self.performance_metrics.copy()
+        with self._metrics_lock:
+            metrics = self.performance_metrics.copy()
+        metrics['stages'] = self.stage_metrics.snapshot()
+        metrics['precedent_cache'] = self.external_systems.precedent_cache.get_stats()
+        if hasattr(self.adapter, 'get_interaction_statistics'):
+            metrics['llm_interactions'] = self.adapter.get_interaction_statistics()
+        return metrics
     
-    def export_audit_log(self) -> List[Dict]:
-        """Eksport logu audit"""
-        return self.guardrails.audit_log.copy()
+    def export_audit_log(self, filters: Optional[Dict] = None, limit: Optional[int] = None, offset: int = 0) -> List[Dict]:
+        """
+        Eksport logu audit (chronologicznie)
+        
+        Args:
+            filters: operation, user, status, date_from, date_to
+            limit: Liczba najnowszych wpisów (None = cały log)
+            offset: Liczba pominiętych najnowszych wpisów (stronicowanie)
+        """
+        entries = self.guardrails.audit_log.query(filters, limit=limit, offset=offset, newest_first=True)
+        entries.reverse()
+        return entries
     
     def verify_content(self, content: ContentItem) -> Dict:
         """
@@ -1529,16 +2111,17 @@ Wygeneruj kompletny projekt decyzji w formacie:
 # FUNKCJE DEMONSTRACYJNE
 # ============================================================================
 
-def create_demo_assistant(use_local_model: bool = True):
+def create_demo_assistant(use_local_model: bool = True, response_cache=None):
     """
     Tworzenie demonstracyjnego asystenta
     
     Args:
         use_local_model: Jeśli True, używa Gemini API przez adapter
                         Domyślnie True - preferowane Gemini API
+        response_cache: Opcjonalny cache odpowiedzi LLM (response_cache.ResponseCache)
     """
     # Używamy None dla gemini_client gdy używamy lokalnego modelu
-    adapter = GeminiCognitiveAdapter(None, use_local_model=use_local_model)
+    adapter = GeminiCognitiveAdapter(None, use_local_model=use_local_model, response_cache=response_cache)
     assistant = HAMAAdministrativeAssistant(adapter)
     return assistant
 
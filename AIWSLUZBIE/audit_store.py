@@ -0,0 +1,165 @@
+"""
+📜 Magazyn logu audytowego
+Append-only audit trail: bufor cykliczny ostatnich wpisów w pamięci
++ opcjonalna trwała baza SQLite z indeksami (timestamp, operation, user)
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from collections import deque
+from typing import Dict, List, Any, Optional, Iterator, Tuple
+
+# Pola wpisu, po których można filtrować (kolumny indeksowane w SQLite)
+FILTER_FIELDS = ("operation", "user", "status")
+
+
+class AuditLogStore:
+    """Append-only log audytowy z ograniczoną pamięcią i zapytaniami stronicowanymi"""
+
+    def __init__(self, max_memory_entries: int = 1000, db_path: Optional[str] = None):
+        """
+        Args:
+            max_memory_entries: Rozmiar bufora cyklicznego ostatnich wpisów
+            db_path: Ścieżka do pliku SQLite (None = tylko pamięć)
+        """
+        self.max_memory_entries = max_memory_entries
+        self.db_path = db_path
+        self._recent: deque = deque(maxlen=max_memory_entries)
+        self._lock = threading.Lock()
+        self._db = None
+
+        if db_path:
+            try:
+                directory = os.path.dirname(db_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS audit_log ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                    "timestamp TEXT NOT NULL, operation TEXT, user TEXT, status TEXT, "
+                    "entry TEXT NOT NULL)"
+                )
+                for column in ("timestamp", "operation", "user"):
+                    self._db.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_audit_{column} ON audit_log ({column}, id)"
+                    )
+                self._db.commit()
+
+                # Odtworzenie bufora ostatnich wpisów po restarcie
+                rows = self._db.execute(
+                    "SELECT entry FROM audit_log ORDER BY id DESC LIMIT ?", (max_memory_entries,)
+                ).fetchall()
+                self._recent.extend(json.loads(row[0]) for row in reversed(rows))
+            except sqlite3.Error as e:
+                print(f"⚠️ Trwały log audytowy niedostępny ({e}) - używam tylko pamięci")
+                self._db = None
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    def append(self, entry: Dict[str, Any]):
+        """Dopisanie wpisu (bez kopiowania wcześniejszej historii)"""
+        with self._lock:
+            self._recent.append(entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT INTO audit_log (timestamp, operation, user, status, entry) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        entry.get("timestamp", ""),
+                        entry.get("operation"),
+                        entry.get("user"),
+                        entry.get("status"),
+                        json.dumps(entry, ensure_ascii=False, default=str)
+                    )
+                )
+                self._db.commit()
+
+    def query(self, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None,
+              offset: int = 0, newest_first: bool = True) -> List[Dict[str, Any]]:
+        """
+        Zapytanie o wpisy logu
+
+        Args:
+            filters: operation, user, status, date_from, date_to (ISO)
+            limit: Maksymalna liczba wpisów (None = wszystkie)
+            offset: Liczba pominiętych wpisów (stronicowanie)
+            newest_first: Kolejność od najnowszych
+
+        Returns:
+            Lista wpisów
+        """
+        filters = filters or {}
+        with self._lock:
+            if self._db is None:
+                entries = [entry for entry in self._recent if self._matches(entry, filters)]
+                if newest_first:
+                    entries.reverse()
+                end = offset + limit if limit is not None else None
+                return entries[offset:end]
+
+            where, params = self._where_clause(filters)
+            order = "DESC" if newest_first else "ASC"
+            sql = f"SELECT entry FROM audit_log{where} ORDER BY id {order} LIMIT ? OFFSET ?"
+            rows = self._db.execute(sql, params + [limit if limit is not None else -1, offset]).fetchall()
+            return [json.loads(row[0]) for row in rows]
+
+    def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """Liczba wpisów spełniających filtry"""
+        filters = filters or {}
+        with self._lock:
+            if self._db is None:
+                return sum(1 for entry in self._recent if self._matches(entry, filters))
+            where, params = self._where_clause(filters)
+            return self._db.execute(f"SELECT COUNT(*) FROM audit_log{where}", params).fetchone()[0]
+
+    def recent(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Ostatnie wpisy z bufora w pamięci (chronologicznie)"""
+        with self._lock:
+            entries = list(self._recent)
+        return entries[-n:] if n else entries
+
+    def close(self):
+        """Zamknięcie połączenia z bazą SQLite"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.recent())
+
+    @staticmethod
+    def _matches(entry: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+        for field_name in FILTER_FIELDS:
+            if field_name in filters and entry.get(field_name) != filters[field_name]:
+                return False
+        if "date_from" in filters and entry.get("timestamp", "") < filters["date_from"]:
+            return False
+        if "date_to" in filters and entry.get("timestamp", "") > filters["date_to"]:
+            return False
+        return True
+
+    @staticmethod
+    def _where_clause(filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        conditions = []
+        params: List[Any] = []
+        for field_name in FILTER_FIELDS:
+            if field_name in filters:
+                conditions.append(f"{field_name} = ?")
+                params.append(filters[field_name])
+        if "date_from" in filters:
+            conditions.append("timestamp >= ?")
+            params.append(filters["date_from"])
+        if "date_to" in filters:
+            conditions.append("timestamp <= ?")
+            params.append(filters["date_to"])
+        return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
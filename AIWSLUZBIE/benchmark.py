@@ -0,0 +1,307 @@
+"""
+⏱️ Benchmark potoku asystenta administracyjnego
+Syntetyczny korpus (N spraw x M dokumentów), deterministyczny adapter testowy o zadanym
+opóźnieniu, percentyle opóźnień (p50/p95/p99), przepustowość i szczytowe RSS - wynik JSON
+do porównań offline z poprzednim przebiegiem
+
+Użycie:
+    python benchmark.py --cases 20 --documents 3 --delay 0.05 --output bench.json
+    python benchmark.py --baseline bench.json --tolerance 0.2   # kod wyjścia 1 przy regresji
+"""
+
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Callable
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_AVAILABLE = False
+
+_CASE_TYPES = ("kwalifikacja_zawodowa", "kategoria_hotelu", "zakaz_dzialalnosci")
+_DOCUMENT_TYPES = ("wniosek", "dyplom", "zaświadczenie", "dokumentacja techniczna", "protokół")
+_SENTENCES = (
+    "Wnioskodawca posiada dyplom ukończenia studiów wyższych na kierunku Turystyka i Rekreacja.",
+    "Do wniosku dołączono zaświadczenie o ukończeniu kursu przewodnickiego.",
+    "Obiekt spełnia wymagania dotyczące wyposażenia pokoi i części wspólnych.",
+    "W trakcie kontroli stwierdzono naruszenie warunków prowadzenia działalności.",
+    "Strona wnosi o rozpatrzenie sprawy w trybie art. 35 Kodeksu postępowania administracyjnego.",
+    "Dokumentacja techniczna obejmuje rzuty kondygnacji oraz opis instalacji.",
+    "Organ wezwał stronę do uzupełnienia braków formalnych w terminie 7 dni.",
+)
+
+
+def build_corpus(n_cases: int, documents_per_case: int, seed: int = 42,
+                 document_chars: int = 1500, now: Optional[datetime] = None) -> List[Any]:
+    """
+    Deterministyczny korpus spraw (ten sam seed = te same sprawy i dokumenty)
+
+    Args:
+        n_cases: Liczba spraw
+        documents_per_case: Liczba dokumentów w sprawie
+        seed: Ziarno generatora
+        document_chars: Przybliżona długość dokumentu w znakach
+        now: Punkt odniesienia dla terminów (None = teraz)
+    """
+    from asystent_ai_gqpa_integrated import AdministrativeCase
+
+    rng = random.Random(seed)
+    now = now or datetime.now()
+    cases = []
+    for index in range(n_cases):
+        documents = []
+        for doc_index in range(documents_per_case):
+            sentences, length = [], 0
+            while length < document_chars:
+                sentence = rng.choice(_SENTENCES)
+                sentences.append(sentence)
+                length += len(sentence) + 1
+            documents.append({
+                "document_id": f"BENCH-{index:05d}-D{doc_index}",
+                "type": rng.choice(_DOCUMENT_TYPES),
+                "content": " ".join(sentences)
+            })
+        cases.append(AdministrativeCase(
+            case_id=f"BENCH-{index:05d}",
+            case_type=_CASE_TYPES[index % len(_CASE_TYPES)],
+            documents=documents,
+            parties=[f"Wnioskodawca {index}", "Departament Turystyki MSiT"],
+            status="nowa",
+            deadline=now + timedelta(days=rng.randint(-5, 60))
+        ))
+    return cases
+
+
+def create_benchmark_assistant(delay: float = 0.05, max_concurrency: int = 4):
+    """
+    Asystent z deterministycznym adapterem testowym (bez sieci i bez cache odpowiedzi)
+
+    Returns:
+        (asystent, FakeModelAdapter) - adapter udostępnia licznik wywołań modelu
+    """
+    from asystent_ai_gqpa_integrated import GeminiCognitiveAdapter, HAMAAdministrativeAssistant
+    from stage_metrics import StageMetrics
+
+    # Własny rejestr etapów - bez pomiarów innych asystentów w procesie
+    adapter = GeminiCognitiveAdapter(None, use_local_model=True, model_backend="fake", stage_metrics=StageMetrics())
+    adapter.local_adapter.fake.delay = delay
+    assistant = HAMAAdministrativeAssistant(adapter, max_concurrency=max_concurrency)
+    return assistant, adapter.local_adapter.fake
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Szczytowe zużycie pamięci procesu (MB) - None, jeśli platforma go nie udostępnia"""
+    if RESOURCE_AVAILABLE:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux: kilobajty, macOS: bajty
+        return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, 'peak_wset', info.rss) / (1024 * 1024), 2)
+    except ImportError:
+        return None
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """q-ty percentyl (0-100) z posortowanej próby - interpolacja liniowa między pozycjami"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, Any]:
+    """Statystyki opóźnień z pełnej próby (dokładne percentyle - także poniżej 1 ms)"""
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": values[-1] if values else 0.0
+    }
+
+
+def _measure(name: str, calls: List[Callable[[], Any]], concurrency: int) -> Dict[str, Any]:
+    """Wykonanie wywołań (opcjonalnie równolegle) - percentyle opóźnień i przepustowość"""
+    errors = []
+
+    def timed(call: Callable[[], Any]) -> float:
+        start = time.perf_counter()
+        try:
+            result = call()
+            if result is False:
+                raise RuntimeError("operacja zwróciła False")
+        except Exception as e:
+            errors.append(str(e))
+        return time.perf_counter() - start
+
+    wall_start = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"bench-{name}") as pool:
+            latencies = list(pool.map(timed, calls))
+    else:
+        latencies = [timed(call) for call in calls]
+    wall_time = time.perf_counter() - wall_start
+
+    return {
+        **latency_summary(latencies),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "wall_time": wall_time,
+        "throughput_per_s": len(calls) / wall_time if wall_time > 0 else 0.0
+    }
+
+
+def run_benchmark(n_cases: int = 20, documents_per_case: int = 3, delay: float = 0.05,
+                  concurrency: int = 1, seed: int = 42, deadline_checks: int = 100,
+                  document_chars: int = 1500, verbose: bool = False) -> Dict[str, Any]:
+    """
+    Pełny przebieg: add_case -> analyze_case -> generate_decision_draft -> check_deadlines
+
+    Args:
+        n_cases: Liczba spraw w korpusie
+        documents_per_case: Liczba dokumentów w sprawie
+        delay: Opóźnienie adaptera testowego na wywołanie modelu (sekundy)
+        concurrency: Liczba spraw przetwarzanych równolegle w każdej operacji
+        seed: Ziarno korpusu
+        deadline_checks: Liczba wywołań check_deadlines
+        document_chars: Przybliżona długość dokumentu
+        verbose: Czy pokazywać komunikaty asystenta (domyślnie wyciszone)
+
+    Returns:
+        Wynik JSON-owalny: konfiguracja, statystyki operacji, czasy etapów, czas całkowity, RSS
+    """
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        setup_start = time.perf_counter()
+        assistant, fake = create_benchmark_assistant(delay=delay)
+        cases = build_corpus(n_cases, documents_per_case, seed=seed, document_chars=document_chars)
+        setup_time = time.perf_counter() - setup_start
+
+        run_start = time.perf_counter()
+        operations = {
+            "add_case": _measure(
+                "add_case", [lambda case=case: assistant.add_case(case) for case in cases], concurrency),
+            "analyze_case": _measure(
+                "analyze_case", [lambda case=case: assistant.analyze_case(case.case_id) for case in cases],
+                concurrency),
+            "generate_decision_draft": _measure(
+                "generate_decision_draft",
+                [lambda case=case: assistant.generate_decision_draft(case.case_id) for case in cases],
+                concurrency),
+            "check_deadlines": _measure(
+                "check_deadlines", [lambda: assistant.check_deadlines(days_ahead=14)] * deadline_checks, 1),
+        }
+        total_time = time.perf_counter() - run_start
+
+    return {
+        "benchmark": "administrative_assistant",
+        "timestamp": datetime.now().isoformat(),
+        "config": {
+            "cases": n_cases,
+            "documents_per_case": documents_per_case,
+            "document_chars": document_chars,
+            "model_delay": delay,
+            "concurrency": concurrency,
+            "deadline_checks": deadline_checks,
+            "seed": seed
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform()
+        },
+        "setup_time": setup_time,
+        "total_time": total_time,
+        "model_calls": fake.calls,
+        "cases_per_s": n_cases / total_time if total_time > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "operations": operations,
+        "stages": assistant.stage_metrics.snapshot()
+    }
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.2,
+                    metrics: tuple = ("p50", "p95", "p99")) -> List[str]:
+    """
+    Porównanie z poprzednim wynikiem - lista regresji (wzrost opóźnienia ponad tolerancję)
+
+    Args:
+        current: Bieżący wynik run_benchmark
+        baseline: Wynik referencyjny
+        tolerance: Dopuszczalny względny wzrost (0.2 = 20%)
+        metrics: Porównywane percentyle
+    """
+    regressions = []
+    if current.get("config") != baseline.get("config"):
+        regressions.append("⚠️ Różna konfiguracja benchmarku - porównanie orientacyjne")
+    for name, stats in current.get("operations", {}).items():
+        reference = baseline.get("operations", {}).get(name)
+        if not reference:
+            continue
+        for metric in metrics:
+            before, after = reference.get(metric, 0.0), stats.get(metric, 0.0)
+            if before > 0 and after > before * (1 + tolerance):
+                regressions.append(f"{name}.{metric}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms "
+                                   f"(+{(after / before - 1) * 100:.0f}%)")
+        if stats.get("errors", 0) > reference.get("errors", 0):
+            regressions.append(f"{name}.errors: {reference.get('errors', 0)} -> {stats['errors']}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark potoku asystenta administracyjnego")
+    parser.add_argument("--cases", type=int, default=20, help="Liczba spraw")
+    parser.add_argument("--documents", type=int, default=3, help="Dokumentów na sprawę")
+    parser.add_argument("--document-chars", type=int, default=1500, help="Długość dokumentu (znaki)")
+    parser.add_argument("--delay", type=float, default=0.05, help="Opóźnienie modelu testowego (s)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Sprawy przetwarzane równolegle")
+    parser.add_argument("--deadline-checks", type=int, default=100, help="Wywołania check_deadlines")
+    parser.add_argument("--seed", type=int, default=42, help="Ziarno korpusu")
+    parser.add_argument("--output", help="Plik wynikowy JSON (domyślnie stdout)")
+    parser.add_argument("--baseline", help="Wynik referencyjny JSON do porównania")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Dopuszczalny wzrost opóźnień")
+    parser.add_argument("--verbose", action="store_true", help="Pokaż komunikaty asystenta")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(
+        n_cases=args.cases, documents_per_case=args.documents, delay=args.delay,
+        concurrency=args.concurrency, seed=args.seed, deadline_checks=args.deadline_checks,
+        document_chars=args.document_chars, verbose=args.verbose
+    )
+
+    report = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+        print(f"✅ Wynik zapisany: {args.output}", file=sys.stderr)
+    else:
+        print(report)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(result, baseline, tolerance=args.tolerance)
+        for line in regressions:
+            print(f"❌ {line}" if not line.startswith("⚠️") else line, file=sys.stderr)
+        if any(not line.startswith("⚠️") for line in regressions):
+            return 1
+        print("✅ Brak regresji względem wyniku referencyjnego", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+📊 Przyrostowe statystyki spraw dla dashboardu
+Agregaty (status, typ, ryzyko, decyzje) aktualizowane przy każdej zmianie sprawy - odczyt O(1)
+"""
+
+import threading
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+# Poziomy ryzyka zawsze obecne w statystykach
+RISK_LEVELS = ("niski", "średni", "wysoki", "krytyczny")
+
+
+class CaseStatistics:
+    """Żywe agregaty spraw administracyjnych"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, Tuple[str, str, Optional[str], bool]] = {}
+        self._reset()
+
+    def observe(self, case) -> None:
+        """Uwzględnienie nowej lub zmienionej sprawy (odejmuje poprzedni stan sprawy)"""
+        snapshot = self._snapshot(case)
+        with self._lock:
+            previous = self._snapshots.get(case.case_id)
+            if previous == snapshot:
+                return
+            if previous is not None:
+                self._apply(previous, -1)
+            self._apply(snapshot, +1)
+            self._snapshots[case.case_id] = snapshot
+
+    def remove(self, case_id: str) -> None:
+        """Usunięcie sprawy z agregatów"""
+        with self._lock:
+            previous = self._snapshots.pop(case_id, None)
+            if previous is not None:
+                self._apply(previous, -1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Aktualne statystyki (kopie liczników)"""
+        with self._lock:
+            return {
+                "total_cases": len(self._snapshots),
+                "cases_by_status": dict(self._by_status),
+                "cases_by_type": dict(self._by_type),
+                "cases_by_risk": dict(self._by_risk),
+                "cases_with_decisions": self._with_decisions
+            }
+
+    def rebuild(self, cases: Iterable) -> None:
+        """Przeliczenie agregatów od zera"""
+        with self._lock:
+            self._snapshots = {}
+            self._reset()
+            for case in cases:
+                snapshot = self._snapshot(case)
+                self._apply(snapshot, +1)
+                self._snapshots[case.case_id] = snapshot
+
+    def check_consistency(self, cases: Iterable) -> bool:
+        """Porównanie agregatów z pełnym przeliczeniem (dla testów)"""
+        reference = CaseStatistics()
+        reference.rebuild(cases)
+        return reference.get_stats() == self.get_stats()
+
+    def _reset(self):
+        self._by_status: Dict[str, int] = {}
+        self._by_type: Dict[str, int] = {}
+        self._by_risk: Dict[str, int] = {level: 0 for level in RISK_LEVELS}
+        self._with_decisions = 0
+
+    @staticmethod
+    def _snapshot(case) -> Tuple[str, str, Optional[str], bool]:
+        risk_level = case.risk_assessment.get("level", "średni") if case.risk_assessment else None
+        return case.status, case.case_type, risk_level, bool(case.decision_proposal)
+
+    def _apply(self, snapshot: Tuple[str, str, Optional[str], bool], delta: int):
+        status, case_type, risk_level, has_decision = snapshot
+        self._increment(self._by_status, status, delta)
+        self._increment(self._by_type, case_type, delta)
+        if risk_level is not None:
+            self._by_risk[risk_level] = self._by_risk.get(risk_level, 0) + delta
+        if has_decision:
+            self._with_decisions += delta
+
+    @staticmethod
+    def _increment(counter: Dict[str, int], key: str, delta: int):
+        value = counter.get(key, 0) + delta
+        if value:
+            counter[key] = value
+        else:
+            counter.pop(key, None)
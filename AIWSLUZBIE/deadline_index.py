@@ -0,0 +1,65 @@
+"""
+⏰ Indeks terminów spraw
+Posortowana lista (termin, case_id) utrzymywana przy dodawaniu i aktualizacji spraw -
+zapytania o sprawy zaległe i zbliżające się kosztują O(log n + k)
+"""
+
+import bisect
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+class DeadlineIndex:
+    """Indeks spraw uporządkowany po terminie"""
+
+    def __init__(self):
+        self._entries: List[Tuple[datetime, str]] = []
+        self._deadlines: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+
+    def add(self, case_id: str, deadline: Optional[datetime]) -> None:
+        """Dodanie lub aktualizacja terminu sprawy (None usuwa sprawę z indeksu)"""
+        with self._lock:
+            self._discard(case_id)
+            if deadline is not None:
+                bisect.insort(self._entries, (deadline, case_id))
+                self._deadlines[case_id] = deadline
+
+    def remove(self, case_id: str) -> None:
+        """Usunięcie sprawy z indeksu"""
+        with self._lock:
+            self._discard(case_id)
+
+    def due_before(self, threshold: datetime, since: Optional[datetime] = None) -> List[Tuple[datetime, str]]:
+        """
+        Sprawy z terminem <= threshold, rosnąco po terminie
+
+        Args:
+            threshold: Górna granica terminu (włącznie)
+            since: Dolna granica terminu (włącznie), None = także zaległe
+        """
+        with self._lock:
+            end = bisect.bisect_right(self._entries, (threshold, chr(0x10FFFF)))
+            start = bisect.bisect_left(self._entries, (since, "")) if since is not None else 0
+            return self._entries[start:end]
+
+    def overdue(self, now: Optional[datetime] = None) -> List[Tuple[datetime, str]]:
+        """Sprawy po terminie (termin < now)"""
+        now = now or datetime.now()
+        with self._lock:
+            end = bisect.bisect_left(self._entries, (now, ""))
+            return self._entries[:end]
+
+    def get(self, case_id: str) -> Optional[datetime]:
+        return self._deadlines.get(case_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _discard(self, case_id: str):
+        previous = self._deadlines.pop(case_id, None)
+        if previous is not None:
+            index = bisect.bisect_left(self._entries, (previous, case_id))
+            if index < len(self._entries) and self._entries[index] == (previous, case_id):
+                del self._entries[index]
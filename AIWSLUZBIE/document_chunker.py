@@ -3,8 +3,28 @@
 Dzieli długie dokumenty na mniejsze fragmenty dla lepszej obsługi kontekstu
 """
 
-from typing import List, Dict, Any
 import re
+import bisect
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, Union
+
+# Priorytety podziału: koniec akapitu > koniec zdania > spacja
+BREAK_PATTERNS = [
+    re.compile(r'\n\n'),  # Podwójny enter (akapit)
+    re.compile(r'\.\s+[A-ZĄĆĘŁŃÓŚŹŻ]'),  # Koniec zdania + wielka litera
+    re.compile(r'\.\s*\n'),  # Koniec zdania + nowa linia
+    re.compile(r'[.!?]\s+'),  # Koniec zdania
+    re.compile(r'\s+'),  # Spacja
+]
+
+# Minimalna pozycja podziału jako ułamek chunk_size (nie za wcześnie)
+MIN_BREAK_RATIO = 0.7
+
+# Zapas znaków za oknem chunka przy czytaniu strumienia (dopasowania na granicy okna)
+STREAM_LOOKAHEAD = 64
+
+# Rozmiar bloku, w jakim przetwarzany jest tekst podany w całości
+TEXT_BLOCK_SIZE = 65536
+
 
 class DocumentChunker:
     """Klasa do dzielenia długich dokumentów na mniejsze fragmenty"""
@@ -28,88 +48,156 @@ class DocumentChunker:
         Returns:
             Lista fragmentów dokumentu
         """
-        content = document.get('content', '')
-        doc_type = document.get('type', 'unknown')
-        doc_id = document.get('id', 'unknown')
-        
-        # Jeśli dokument jest krótki, zwróć jako jeden chunk
-        if len(content) <= self.chunk_size:
-            return [{
-                'id': f"{doc_id}_chunk_0",
-                'type': doc_type,
-                'content': content,
-                'chunk_index': 0,
-                'total_chunks': 1,
-                'start_char': 0,
-                'end_char': len(content)
-            }]
-        
-        # Dziel na fragmenty
-        chunks = []
+        chunks = list(self.iter_chunks(
+            document.get('content', ''),
+            doc_id=document.get('id', 'unknown'),
+            doc_type=document.get('type', 'unknown')
+        ))
+        
+        # Zaktualizuj total_chunks
+        for chunk in chunks:
+            chunk['total_chunks'] = len(chunks)
+        
+        return chunks
+    
+    def iter_chunks(self, source: Union[str, Iterable[str]], doc_id: str = 'unknown',
+                    doc_type: str = 'unknown') -> Iterator[Dict[str, Any]]:
+        """
+        Leniwe dzielenie tekstu lub strumienia tekstu (np. otwartego pliku) na fragmenty
+        
+        Pamięć ograniczona do bufora o rozmiarze rzędu chunk_size, czas liniowy względem
+        długości dokumentu. Pozycje podziału wyznaczane są jednym przebiegiem po buforze.
+        Liczba wszystkich fragmentów nie jest znana z góry - 'total_chunks' wynosi 0.
+        
+        Args:
+            source: Tekst albo iterator kawałków tekstu
+            doc_id: Identyfikator dokumentu
+            doc_type: Typ dokumentu
+            
+        Yields:
+            Kolejne fragmenty dokumentu
+        """
+        if isinstance(source, str):
+            block = max(TEXT_BLOCK_SIZE, self.chunk_size)
+            pieces = (source[i:i + block] for i in range(0, max(len(source), 1), block))
+        else:
+            pieces = iter(source)
+        buffer = ""
+        offset = 0  # Pozycja buffer[0] w całym dokumencie
+        exhausted = False
+        breaks = None  # Pozycje podziału dla bieżącego bufora
+        
         start = 0
         chunk_index = 0
         
-        while start < len(content):
+        while True:
+            # Doczytaj tyle, by okno chunka (z zapasem) mieściło się w buforze
+            needed = start - offset + self.chunk_size + STREAM_LOOKAHEAD
+            if len(buffer) < needed and not exhausted:
+                parts = [buffer[start - offset:]]
+                available = len(parts[0])
+                for piece in pieces:
+                    parts.append(piece)
+                    available += len(piece)
+                    if available >= self.chunk_size + STREAM_LOOKAHEAD:
+                        break
+                else:
+                    exhausted = True
+                buffer = "".join(parts)
+                offset = start
+                breaks = None
+            
+            buffer_end = offset + len(buffer)
+            
+            # Jeśli dokument jest krótki, zwróć jako jeden chunk
+            if chunk_index == 0 and start == 0 and exhausted and buffer_end <= self.chunk_size:
+                yield self._make_chunk(doc_id, doc_type, buffer, 0, 0, buffer_end)
+                return
+            
             # Określ koniec chunka
-            end = min(start + self.chunk_size, len(content))
+            end = min(start + self.chunk_size, buffer_end)
             
             # Spróbuj znaleźć naturalne miejsce podziału (koniec zdania/akapitu)
-            if end < len(content):
-                # Szukaj końca zdania lub akapitu
-                natural_break = self._find_natural_break(content, start, end)
-                if natural_break > start:
-                    end = natural_break
+            if end < buffer_end or not exhausted:
+                if breaks is None:
+                    breaks = [None] * len(BREAK_PATTERNS)
+                natural_break = self._find_natural_break(buffer, breaks, start - offset, end - offset)
+                if natural_break is not None:
+                    end = offset + natural_break
             
             # Wyciągnij fragment
-            chunk_content = content[start:end].strip()
+            chunk_content = buffer[start - offset:end - offset].strip()
             
             if chunk_content:  # Tylko jeśli fragment nie jest pusty
-                chunks.append({
-                    'id': f"{doc_id}_chunk_{chunk_index}",
-                    'type': doc_type,
-                    'content': chunk_content,
-                    'chunk_index': chunk_index,
-                    'total_chunks': 0,  # Zaktualizujemy później
-                    'start_char': start,
-                    'end_char': end
-                })
+                yield self._make_chunk(doc_id, doc_type, chunk_content, chunk_index, start, end)
                 chunk_index += 1
             
+            # Ostatni fragment - koniec dokumentu
+            if exhausted and end >= buffer_end:
+                return
+            
             # Przesuń start z nakładką
-            start = end - self.chunk_overlap
-            if start >= len(content):
-                break
+            start = max(end - self.chunk_overlap, start + 1)
+    
+    def iter_file_chunks(self, path: str, doc_id: Optional[str] = None, doc_type: str = 'unknown',
+                         encoding: str = 'utf-8', read_size: int = 65536) -> Iterator[Dict[str, Any]]:
+        """Leniwe dzielenie pliku tekstowego czytanego blokami"""
+        with open(path, encoding=encoding) as f:
+            blocks = iter(lambda: f.read(read_size), '')
+            yield from self.iter_chunks(blocks, doc_id=doc_id or path, doc_type=doc_type)
+    
+    @staticmethod
+    def _make_chunk(doc_id: str, doc_type: str, content: str, chunk_index: int,
+                    start: int, end: int) -> Dict[str, Any]:
+        return {
+            'id': f"{doc_id}_chunk_{chunk_index}",
+            'type': doc_type,
+            'content': content,
+            'chunk_index': chunk_index,
+            'total_chunks': 0,  # Uzupełniane przez chunk_document
+            'start_char': start,
+            'end_char': end
+        }
+    
+    @staticmethod
+    def _scan_breaks(text: str, pattern_index: int) -> Tuple[List[int], List[int]]:
+        """Jeden przebieg wzorca po tekście - (początki, końce) dopasowań"""
+        starts, ends = [], []
+        for match in BREAK_PATTERNS[pattern_index].finditer(text):
+            starts.append(match.start())
+            ends.append(match.end())
+        return starts, ends
+    
+    def _find_natural_break(self, text: str, breaks: List[Optional[Tuple[List[int], List[int]]]],
+                            start: int, end: int) -> Optional[int]:
+        """Znajduje naturalne miejsce podziału (koniec zdania/akapitu) w oknie [start, end)"""
+        min_pos = start + self.chunk_size * MIN_BREAK_RATIO
         
-        # Zaktualizuj total_chunks
-        for chunk in chunks:
-            chunk['total_chunks'] = len(chunks)
+        for pattern_index in range(len(BREAK_PATTERNS)):
+            # Wzorce niższego priorytetu skanowane dopiero, gdy są potrzebne
+            if breaks[pattern_index] is None:
+                breaks[pattern_index] = self._scan_breaks(text, pattern_index)
+            starts, ends = breaks[pattern_index]
+            pattern = BREAK_PATTERNS[pattern_index]
+            
+            # Ostatnie dopasowanie kończące się w oknie (dopasowania są rozłączne i posortowane)
+            i = bisect.bisect_right(ends, end) - 1
+            
+            # Dopasowanie przecięte końcem okna - dopasuj ponownie tylko do granicy okna
+            if i + 1 < len(starts) and starts[i + 1] < end:
+                match = pattern.match(text, max(starts[i + 1], start), end)
+                if match and match.end() >= min_pos:
+                    return match.end()
+            
+            if i >= 0 and ends[i] >= min_pos:
+                if starts[i] >= start:
+                    return ends[i]
+                # Dopasowanie zaczynające się przed oknem
+                match = pattern.match(text, start, end)
+                if match and match.end() >= min_pos:
+                    return match.end()
         
-        return chunks
-    
-    def _find_natural_break(self, text: str, start: int, end: int) -> int:
-        """Znajduje naturalne miejsce podziału (koniec zdania/akapitu)"""
-        # Szukaj od końca chunka wstecz
-        search_text = text[start:end]
-        
-        # Priorytety: koniec akapitu > koniec zdania > spacja
-        patterns = [
-            r'\n\n',  # Podwójny enter (akapit)
-            r'\.\s+[A-ZĄĆĘŁŃÓŚŹŻ]',  # Koniec zdania + wielka litera
-            r'\.\s*\n',  # Koniec zdania + nowa linia
-            r'[.!?]\s+',  # Koniec zdania
-            r'\s+',  # Spacja
-        ]
-        
-        for pattern in patterns:
-            matches = list(re.finditer(pattern, search_text))
-            if matches:
-                # Weź ostatnie dopasowanie przed końcem
-                for match in reversed(matches):
-                    pos = start + match.end()
-                    if pos >= start + self.chunk_size * 0.7:  # Nie za wcześnie
-                        return pos
-        
-        return end  # Jeśli nie znaleziono, użyj końca
+        return None  # Jeśli nie znaleziono, użyj końca
     
     def chunk_text(self, text: str, metadata: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """
@@ -152,22 +240,20 @@ class DocumentChunker:
         sorted_chunks = sorted(chunks, key=lambda x: x.get('chunk_index', 0))
         
         # Usuń duplikaty (nakładki)
-        merged_text = ""
+        parts = []
         last_end = -1
         
         for chunk in sorted_chunks:
             start = chunk.get('start_char', 0)
             content = chunk.get('content', '')
             
-            if start > last_end:
-                merged_text += content + "\n\n"
-                last_end = chunk.get('end_char', start + len(content))
-            elif start == last_end:
-                merged_text += content + "\n\n"
+            if start >= last_end:
+                parts.append(content)
                 last_end = chunk.get('end_char', start + len(content))
         
+        merged_text = "".join(part + "\n\n" for part in parts)
+        
         if max_length and len(merged_text) > max_length:
             return merged_text[:max_length] + "..."
         
         return merged_text.strip()
-
@@ -4,15 +4,33 @@ System zabezpieczeń dla Asystenta AI dla Administracji
 """
 
 from typing import Dict, List, Any, Tuple, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
+from dataclasses import dataclass
 import re
+import bisect
 import hashlib
 import json
 
+from audit_store import AuditLogStore
+
+@dataclass
+class ScanMatch:
+    """Dopasowanie skanera guardrails (dane osobowe lub sygnatura ataku)"""
+    kind: str       # np. "pesel", "email", "sql_keyword", "xss_script"
+    category: str   # "pii", "blocked_keyword", "sql_injection", "xss"
+    start: int
+    end: int
+    value: str
+
 class SecurityGuardrails:
     """Zaawansowany system guardrails i bezpieczeństwa"""
     
-    def __init__(self):
+    def __init__(self, audit_store=None):
+        """
+        Args:
+            audit_store: Opcjonalny magazyn logu audytowego (audit_store.AuditLogStore),
+                         domyślnie bufor 10000 ostatnich wpisów w pamięci
+        """
         # Limity
         self.max_document_size = 10 * 1024 * 1024  # 10MB
         self.max_query_length = 10000
@@ -35,8 +53,26 @@ class SecurityGuardrails:
             "telefon": r"\b\d{3}[\s-]?\d{3}[\s-]?\d{3}\b"
         }
         
+        # Sygnatury ataków (SQL injection, XSS)
+        self.injection_patterns = {
+            "sql_keyword": ("sql_injection", r"\b(?:SELECT|INSERT|UPDATE|DELETE|DROP|ALTER|CREATE|TRUNCATE)\b"),
+            "sql_token": ("sql_injection", r"--|;|\*|'"),
+            "sql_tautology": ("sql_injection", r"\b(?:OR|AND)\s+\d+\s*=\s*\d+"),
+            "xss_script": ("xss", r"<script[^>]*>.*?</script>"),
+            "xss_javascript": ("xss", r"javascript:"),
+            "xss_handler": ("xss", r"on\w+\s*="),
+        }
+        
+        # Skaner kompilowany raz - wzorce blokujące i dane osobowe
+        self._compile_scanner()
+        
+        # Sanityzacja wyjścia
+        self._script_tag_re = re.compile(r"<script[^>]*>.*?</script>", re.IGNORECASE | re.DOTALL)
+        self._javascript_re = re.compile(r"javascript:", re.IGNORECASE)
+        self._event_handler_re = re.compile(r"on\w+\s*=\s*['\"][^'\"]*['\"]", re.IGNORECASE)
+        
         # Audit log
-        self.audit_log: List[Dict] = []
+        self.audit_log = audit_store if audit_store is not None else AuditLogStore(max_memory_entries=10000)
         self.operation_counts: Dict[str, int] = {}
         self.last_reset = datetime.now()
         
@@ -46,6 +82,68 @@ class SecurityGuardrails:
             "check_deadlines", "get_case_summary"
         ]
     
+    def _compile_scanner(self):
+        """
+        Kompilacja wzorców skanera (raz, przy konstrukcji): osobne wyrażenie na każdy rodzaj.
+        
+        Osobne przebiegi zamiast jednej alternatywy z grupami nazwanymi: w module re
+        alternatywa traci optymalizację stałego prefiksu i jest ok. 2x wolniejsza niż
+        suma przebiegów, a dopasowania różnych rodzajów mogą się nakładać (e-mail nie
+        "zjada" sygnatury ataku, 9 cyfr to jednocześnie regon i telefon).
+        Wywołaj ponownie po zmianie wzorców.
+        """
+        keywords = sorted(self.blocked_keywords, key=len, reverse=True)
+        self._keyword_re = re.compile("|".join(re.escape(k) for k in keywords), re.IGNORECASE) if keywords else None
+        # Kolejność injection_patterns = kolejność komunikatów validate_input (SQL injection przed XSS)
+        self._injection_res = {
+            kind: (category, re.compile(pattern, re.IGNORECASE))
+            for kind, (category, pattern) in self.injection_patterns.items()
+        }
+        self._pii_res = {kind: re.compile(pattern, re.IGNORECASE) for kind, pattern in self.personal_data_patterns.items()}
+    
+    def scan(self, text: str) -> List[ScanMatch]:
+        """Wszystkie dane osobowe i sygnatury ataków w tekście (posortowane po pozycji, mogą się nakładać)"""
+        matches = []
+        if self._keyword_re is not None:
+            matches.extend(
+                ScanMatch("blocked_keyword", "blocked_keyword", m.start(), m.end(), m.group())
+                for m in self._keyword_re.finditer(text)
+            )
+        for kind, (category, pattern) in self._injection_res.items():
+            matches.extend(ScanMatch(kind, category, m.start(), m.end(), m.group()) for m in pattern.finditer(text))
+        matches.extend(self._scan_pii(text))
+        matches.sort(key=lambda match: (match.start, match.end))
+        return matches
+    
+    def scan_personal_data(self, text: str) -> List[ScanMatch]:
+        """Tylko dane osobowe (bez sygnatur ataków), posortowane po pozycji"""
+        matches = self._scan_pii(text)
+        matches.sort(key=lambda match: (match.start, match.end))
+        return matches
+    
+    def _scan_pii(self, text: str) -> List[ScanMatch]:
+        return [
+            ScanMatch(kind, "pii", m.start(), m.end(), m.group())
+            for kind, pattern in self._pii_res.items()
+            for m in pattern.finditer(text)
+        ]
+    
+    def _find_blocked(self, text_lower: str) -> Optional[str]:
+        """Pierwszy powód odrzucenia (słowo kluczowe, SQL injection, XSS) albo None"""
+        # Słowa kluczowe jako podciągi - szybciej niż wyrażenie regularne
+        for keyword in self.blocked_keywords:
+            if keyword in text_lower:
+                return f"Wykryto niebezpieczne słowo kluczowe: {keyword}"
+        
+        messages = {
+            "sql_injection": "Wykryto potencjalną próbę SQL injection",
+            "xss": "Wykryto potencjalną próbę XSS"
+        }
+        for category, pattern in self._injection_res.values():
+            if pattern.search(text_lower):
+                return messages.get(category, f"Wykryto potencjalny atak: {category}")
+        return None
+    
     def validate_input(self, data: Any, data_type: str = "document") -> Tuple[bool, str]:
         """Zaawansowana walidacja danych wejściowych"""
         
@@ -56,39 +154,17 @@ class SecurityGuardrails:
                     return False, f"Dokument przekracza limit {self.max_document_size / 1024 / 1024:.1f}MB"
                 
                 if isinstance(data, dict):
-                    data_str = json.dumps(data)
-                    if len(data_str.encode('utf-8')) > self.max_document_size:
+                    if len(json.dumps(data).encode('utf-8')) > self.max_document_size:
                         return False, "Dokument przekracza limit rozmiaru"
             
             elif data_type == "query":
                 if isinstance(data, str) and len(data) > self.max_query_length:
                     return False, f"Zapytanie przekracza limit {self.max_query_length} znaków"
             
-            # Sprawdzenie niebezpiecznych słów kluczowych
-            data_str = str(data).lower()
-            for keyword in self.blocked_keywords:
-                if keyword in data_str:
-                    return False, f"Wykryto niebezpieczne słowo kluczowe: {keyword}"
-            
-            # Sprawdzenie SQL injection (podstawowe)
-            sql_patterns = [
-                r"(\b(SELECT|INSERT|UPDATE|DELETE|DROP|ALTER|CREATE|TRUNCATE)\b)",
-                r"(--|;|\*|')",
-                r"(\b(OR|AND)\s+\d+\s*=\s*\d+)"
-            ]
-            for pattern in sql_patterns:
-                if re.search(pattern, data_str, re.IGNORECASE):
-                    return False, "Wykryto potencjalną próbę SQL injection"
-            
-            # Sprawdzenie XSS (podstawowe)
-            xss_patterns = [
-                r"<script[^>]*>.*?</script>",
-                r"javascript:",
-                r"on\w+\s*="
-            ]
-            for pattern in xss_patterns:
-                if re.search(pattern, data_str, re.IGNORECASE):
-                    return False, "Wykryto potencjalną próbę XSS"
+            # Słowa kluczowe, SQL injection i XSS - skanowana reprezentacja str() (dict: repr z cudzysłowami)
+            reason = self._find_blocked(str(data).lower())
+            if reason is not None:
+                return False, reason
             
             return True, "OK"
             
@@ -99,48 +175,72 @@ class SecurityGuardrails:
         """Sanityzacja danych wyjściowych"""
         
         # Usuń tagi script
-        output = re.sub(r"<script[^>]*>.*?</script>", "", output, flags=re.IGNORECASE | re.DOTALL)
+        output = self._script_tag_re.sub("", output)
         
         # Usuń javascript: links
-        output = re.sub(r"javascript:", "", output, flags=re.IGNORECASE)
+        output = self._javascript_re.sub("", output)
         
         # Usuń event handlers
-        output = re.sub(r"on\w+\s*=\s*['\"][^'\"]*['\"]", "", output, flags=re.IGNORECASE)
+        output = self._event_handler_re.sub("", output)
         
         # Escape HTML (podstawowe)
         output = output.replace("<", "&lt;").replace(">", "&gt;")
         
         return output
     
-    def detect_personal_data(self, text: str) -> Dict[str, List[str]]:
-        """Wykrywanie danych osobowych w tekście"""
-        detected = {}
-        
-        for data_type, pattern in self.personal_data_patterns.items():
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                detected[data_type] = matches
-        
-        return detected
+    def detect_personal_data(self, text: str, matches: Optional[List[ScanMatch]] = None) -> Dict[str, List[str]]:
+        """
+        Wykrywanie danych osobowych w tekście (rodzaje w kolejności wzorców, mogą się nakładać)
+        
+        Args:
+            matches: Dopasowania z scan()/scan_personal_data() - bez ponownego skanowania tekstu
+        """
+        if matches is None:
+            detected = {kind: pattern.findall(text) for kind, pattern in self._pii_res.items()}
+        else:
+            detected = {kind: [] for kind in self.personal_data_patterns}
+            for match in matches:
+                if match.category == "pii":
+                    detected.setdefault(match.kind, []).append(match.value)
+        
+        return {kind: values for kind, values in detected.items() if values}
     
-    def anonymize_personal_data(self, text: str) -> Tuple[str, Dict[str, int]]:
-        """Anonimizacja danych osobowych"""
-        anonymized = text
-        stats = {}
-        
-        for data_type, pattern in self.personal_data_patterns.items():
-            matches = re.findall(pattern, anonymized, re.IGNORECASE)
-            if matches:
-                stats[data_type] = len(matches)
-                # Zastąp hashem
-                anonymized = re.sub(
-                    pattern,
-                    lambda m: f"[{data_type.upper()}_HASH_{hashlib.md5(m.group().encode()).hexdigest()[:8]}]",
-                    anonymized,
-                    flags=re.IGNORECASE
-                )
-        
-        return anonymized, stats
+    def anonymize_personal_data(self, text: str, matches: Optional[List[ScanMatch]] = None) -> Tuple[str, Dict[str, int]]:
+        """
+        Anonimizacja danych osobowych (na podstawie pozycji dopasowań skanera)
+        
+        Przy nakładających się dopasowaniach wygrywa wcześniejszy wzorzec z personal_data_patterns
+        (jak przy zastępowaniu wzorzec po wzorcu). Dopasowania pochodzą z oryginalnego tekstu -
+        wstawiony znacznik nie tworzy nowej granicy słowa dla kolejnych wzorców.
+        """
+        priority = {kind: index for index, kind in enumerate(self.personal_data_patterns)}
+        pii = [m for m in (matches if matches is not None else self.scan_personal_data(text)) if m.category == "pii"]
+        
+        # Wybrane przedziały posortowane po początku - kolizja sprawdzana z sąsiadami (bisect)
+        selected: List[ScanMatch] = []
+        starts: List[int] = []
+        for match in sorted(pii, key=lambda m: (priority.get(m.kind, len(priority)), m.start)):
+            index = bisect.bisect_right(starts, match.start)
+            if index > 0 and selected[index - 1].end > match.start:
+                continue
+            if index < len(selected) and selected[index].start < match.end:
+                continue
+            starts.insert(index, match.start)
+            selected.insert(index, match)
+        
+        parts = []
+        stats: Dict[str, int] = {}
+        position = 0
+        for match in selected:
+            stats[match.kind] = stats.get(match.kind, 0) + 1
+            # Zastąp hashem
+            parts.append(text[position:match.start])
+            parts.append(f"[{match.kind.upper()}_HASH_{hashlib.md5(match.value.encode()).hexdigest()[:8]}]")
+            position = match.end
+        
+        parts.append(text[position:])
+        stats = {kind: stats[kind] for kind in sorted(stats, key=lambda kind: priority.get(kind, len(priority)))}
+        return "".join(parts), stats
     
     def check_rodo_compliance(self, data: Dict) -> Tuple[bool, List[str]]:
         """Sprawdzenie zgodności z RODO"""
@@ -201,12 +301,9 @@ class SecurityGuardrails:
             "details": sanitized_details
         }
         
+        # Bufor cykliczny - bez kopiowania historii
         self.audit_log.append(log_entry)
         
-        # Ograniczenie rozmiaru logu
-        if len(self.audit_log) > 10000:
-            self.audit_log = self.audit_log[-10000:]
-        
         return True
     
     def _check_rate_limit(self, user: str, operation: str) -> bool:
@@ -244,34 +341,20 @@ class SecurityGuardrails:
         """Hashowanie ID użytkownika dla prywatności"""
         return hashlib.sha256(user_id.encode()).hexdigest()[:16]
     
-    def get_audit_log(self, filters: Optional[Dict] = None) -> List[Dict]:
-        """Pobranie logu audit z opcjonalnymi filtrami"""
-        log = self.audit_log.copy()
-        
-        if filters:
-            if "user" in filters:
-                user_hash = self._hash_user_id(filters["user"])
-                log = [entry for entry in log if entry.get("user") == user_hash]
-            
-            if "operation" in filters:
-                log = [entry for entry in log if entry.get("operation") == filters["operation"]]
-            
-            if "status" in filters:
-                log = [entry for entry in log if entry.get("status") == filters["status"]]
-            
-            if "date_from" in filters:
-                log = [entry for entry in log if entry.get("timestamp") >= filters["date_from"]]
-            
-            if "date_to" in filters:
-                log = [entry for entry in log if entry.get("timestamp") <= filters["date_to"]]
+    def get_audit_log(self, filters: Optional[Dict] = None, limit: Optional[int] = None,
+                      offset: int = 0, newest_first: bool = False) -> List[Dict]:
+        """Pobranie logu audit z opcjonalnymi filtrami i stronicowaniem"""
+        filters = dict(filters or {})
+        
+        if "user" in filters:
+            filters["user"] = self._hash_user_id(filters["user"])
         
-        return log
+        return self.audit_log.query(filters, limit=limit, offset=offset, newest_first=newest_first)
     
     def generate_security_report(self) -> Dict:
         """Generowanie raportu bezpieczeństwa"""
         now = datetime.now()
-        last_24h = [entry for entry in self.audit_log 
-                   if (now - datetime.fromisoformat(entry["timestamp"])).seconds < 86400]
+        last_24h = self.audit_log.query({"date_from": (now - timedelta(days=1)).isoformat()}, newest_first=False)
         
         blocked = [entry for entry in last_24h if entry.get("status") == "BLOCKED"]
         rate_limited = [entry for entry in last_24h if entry.get("status") == "RATE_LIMITED"]
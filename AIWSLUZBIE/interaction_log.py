@@ -0,0 +1,236 @@
+"""
+🧾 Ograniczony log interakcji z modelem LLM
+Bufor cykliczny ostatnich interakcji (skrót odpowiedzi zamiast treści), opcjonalny
+skompresowany dziennik na dysku oraz liczniki i histogram opóźnień - statystyki O(1)
+"""
+
+import os
+import gzip
+import json
+import bisect
+import hashlib
+import threading
+from collections import deque
+from typing import Dict, List, Any, Optional, Iterator
+
+# Granice kubełków histogramu opóźnień (sekundy, skala logarytmiczna x1.2: 1 ms - ok. 3 min)
+LATENCY_BUCKETS = tuple(round(0.001 * 1.2 ** i, 6) for i in range(67))
+
+
+class LatencyHistogram:
+    """Histogram opóźnień o stałych kubełkach - łączenie (merge) i percentyle w O(liczba kubełków)"""
+
+    def __init__(self, bounds: tuple = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Ostatni kubełek: powyżej najwyższej granicy
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram"):
+        """Dodanie zliczeń innego histogramu (te same granice kubełków)"""
+        if other.bounds != self.bounds:
+            raise ValueError("Histogramy mają różne granice kubełków")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """q-ty percentyl (0-100) - interpolacja liniowa w obrębie kubełka"""
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if index >= len(self.bounds):
+                    return self.max
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = min(self.bounds[index], self.max)
+                return lower + (upper - lower) * max(0.0, rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.mean(),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max
+        }
+
+
+class InteractionLog:
+    """Log interakcji o stałej pojemności w pamięci z bieżącymi statystykami"""
+
+    def __init__(self, capacity: int = 500, journal_path: Optional[str] = None):
+        """
+        Args:
+            capacity: Liczba ostatnich interakcji trzymanych w pamięci
+            journal_path: Ścieżka dziennika .jsonl.gz dla wpisów wypychanych z bufora (None = brak)
+        """
+        self.capacity = capacity
+        self.journal_path = journal_path
+        self._entries: deque = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._journal = None
+        if journal_path:
+            directory = os.path.dirname(journal_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._reset_counters()
+
+    def append(self, interaction: Dict[str, Any]):
+        """Dodanie interakcji - treść odpowiedzi zastępowana skrótem SHA-256 i długością"""
+        entry = self._compact(interaction)
+        with self._lock:
+            if self.journal_path and len(self._entries) == self.capacity:
+                self._spill(self._entries[0])
+            self._entries.append(entry)
+
+            self.total += 1
+            if entry.get('cached'):
+                self.cached += 1
+            if entry.get('success'):
+                self.successful += 1
+                self.response_chars += entry.get('response_length', 0)
+                self.tokens_estimate += entry.get('response_tokens', 0)
+                self.latency.add(float(entry.get('latency', 0.0)))
+
+    def extend(self, interactions: List[Dict[str, Any]]):
+        for interaction in interactions:
+            self.append(interaction)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statystyki od startu (niezależne od pojemności bufora)"""
+        with self._lock:
+            return {
+                'total_interactions': self.total,
+                'successful': self.successful,
+                'failed': self.total - self.successful,
+                'cached': self.cached,
+                'avg_latency': self.latency.mean(),
+                'latency': self.latency.to_dict(),
+                'total_tokens_estimate': self.tokens_estimate,
+                'avg_response_length': self.response_chars / self.successful if self.successful else 0
+            }
+
+    def counters(self) -> Dict[str, Any]:
+        """Stan liczników (do checkpointu) - odtwarzany przez restore_counters"""
+        with self._lock:
+            return {
+                'total': self.total,
+                'successful': self.successful,
+                'cached': self.cached,
+                'response_chars': self.response_chars,
+                'tokens_estimate': self.tokens_estimate,
+                'latency_total': self.latency.total,
+                'latency_histogram': {
+                    'counts': list(self.latency.counts),
+                    'count': self.latency.count,
+                    'max': self.latency.max
+                }
+            }
+
+    def restore_counters(self, counters: Dict[str, Any]) -> bool:
+        """
+        Przywrócenie liczników z counters()
+
+        Returns:
+            False (liczniki bez zmian), gdy brakuje histogramu albo ma inne kubełki
+        """
+        histogram = counters.get('latency_histogram') or {}
+        if len(histogram.get('counts', ())) != len(self.latency.counts):
+            return False
+        with self._lock:
+            self.total = counters['total']
+            self.successful = counters['successful']
+            self.cached = counters.get('cached', 0)
+            self.response_chars = counters['response_chars']
+            self.tokens_estimate = counters['tokens_estimate']
+            self.latency = LatencyHistogram(self.latency.bounds)
+            self.latency.counts = list(histogram['counts'])
+            self.latency.count = histogram['count']
+            self.latency.total = counters['latency_total']
+            self.latency.max = histogram['max']
+        return True
+
+    def recent(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Ostatnie interakcje z pamięci (chronologicznie)"""
+        with self._lock:
+            entries = list(self._entries)
+        return entries[-n:] if n else entries
+
+    def iter_journal(self) -> Iterator[Dict[str, Any]]:
+        """Odczyt wpisów wypchniętych do dziennika na dysku"""
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return
+        with self._lock:
+            if self._journal is not None:
+                self._journal.flush()
+        with gzip.open(self.journal_path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def clear(self):
+        """Wyczyszczenie bufora i liczników (dziennik na dysku pozostaje)"""
+        with self._lock:
+            self._entries.clear()
+            self._reset_counters()
+
+    def close(self):
+        """Zamknięcie dziennika na dysku"""
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.recent())
+
+    def __getitem__(self, index):
+        return self.recent()[index]
+
+    def __bool__(self) -> bool:
+        return self.total > 0
+
+    def _reset_counters(self):
+        self.total = 0
+        self.successful = 0
+        self.cached = 0
+        self.response_chars = 0
+        self.tokens_estimate = 0
+        self.latency = LatencyHistogram()
+
+    def _spill(self, entry: Dict[str, Any]):
+        if self._journal is None:
+            self._journal = gzip.open(self.journal_path, 'at', encoding='utf-8')
+        self._journal.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+
+    @staticmethod
+    def _compact(interaction: Dict[str, Any]) -> Dict[str, Any]:
+        entry = dict(interaction)
+        response = entry.pop('response', None)
+        if response is not None:
+            response = str(response)
+            entry['response_digest'] = hashlib.sha256(response.encode('utf-8')).hexdigest()[:16]
+            entry['response_length'] = len(response)
+            entry['response_tokens'] = len(response.split())
+        if isinstance(entry.get('prompt'), str) and len(entry['prompt']) > 200:
+            entry['prompt'] = entry['prompt'][:200]
+        return entry
@@ -0,0 +1,302 @@
+"""
+🧵 Kolejka zadań w tle (analizy spraw, projekty decyzji)
+Pula wątków roboczych niezależna od współbieżności HTTP, tabela zadań w SQLite
+(status, etap, postęp, wyniki częściowe) i anulowanie kooperacyjne między etapami
+"""
+
+import os
+import json
+import uuid
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable
+
+JOB_STATUSES = ("queued", "running", "completed", "failed", "cancelled")
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Zadanie anulowane - zgłaszane przez JobContext.report() na granicy etapu"""
+
+
+class JobContext:
+    """Uchwyt przekazywany do funkcji zadania - raportowanie postępu i sprawdzanie anulowania"""
+
+    def __init__(self, queue: "JobQueue", job_id: str):
+        self._queue = queue
+        self.job_id = job_id
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._queue._cancel_requested(self.job_id)
+
+    def report(self, stage: str, progress: Optional[float] = None, partial: Optional[Dict[str, Any]] = None):
+        """
+        Zapis etapu zadania
+
+        Args:
+            stage: Nazwa bieżącego etapu
+            progress: Postęp 0-1 (None = bez zmiany)
+            partial: Wyniki częściowe dołączane do zadania
+
+        Raises:
+            JobCancelled: Jeśli zażądano anulowania zadania
+        """
+        if self.cancel_requested:
+            raise JobCancelled(self.job_id)
+        self._queue._update(self.job_id, stage=stage, progress=progress, partial=partial)
+
+
+class JobQueue:
+    """Kolejka zadań w procesie z trwałą tabelą zadań"""
+
+    def __init__(self, max_workers: int = 2, db_path: Optional[str] = None, max_memory_jobs: int = 1000):
+        """
+        Args:
+            max_workers: Liczba zadań wykonywanych równocześnie
+            db_path: Ścieżka do pliku SQLite (None = tylko pamięć)
+            max_memory_jobs: Liczba zadań trzymanych w pamięci (zakończone starsze - tylko w SQLite)
+        """
+        self.max_workers = max(1, max_workers)
+        self.db_path = db_path
+        self.max_memory_jobs = max_memory_jobs
+        self._handlers: Dict[str, Callable[..., Any]] = {}
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._futures: Dict[str, Future] = {}
+        self._cancel: set = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self._db = None
+
+        if db_path:
+            try:
+                directory = os.path.dirname(db_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS jobs ("
+                    "job_id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+                    "created_at TEXT NOT NULL, job TEXT NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+                self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at)")
+                self._db.commit()
+                self._fail_interrupted()
+            except sqlite3.Error as e:
+                print(f"⚠️ Trwała tabela zadań niedostępna ({e}) - używam tylko pamięci")
+                self._db = None
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    def register(self, kind: str, handler: Callable[..., Any]):
+        """Rejestracja typu zadania - handler(context, **params) zwraca wynik (JSON)"""
+        self._handlers[kind] = handler
+
+    def submit(self, kind: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Dodanie zadania do kolejki
+
+        Returns:
+            Stan zadania (m.in. job_id, status="queued")
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Nieznany typ zadania: {kind}")
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "kind": kind,
+            "params": dict(params or {}),
+            "status": "queued",
+            "stage": None,
+            "progress": 0.0,
+            "partial": {},
+            "result": None,
+            "error": None,
+            "cancel_requested": False,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None
+        }
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+            self._persist(job)
+            self._evict()
+            self._futures[job["job_id"]] = self._executor.submit(self._run, job["job_id"])
+            return self._snapshot(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Stan zadania (pamięć, a dla starszych zadań - SQLite)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return self._snapshot(job)
+            return self._load_stored(job_id)
+
+    def list_jobs(self, status: Optional[str] = None, kind: Optional[str] = None,
+                  limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+        """Zadania od najnowszych (opcjonalnie filtrowane po statusie i typie)"""
+        with self._lock:
+            if self._db is None:
+                jobs = [
+                    self._snapshot(job) for job in reversed(self._jobs.values())
+                    if (status is None or job["status"] == status) and (kind is None or job["kind"] == kind)
+                ]
+                return jobs[offset:offset + limit]
+
+            conditions, params = [], []
+            if status is not None:
+                conditions.append("status = ?")
+                params.append(status)
+            if kind is not None:
+                conditions.append("kind = ?")
+                params.append(kind)
+            where = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+            rows = self._db.execute(
+                f"SELECT job FROM jobs{where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+            return [json.loads(row[0]) for row in rows]
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Anulowanie zadania - oczekujące od razu, wykonywane na najbliższej granicy etapu
+
+        Returns:
+            Stan zadania po zgłoszeniu anulowania (None = brak zadania).
+            Zadanie usunięte już z pamięci jest zakończone - zwracany jest jego stan z SQLite.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return self._load_stored(job_id)
+            if job["status"] in FINISHED_STATUSES:
+                return self._snapshot(job)
+            future = self._futures.get(job_id)
+            if job["status"] == "queued" and future is not None and future.cancel():
+                self._finish(job, "cancelled")
+            else:
+                self._cancel.add(job_id)
+                job["cancel_requested"] = True
+                self._persist(job)
+            return self._snapshot(job)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Liczba zadań w pamięci według statusu oraz konfiguracja puli"""
+        with self._lock:
+            counts = {status: 0 for status in JOB_STATUSES}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+        return {
+            "max_workers": self.max_workers,
+            "persistent": self.persistent,
+            "jobs": counts
+        }
+
+    def shutdown(self, wait: bool = True):
+        """Zatrzymanie puli (oczekujące zadania anulowane) i zamknięcie bazy"""
+        with self._lock:
+            pending = [job_id for job_id, job in self._jobs.items() if job["status"] == "queued"]
+        for job_id in pending:
+            self.cancel(job_id)
+        self._executor.shutdown(wait=wait)
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _run(self, job_id: str):
+        with self._lock:
+            job = self._jobs[job_id]
+            if job_id in self._cancel:
+                self._finish(job, "cancelled")
+                return
+            job["status"] = "running"
+            job["started_at"] = datetime.now().isoformat()
+            self._persist(job)
+            handler = self._handlers[job["kind"]]
+            params = dict(job["params"])
+
+        try:
+            result = handler(JobContext(self, job_id), **params)
+        except JobCancelled:
+            with self._lock:
+                self._finish(job, "cancelled")
+        except Exception as e:
+            with self._lock:
+                self._finish(job, "failed", error=str(e))
+        else:
+            with self._lock:
+                job["progress"] = 1.0
+                self._finish(job, "completed", result=result)
+
+    def _update(self, job_id: str, stage: str, progress: Optional[float], partial: Optional[Dict[str, Any]]):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["stage"] = stage
+            if progress is not None:
+                job["progress"] = round(min(max(progress, 0.0), 1.0), 4)
+            if partial:
+                job["partial"].update(partial)
+            self._persist(job)
+
+    def _cancel_requested(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._cancel
+
+    def _finish(self, job: Dict[str, Any], status: str, result: Any = None, error: Optional[str] = None):
+        """Zakończenie zadania (wywoływane z blokadą)"""
+        job["status"] = status
+        job["result"] = result
+        job["error"] = error
+        job["finished_at"] = datetime.now().isoformat()
+        self._cancel.discard(job["job_id"])
+        self._futures.pop(job["job_id"], None)
+        self._persist(job)
+
+    def _persist(self, job: Dict[str, Any]):
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO jobs (job_id, kind, status, created_at, job) VALUES (?, ?, ?, ?, ?)",
+            (job["job_id"], job["kind"], job["status"], job["created_at"],
+             json.dumps(job, ensure_ascii=False, default=str))
+        )
+        self._db.commit()
+
+    def _load_stored(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Stan zadania z SQLite (wywoływane z blokadą)"""
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT job FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _evict(self):
+        """Usunięcie z pamięci najstarszych zakończonych zadań ponad limit"""
+        excess = len(self._jobs) - self.max_memory_jobs
+        if excess <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job["status"] in FINISHED_STATUSES][:excess]:
+            del self._jobs[job_id]
+
+    def _fail_interrupted(self):
+        """Zadania przerwane restartem procesu (funkcje zadań nie są utrwalane) - status failed"""
+        rows = self._db.execute("SELECT job FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        for row in rows:
+            job = json.loads(row[0])
+            job["status"] = "failed"
+            job["error"] = "Zadanie przerwane restartem serwera"
+            job["finished_at"] = datetime.now().isoformat()
+            self._persist(job)
+
+    @staticmethod
+    def _snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
+        return {**job, "params": dict(job["params"]), "partial": dict(job["partial"])}
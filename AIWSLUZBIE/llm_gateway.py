@@ -0,0 +1,301 @@
+"""
+🚦 Wspólna bramka wywołań modeli LLM
+Jeden punkt w procesie dla wszystkich adapterów: limit tempa (token bucket) i limit
+współbieżności per backend, kolejki priorytetowe (interactive > batch) oraz łączenie
+identycznych zapytań w locie w jedno wywołanie upstream
+"""
+
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, Any, Optional, Callable, Awaitable
+
+# Kolejki priorytetowe - od najwyższego priorytetu
+PRIORITIES = ("interactive", "batch")
+
+# Domyślne limity backendów: (zapytania/s, burst, współbieżność); None = bez limitu tempa
+DEFAULT_BACKEND_LIMITS = {
+    "gemini": (5.0, 10, 8),
+    "huggingface": (None, None, 8),  # Współbieżność = rozmiar mikro-batcha
+    "ollama": (None, None, 2),  # Lokalny serwer - kilka zapytań naraz
+    "fake": (None, None, 16),
+}
+DEFAULT_LIMITS = (None, None, 4)
+
+# Wynik wspólnego Future, gdy lider został przerwany (anulowanie) - oczekujący wybierają nowego lidera
+_LEADER_ABANDONED = object()
+
+
+class TokenBucket:
+    """Limit tempa - token bucket (rate tokenów/s, pojemność burst)"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = float(burst or max(1, int(rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Rezerwacja tokenu - zwraca czas oczekiwania w sekundach (0 = od razu)"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class _BackendLane:
+    """Sloty współbieżności backendu przydzielane według priorytetu (FIFO w obrębie kolejki)"""
+
+    def __init__(self, name: str, rate: Optional[float], burst: Optional[int], max_concurrency: int):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.active = 0
+        self._waiting: Dict[str, deque] = {priority: deque() for priority in PRIORITIES}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "coalesced": 0, "errors": 0, "queued": 0, "rate_limit_wait": 0.0}
+
+    def request_slot(self, priority: str) -> Future:
+        """Future spełniany w chwili przydzielenia slotu"""
+        grant: Future = Future()
+        with self._lock:
+            if self.active < self.max_concurrency and not any(self._waiting.values()):
+                self.active += 1
+                grant.set_result(True)
+            else:
+                self._waiting[priority].append(grant)
+                self.stats["queued"] += 1
+        return grant
+
+    def release_slot(self):
+        """Zwolnienie slotu - przekazanie pierwszemu oczekującemu z najwyższej kolejki"""
+        with self._lock:
+            for priority in PRIORITIES:
+                waiting = self._waiting[priority]
+                while waiting:
+                    grant = waiting.popleft()
+                    if grant.set_running_or_notify_cancel():
+                        grant.set_result(True)
+                        return
+            self.active -= 1
+
+    def abandon(self, grant: Future):
+        """Rezygnacja oczekującego (np. anulowane zadanie asyncio) - zwraca slot, jeśli był już przydzielony"""
+        with self._lock:
+            if grant.cancelled() or grant.cancel():
+                return
+        self.release_slot()
+
+    def count(self, stat: str, value: float = 1):
+        with self._lock:
+            self.stats[stat] += value
+
+    def waiting_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {priority: len(waiting) for priority, waiting in self._waiting.items()}
+
+
+class LLMGateway:
+    """Bramka wywołań LLM współdzielona przez adaptery w procesie"""
+
+    def __init__(self, limits: Optional[Dict[str, tuple]] = None):
+        """
+        Args:
+            limits: Limity backendów {nazwa: (zapytania/s, burst, współbieżność)}
+        """
+        self._limits = dict(DEFAULT_BACKEND_LIMITS)
+        self._limits.update(limits or {})
+        self._lanes: Dict[str, _BackendLane] = {}
+        self._in_flight: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    def configure_backend(self, backend: str, rate_per_second: Optional[float] = None,
+                          burst: Optional[int] = None, max_concurrency: int = 4):
+        """Ustawienie limitów backendu (zastępuje bieżący stan kolejki backendu)"""
+        with self._lock:
+            self._limits[backend] = (rate_per_second, burst, max_concurrency)
+            self._lanes.pop(backend, None)
+
+    def call(self, backend: str, fn: Callable[..., Any], *args, priority: str = "interactive",
+             coalesce_key: Optional[str] = None, **kwargs) -> Any:
+        """
+        Wywołanie synchroniczne przez bramkę
+
+        Args:
+            backend: Nazwa backendu (gemini, huggingface, ollama, fake...)
+            fn: Funkcja wykonująca wywołanie upstream
+            priority: Kolejka - "interactive" lub "batch"
+            coalesce_key: Klucz identycznego zapytania (None = bez łączenia)
+
+        Returns:
+            Wynik fn (wspólny dla połączonych zapytań)
+        """
+        lane = self._lane(backend)
+        while True:
+            leader, shared = self._join(backend, coalesce_key, lane)
+            if leader:
+                break
+            result = shared.result()
+            if result is not _LEADER_ABANDONED:
+                return _copy_result(result)
+
+        try:
+            lane.request_slot(self._priority(priority)).result()
+            try:
+                delay = lane.bucket.reserve() if lane.bucket else 0.0
+                if delay > 0:
+                    lane.count("rate_limit_wait", delay)
+                    time.sleep(delay)
+                lane.count("calls")
+                result = fn(*args, **kwargs)
+            finally:
+                lane.release_slot()
+        except BaseException as e:
+            lane.count("errors")
+            self._settle(backend, coalesce_key, shared, error=e)
+            raise
+        self._settle(backend, coalesce_key, shared, result=result)
+        return result
+
+    async def acall(self, backend: str, fn: Callable[..., Awaitable[Any]], *args,
+                    priority: str = "interactive", coalesce_key: Optional[str] = None, **kwargs) -> Any:
+        """Wywołanie asynchroniczne przez bramkę (fn zwraca awaitable) - bez blokowania pętli zdarzeń"""
+        lane = self._lane(backend)
+        while True:
+            leader, shared = self._join(backend, coalesce_key, lane)
+            if leader:
+                break
+            # shield - anulowanie jednego oczekującego nie anuluje wspólnego Future
+            result = await asyncio.shield(asyncio.wrap_future(shared))
+            if result is not _LEADER_ABANDONED:
+                return _copy_result(result)
+
+        try:
+            grant = lane.request_slot(self._priority(priority))
+            try:
+                await asyncio.wrap_future(grant)
+            except asyncio.CancelledError:
+                lane.abandon(grant)
+                raise
+            try:
+                delay = lane.bucket.reserve() if lane.bucket else 0.0
+                if delay > 0:
+                    lane.count("rate_limit_wait", delay)
+                    await asyncio.sleep(delay)
+                lane.count("calls")
+                result = await fn(*args, **kwargs)
+            finally:
+                lane.release_slot()
+        except BaseException as e:
+            lane.count("errors")
+            self._settle(backend, coalesce_key, shared, error=e)
+            raise
+        self._settle(backend, coalesce_key, shared, result=result)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statystyki backendów (wywołania, połączone zapytania, kolejki, aktywne sloty)"""
+        with self._lock:
+            lanes = list(self._lanes.values())
+        return {
+            lane.name: {
+                **lane.stats,
+                "active": lane.active,
+                "max_concurrency": lane.max_concurrency,
+                "waiting": lane.waiting_counts()
+            }
+            for lane in lanes
+        }
+
+    def _lane(self, backend: str) -> _BackendLane:
+        with self._lock:
+            lane = self._lanes.get(backend)
+            if lane is None:
+                rate, burst, concurrency = self._limits.get(backend, DEFAULT_LIMITS)
+                lane = _BackendLane(backend, rate, burst, concurrency)
+                self._lanes[backend] = lane
+            return lane
+
+    def _join(self, backend: str, coalesce_key: Optional[str], lane: _BackendLane):
+        """(czy_lider, future wyniku) - kolejne identyczne zapytania czekają na wynik lidera"""
+        shared: Future = Future()
+        # Stan RUNNING - wspólnego Future nie da się anulować (cancel() zwraca False)
+        shared.set_running_or_notify_cancel()
+        if coalesce_key is None:
+            return True, shared
+        with self._lock:
+            existing = self._in_flight.get((backend, coalesce_key))
+            if existing is not None:
+                lane.count("coalesced")
+                return False, existing
+            self._in_flight[(backend, coalesce_key)] = shared
+        return True, shared
+
+    def _settle(self, backend: str, coalesce_key: Optional[str], shared: Future,
+                result: Any = None, error: Optional[BaseException] = None):
+        if coalesce_key is None:
+            return
+        with self._lock:
+            if self._in_flight.get((backend, coalesce_key)) is shared:
+                del self._in_flight[(backend, coalesce_key)]
+        if shared.done():
+            return
+        if error is not None and not isinstance(error, Exception):
+            # Anulowanie/przerwanie lidera nie jest wynikiem zapytania - oczekujący ponawiają
+            shared.set_result(_LEADER_ABANDONED)
+        elif error is not None:
+            shared.set_exception(error)
+        else:
+            shared.set_result(result)
+
+    @staticmethod
+    def _priority(priority: str) -> str:
+        return priority if priority in PRIORITIES else PRIORITIES[0]
+
+
+def _copy_result(result: Any) -> Any:
+    """Płytka kopia wyniku dla połączonych zapytań (adaptery modyfikują słowniki wyników)"""
+    return dict(result) if isinstance(result, dict) else result
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway() -> LLMGateway:
+    """
+    Współdzielona bramka procesu. Limity z env (nadpisują domyślne):
+    LLM_GATEWAY_<BACKEND>_RPS, LLM_GATEWAY_<BACKEND>_BURST, LLM_GATEWAY_<BACKEND>_CONCURRENCY
+    """
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway(limits=_limits_from_env())
+    return _gateway
+
+
+def _limits_from_env() -> Dict[str, tuple]:
+    limits = {}
+    backends = set(DEFAULT_BACKEND_LIMITS)
+    backends.update(
+        key[len("LLM_GATEWAY_"):].rsplit("_", 1)[0].lower()
+        for key in os.environ if key.startswith("LLM_GATEWAY_")
+    )
+    for backend in backends:
+        prefix = f"LLM_GATEWAY_{backend.upper()}_"
+        rate, burst, concurrency = DEFAULT_BACKEND_LIMITS.get(backend, DEFAULT_LIMITS)
+        if prefix + "RPS" in os.environ:
+            rate = float(os.environ[prefix + "RPS"]) or None
+        if prefix + "BURST" in os.environ:
+            burst = int(os.environ[prefix + "BURST"])
+        if prefix + "CONCURRENCY" in os.environ:
+            concurrency = int(os.environ[prefix + "CONCURRENCY"])
+        limits[backend] = (rate, burst, concurrency)
+    return limits
@@ -5,9 +5,43 @@ Obsługa Google Gemini API przez google-genai SDK
 
 import os
 import time
-from typing import Dict, Any, Optional
+import importlib.util
+import asyncio
+import functools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, Optional, List, Tuple, Callable
 from datetime import datetime
 
+from llm_gateway import get_gateway
+from response_cache import make_cache_key
+from model_config import GEMINI_MODEL_NAME
+
+# ============================================================================
+# WSPÓLNA PULA WĄTKÓW DLA WYWOŁAŃ BLOKUJĄCYCH
+# ============================================================================
+
+_blocking_executor: Optional[ThreadPoolExecutor] = None
+_blocking_executor_lock = threading.Lock()
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    """Współdzielona pula wątków dla synchronicznych backendów (rozmiar: MODEL_WORKERS)"""
+    global _blocking_executor
+    if _blocking_executor is None:
+        with _blocking_executor_lock:
+            if _blocking_executor is None:
+                _blocking_executor = ThreadPoolExecutor(
+                    max_workers=int(os.environ.get('MODEL_WORKERS', '8')),
+                    thread_name_prefix="model-adapter"
+                )
+    return _blocking_executor
+
+async def run_blocking(func, *args, **kwargs):
+    """Uruchomienie funkcji blokującej we współdzielonej puli bez blokowania pętli zdarzeń"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_blocking_executor(), functools.partial(func, *args, **kwargs))
+
 # ============================================================================
 # GEMINI ADAPTER (używa google-genai SDK)
 # ============================================================================
@@ -16,13 +50,9 @@ class GeminiAdapter:
     """Adapter dla Google Gemini API - używa google-genai SDK"""
     
     def __init__(self, model_name: str = None, api_key: str = None):
-        # Domyślnie użyj gemini-2.5-flash jeśli nie podano
+        # Domyślny model z model_config (GEMINI_MODEL_NAME)
         if model_name is None:
-            try:
-                import asystent_ai_gqpa_integrated
-                model_name = getattr(asystent_ai_gqpa_integrated, 'GEMINI_MODEL_NAME', 'gemini-2.5-flash')
-            except (ImportError, AttributeError):
-                model_name = "gemini-2.5-flash"  # Fallback
+            model_name = GEMINI_MODEL_NAME
         
         self.model_name = model_name
         self.available = False
@@ -67,36 +97,13 @@ class GeminiAdapter:
                 'error': 'Gemini nie dostępne'
             }
         
-        # JSON Mode - jeśli format="json" w kwargs
-        use_json_mode = kwargs.get('format') == 'json' or kwargs.get('json_mode', False)
-        
         start_time = time.time()
         try:
-            from google.genai import types as genai_types
-            
-            # Konfiguracja generowania
-            config_dict = {
-                'temperature': kwargs.get('temperature', 0.7),
-                'top_p': kwargs.get('top_p', 0.95),
-                'top_k': kwargs.get('top_k', 40),
-                'max_output_tokens': kwargs.get('max_tokens', 2048),
-            }
-            
-            # Jeśli JSON mode, ustaw response_mime_type
-            if use_json_mode:
-                config_dict['response_mime_type'] = 'application/json'
-            
-            # Próbuj użyć GenerateContentConfig, jeśli dostępne
-            try:
-                config = genai_types.GenerateContentConfig(**config_dict)
-            except (AttributeError, TypeError):
-                config = config_dict
-            
             # Generuj odpowiedź
             response = self.client.models.generate_content(
                 model=self.model_name,
                 contents=prompt,
-                config=config
+                config=self._build_config(**kwargs)
             )
             
             response_text = response.text if hasattr(response, 'text') else str(response)
@@ -115,82 +122,316 @@ class GeminiAdapter:
                 'error': str(e),
                 'latency': time.time() - start_time
             }
+    
+    async def agenerate(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """Asynchroniczne generowanie - używa klienta aio tego samego (trwałego) Client"""
+        if not self.available or self.client is None:
+            return {
+                'response': "[GEMINI NIE DOSTĘPNE] Ustaw GOOGLE_API_KEY lub GEMINI_API_KEY",
+                'success': False,
+                'error': 'Gemini nie dostępne'
+            }
+        
+        aio = getattr(self.client, 'aio', None)
+        if aio is None:
+            return await run_blocking(self.generate, prompt, **kwargs)
+        
+        start_time = time.time()
+        try:
+            response = await aio.models.generate_content(
+                model=self.model_name,
+                contents=prompt,
+                config=self._build_config(**kwargs)
+            )
+            
+            response_text = response.text if hasattr(response, 'text') else str(response)
+            
+            return {
+                'response': response_text,
+                'success': True,
+                'error': None,
+                'latency': time.time() - start_time
+            }
+        except Exception as e:
+            return {
+                'response': f"Błąd Gemini API: {str(e)}",
+                'success': False,
+                'error': str(e),
+                'latency': time.time() - start_time
+            }
+    
+    def _build_config(self, **kwargs):
+        """Konfiguracja generowania (wspólna dla generate i agenerate)"""
+        from google.genai import types as genai_types  # type: ignore
+        
+        # JSON Mode - jeśli format="json" w kwargs
+        use_json_mode = kwargs.get('format') == 'json' or kwargs.get('json_mode', False)
+        
+        config_dict = {
+            'temperature': kwargs.get('temperature', 0.7),
+            'top_p': kwargs.get('top_p', 0.95),
+            'top_k': kwargs.get('top_k', 40),
+            'max_output_tokens': kwargs.get('max_tokens', 2048),
+        }
+        
+        # Jeśli JSON mode, ustaw response_mime_type
+        if use_json_mode:
+            config_dict['response_mime_type'] = 'application/json'
+        
+        # Próbuj użyć GenerateContentConfig, jeśli dostępne
+        try:
+            return genai_types.GenerateContentConfig(**config_dict)
+        except (AttributeError, TypeError):
+            return config_dict
+
+# ============================================================================
+# MIKRO-BATCHOWANIE ZAPYTAŃ
+# ============================================================================
+
+class MicroBatcher:
+    """Dynamiczne mikro-batchowanie - zbiera równoległe zapytania i wykonuje je jednym wywołaniem"""
+    
+    def __init__(self, batch_fn: Callable[[List[str], Dict[str, Any]], List[Dict[str, Any]]],
+                 max_batch_size: int = 8, max_wait_ms: float = 10.0):
+        """
+        Args:
+            batch_fn: Funkcja (prompty, parametry) -> lista wyników w tej samej kolejności
+            max_batch_size: Maksymalna liczba promptów w jednym batchu
+            max_wait_ms: Maksymalny czas oczekiwania na kolejne prompty (ms)
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: "queue.Queue[Tuple[str, Dict[str, Any], Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    def submit(self, prompt: str, params: Dict[str, Any]) -> Future:
+        """Dodanie promptu do kolejki - wynik przez Future"""
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((prompt, params, future))
+        return future
+    
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="hf-micro-batcher", daemon=True)
+                    self._worker.start()
+    
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            # Jeden batch = jednakowe parametry generowania
+            groups: Dict[Tuple, List[Tuple[str, Dict[str, Any], Future]]] = {}
+            for item in batch:
+                groups.setdefault(tuple(sorted(item[1].items())), []).append(item)
+            
+            for items in groups.values():
+                # Anulowane zapytania (np. anulowane agenerate) wypadają z batcha; pozostałe
+                # przechodzą w stan RUNNING i nie mogą już zostać anulowane w trakcie generowania
+                items = [item for item in items if item[2].set_running_or_notify_cancel()]
+                if not items:
+                    continue
+                try:
+                    results = self.batch_fn([prompt for prompt, _, _ in items], items[0][1])
+                    if len(results) != len(items):
+                        raise RuntimeError(f"Batch zwrócił {len(results)} wyników dla {len(items)} promptów")
+                    for (_, _, future), result in zip(items, results):
+                        future.set_result(result)
+                except BaseException as e:
+                    # Błąd grupy nie może zatrzymać wątku batchera - inaczej kolejne zapytania czekają w nieskończoność
+                    for _, _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
 
 # ============================================================================
 # HUGGING FACE TRANSFORMERS ADAPTER
 # ============================================================================
 
 class HuggingFaceAdapter:
-    """Adapter dla modeli Hugging Face (transformers)"""
+    """Adapter dla modeli Hugging Face (transformers) z mikro-batchowaniem"""
     
-    def __init__(self, model_name: str = "mistralai/Mistral-7B-Instruct-v0.2"):
+    def __init__(self, model_name: str = "mistralai/Mistral-7B-Instruct-v0.2",
+                 max_batch_size: int = 8, max_wait_ms: float = 10.0):
+        """
+        Args:
+            model_name: Nazwa modelu w Hugging Face Hub
+            max_batch_size: Maksymalny rozmiar batcha (1 = bez batchowania)
+            max_wait_ms: Czas zbierania promptów do batcha (ms)
+        """
         self.model_name = model_name
         self.model = None
         self.tokenizer = None
-        self.available = False
+        # Model ładowany przy pierwszym generowaniu - tu tylko sprawdzenie, czy pakiety są zainstalowane
+        self.available = all(importlib.util.find_spec(name) is not None for name in ("transformers", "torch"))
+        self._torch = None
+        self._load_lock = threading.Lock()
+        self.batcher = MicroBatcher(self._generate_batch, max_batch_size, max_wait_ms) if max_batch_size > 1 else None
         
-        try:
-            from transformers import AutoModelForCausalLM, AutoTokenizer  # type: ignore
-            import torch  # type: ignore
-            
-            print(f"📥 Ładowanie modelu {model_name}...")
-            self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-            self.model = AutoModelForCausalLM.from_pretrained(
-                model_name,
-                torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
-                device_map="auto" if torch.cuda.is_available() else None
-            )
-            self.available = True
-            print(f"✅ Model {model_name} załadowany")
-        except ImportError:
+        if not self.available:
             print("⚠️ Transformers nie dostępne - zainstaluj: pip install transformers torch")
-        except Exception as e:
-            print(f"⚠️ Błąd ładowania modelu: {e}")
+    
+    def _ensure_model(self) -> bool:
+        """Leniwe ładowanie modelu i tokenizera (raz, przy pierwszym użyciu)"""
+        if self.model is not None:
+            return True
+        with self._load_lock:
+            if self.model is not None or not self.available:
+                return self.model is not None
+            try:
+                from transformers import AutoModelForCausalLM, AutoTokenizer  # type: ignore
+                import torch  # type: ignore
+                self._torch = torch
+                
+                print(f"📥 Ładowanie modelu {self.model_name}...")
+                tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                # Batch wymaga paddingu - dla modeli dekoderowych od lewej
+                if tokenizer.pad_token is None:
+                    tokenizer.pad_token = tokenizer.eos_token
+                tokenizer.padding_side = "left"
+                self.tokenizer = tokenizer
+                self.model = AutoModelForCausalLM.from_pretrained(
+                    self.model_name,
+                    torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
+                    device_map="auto" if torch.cuda.is_available() else None
+                )
+                print(f"✅ Model {self.model_name} załadowany")
+            except ImportError:
+                self.available = False
+                print("⚠️ Transformers nie dostępne - zainstaluj: pip install transformers torch")
+            except Exception as e:
+                self.available = False
+                print(f"⚠️ Błąd ładowania modelu: {e}")
+        return self.model is not None
     
     def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
-        """Generowanie odpowiedzi przez Hugging Face"""
-        if not self.available or self.model is None or self.tokenizer is None:
+        """Generowanie odpowiedzi przez Hugging Face (przez kolejkę batchującą)"""
+        if not self._ensure_model():
             return {
                 'response': "[HF MODEL NIE DOSTĘPNY]",
                 'success': False,
                 'error': 'Model nie załadowany'
             }
         
+        params = self._generation_params(**kwargs)
         try:
-            start_time = time.time()
-            
-            inputs = self.tokenizer(prompt, return_tensors="pt")
-            if hasattr(self.model, 'device'):
-                inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
-            
-            with torch.no_grad():  # type: ignore
-                outputs = self.model.generate(
-                    **inputs,
-                    max_new_tokens=kwargs.get('max_tokens', 512),
-                    temperature=kwargs.get('temperature', 0.7),
-                    top_p=kwargs.get('top_p', 0.95),
-                    do_sample=True
-                )
-            
-            response_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            # Usuń prompt z odpowiedzi
-            if prompt in response_text:
-                response_text = response_text.split(prompt, 1)[1].strip()
-            
-            latency = time.time() - start_time
-            
+            if self.batcher is None:
+                return self._generate_batch([prompt], params)[0]
+            return self.batcher.submit(prompt, params).result()
+        except Exception as e:
             return {
-                'response': response_text,
-                'success': True,
-                'error': None,
-                'latency': latency
+                'response': f"Błąd generowania: {str(e)}",
+                'success': False,
+                'error': str(e)
             }
+    
+    async def agenerate(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """Asynchroniczne generowanie - oczekiwanie na batch bez blokowania pętli zdarzeń"""
+        if self.batcher is None or self.model is None:
+            # Bez batchera lub przed załadowaniem modelu (ładowanie blokujące - w puli wątków)
+            return await run_blocking(self.generate, prompt, **kwargs)
+        
+        try:
+            return await asyncio.wrap_future(self.batcher.submit(prompt, self._generation_params(**kwargs)))
         except Exception as e:
             return {
                 'response': f"Błąd generowania: {str(e)}",
                 'success': False,
                 'error': str(e)
             }
+    
+    def _generation_params(self, **kwargs) -> Dict[str, Any]:
+        return {
+            'max_tokens': kwargs.get('max_tokens', 512),
+            'temperature': kwargs.get('temperature', 0.7),
+            'top_p': kwargs.get('top_p', 0.95)
+        }
+    
+    def _generate_batch(self, prompts: List[str], params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Jedno wywołanie model.generate dla całego batcha (padding od lewej)"""
+        start_time = time.time()
+        
+        inputs = self.tokenizer(prompts, return_tensors="pt", padding=True)
+        if hasattr(self.model, 'device'):
+            inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
+        
+        with self._torch.no_grad():  # type: ignore
+            outputs = self.model.generate(
+                **inputs,
+                max_new_tokens=params['max_tokens'],
+                temperature=params['temperature'],
+                top_p=params['top_p'],
+                do_sample=True,
+                pad_token_id=self.tokenizer.pad_token_id
+            )
+        
+        # Usuń prompt z odpowiedzi - przy paddingu od lewej prompty mają wspólną długość
+        prompt_length = inputs['input_ids'].shape[1]
+        texts = self.tokenizer.batch_decode(outputs[:, prompt_length:], skip_special_tokens=True)
+        
+        latency = time.time() - start_time
+        
+        return [
+            {
+                'response': text.strip(),
+                'success': True,
+                'error': None,
+                'latency': latency,
+                'batch_size': len(prompts)
+            }
+            for text in texts
+        ]
+
+# ============================================================================
+# FAKE ADAPTER (testy przepustowości bez sieci)
+# ============================================================================
+
+class FakeModelAdapter:
+    """Lokalny adapter testowy - deterministyczna odpowiedź ze sztucznym opóźnieniem"""
+    
+    def __init__(self, delay: float = 0.5, model_name: str = "fake-model"):
+        self.model_name = model_name
+        self.delay = delay
+        self.available = True
+        self.calls = 0
+    
+    def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """Generowanie (blokujące) - time.sleep(delay)"""
+        start_time = time.time()
+        self.calls += 1
+        time.sleep(self.delay)
+        return self._response(prompt, time.time() - start_time, **kwargs)
+    
+    async def agenerate(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """Generowanie (asynchroniczne) - asyncio.sleep(delay)"""
+        start_time = time.time()
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self._response(prompt, time.time() - start_time, **kwargs)
+    
+    def _response(self, prompt: str, latency: float, **kwargs) -> Dict[str, Any]:
+        if kwargs.get('format') == 'json' or kwargs.get('json_mode', False):
+            response_text = '{"key_facts": [], "legal_references": [], "risk_factors": [], "confidence": 0.7}'
+        else:
+            response_text = f"[FAKE] Odpowiedź na: {prompt[:100]}..."
+        return {
+            'response': response_text,
+            'success': True,
+            'error': None,
+            'latency': latency
+        }
 
 # ============================================================================
 # UNIFIED MODEL ADAPTER
@@ -203,39 +444,91 @@ class LocalModelAdapter:
         self.preferred_backend = preferred_backend
         self.gemini = None
         self.huggingface = None
+        self.fake = None
         self.active_adapter = None
+        self.backend_name = None  # Nazwa backendu w bramce LLM (limity, kolejki)
+        
+        # Adapter testowy (bez sieci) - opóźnienie z FAKE_MODEL_DELAY
+        if preferred_backend == "fake":
+            self.fake = FakeModelAdapter(delay=float(os.environ.get('FAKE_MODEL_DELAY', '0.5')))
+            self.active_adapter = self.fake
+            self.backend_name = "fake"
+            return
         
         # Ustaw domyślny model jeśli nie podano
         if model_name is None:
-            try:
-                import asystent_ai_gqpa_integrated
-                model_name = getattr(asystent_ai_gqpa_integrated, 'GEMINI_MODEL_NAME', 'gemini-2.5-flash')
-            except (ImportError, AttributeError):
-                model_name = "gemini-2.5-flash"  # Fallback
+            model_name = GEMINI_MODEL_NAME
         
         # Spróbuj Gemini (domyślne)
         if preferred_backend in ["gemini", "auto"]:
             self.gemini = GeminiAdapter(model_name=model_name, api_key=api_key)
-            if self.gemini.available:
-                self.active_adapter = self.gemini
+            if self._select_backend():
                 return
         
         # Spróbuj Hugging Face (fallback)
         if preferred_backend in ["huggingface", "transformers", "auto"]:
             try:
                 self.huggingface = HuggingFaceAdapter()
-                if self.huggingface.available:
-                    self.active_adapter = self.huggingface
+                if self._select_backend():
                     return
             except Exception as e:
                 print(f"⚠️ Hugging Face nie dostępne: {e}")
         
         print("⚠️ Żaden model nie jest dostępny - ustaw GOOGLE_API_KEY dla Gemini")
     
+    def _select_backend(self) -> bool:
+        """Wybór pierwszego dostępnego backendu (Gemini, potem Hugging Face)"""
+        for name, adapter in (("gemini", self.gemini), ("huggingface", self.huggingface)):
+            if adapter is not None and adapter.available:
+                self.active_adapter = adapter
+                self.backend_name = name
+                return True
+        self.active_adapter = None
+        self.backend_name = None
+        return False
+    
+    def _ready_adapter(self):
+        """
+        Aktywny adapter gotowy do generowania - model HF ładowany leniwie; jeśli ładowanie
+        się nie powiedzie, wybierany jest kolejny dostępny backend (albo brak modelu)
+        """
+        while self.active_adapter is self.huggingface and self.huggingface is not None:
+            if self.huggingface._ensure_model():
+                break
+            print("⚠️ Model Hugging Face nie załadowany - przełączam backend")
+            self._select_backend()
+        return self.active_adapter
+    
     def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
-        """Generowanie odpowiedzi - używa aktywnego adaptera"""
+        """
+        Generowanie odpowiedzi - używa aktywnego adaptera przez wspólną bramkę LLM
+        
+        kwargs['priority']: "interactive" (domyślnie) lub "batch"
+        """
+        if self._ready_adapter():
+            priority = kwargs.pop('priority', 'interactive')
+            return get_gateway().call(
+                self.backend_name, self.active_adapter.generate, prompt,
+                priority=priority, coalesce_key=self._coalesce_key(prompt, kwargs), **kwargs
+            )
+        else:
+            return {
+                'response': "[MODEL NIE DOSTĘPNY] Ustaw GOOGLE_API_KEY dla Gemini API",
+                'success': False,
+                'error': 'Brak dostępnego modelu'
+            }
+    
+    async def agenerate(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """Asynchroniczne generowanie - używa aktywnego adaptera przez wspólną bramkę LLM"""
+        # Leniwe ładowanie modelu HF jest blokujące - w puli wątków
+        if self.active_adapter is not None and self.active_adapter is self.huggingface:
+            await run_blocking(self._ready_adapter)
         if self.active_adapter:
-            return self.active_adapter.generate(prompt, **kwargs)
+            priority = kwargs.pop('priority', 'interactive')
+            return await get_gateway().acall(
+                self.backend_name, self.active_adapter.agenerate, prompt,
+                priority=priority, coalesce_key=self._coalesce_key(prompt, kwargs), **kwargs
+            )
         else:
             return {
                 'response': "[MODEL NIE DOSTĘPNY] Ustaw GOOGLE_API_KEY dla Gemini API",
@@ -243,11 +536,16 @@ class LocalModelAdapter:
                 'error': 'Brak dostępnego modelu'
             }
     
+    def _coalesce_key(self, prompt: str, params: Dict[str, Any]) -> str:
+        """Klucz łączenia identycznych zapytań w locie (prompt + model + parametry)"""
+        return make_cache_key(prompt, getattr(self.active_adapter, 'model_name', ''), params)
+    
     def is_available(self) -> bool:
         """Sprawdza czy model jest dostępny"""
-        return self.active_adapter is not None and (
+        return self.active_adapter is not None and bool(
             (self.gemini and self.gemini.available) or
-            (self.huggingface and self.huggingface.available)
+            (self.huggingface and self.huggingface.available) or
+            (self.fake and self.fake.available)
         )
 
 # ============================================================================
@@ -289,4 +587,31 @@ class HybridModelAdapter:
             'latency': 0.1,
             'source': 'simulation'
         }
+    
+    async def agenerate(self, prompt: str, **kwargs) -> Dict[str, Any]:
+        """Asynchroniczne generowanie - próbuje Gemini, potem fallback"""
+        # Próbuj Gemini
+        if self.prefer_gemini and self.gemini_adapter and self.gemini_adapter.is_available():
+            result = await self.gemini_adapter.agenerate(prompt, **kwargs)
+            if result['success']:
+                result['source'] = 'gemini'
+                return result
+        
+        # Fallback do API adaptera
+        if self.api_adapter:
+            if hasattr(self.api_adapter, 'acognitive_query'):
+                result = await self.api_adapter.acognitive_query(prompt)
+            else:
+                result = await run_blocking(self.api_adapter.cognitive_query, prompt)
+            result['source'] = 'api'
+            return result
+        
+        # Ostatnia deska ratunku - symulacja
+        return {
+            'response': f"[SYMULACJA] Odpowiedź na: {prompt[:100]}...",
+            'success': True,
+            'error': None,
+            'latency': 0.1,
+            'source': 'simulation'
+        }
 
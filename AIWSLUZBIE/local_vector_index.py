@@ -0,0 +1,160 @@
+"""
+🧭 Lokalny indeks wektorowy (fallback bez ChromaDB)
+Hashowane embeddingi słów, prefiksów i bigramów w macierzy NumPy - ranking top-k
+przez podobieństwo cosinusowe jednym iloczynem macierzowym
+"""
+
+import os
+import re
+import json
+import zlib
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+_STEM_LENGTH = 5
+
+
+class HashedVectorIndex:
+    """Indeks wektorowy z hashowanymi cechami (hashing trick), zapisywany przez np.save"""
+
+    def __init__(self, dim: int = 512, use_bigrams: bool = True):
+        """
+        Args:
+            dim: Wymiar wektora (liczba kubełków hashowania)
+            use_bigrams: Czy dodawać bigramy słów jako cechy
+        """
+        self.dim = dim
+        self.use_bigrams = use_bigrams
+        self._matrix = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self.ids: List[str] = []
+        self.payloads: List[Dict[str, Any]] = []
+        self._case_types: List[str] = []
+        self._case_type_codes = np.zeros(0, dtype=np.int32)
+        self._case_type_lookup: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def embed(self, text: str) -> np.ndarray:
+        """Wektor L2-znormalizowany dla tekstu (tf sublinearny, znak z hashu)"""
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        features = list(tokens)
+        # Prefiks słowa jako prosty stem (odmiana: "kategoria" / "kategorii")
+        features.extend("~" + token[:_STEM_LENGTH] for token in tokens if len(token) >= _STEM_LENGTH)
+        if self.use_bigrams and len(tokens) > 1:
+            features.extend(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        if not features:
+            return np.zeros(self.dim, dtype=np.float32)
+
+        digests = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in features), dtype=np.uint32, count=len(features))
+        signs = np.where(digests & np.uint32(0x80000000), 1.0, -1.0)
+        counts = np.bincount(digests % self.dim, weights=signs, minlength=self.dim)
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        nonzero = counts != 0
+        vector[nonzero] = np.sign(counts[nonzero]) * (1.0 + np.log(np.abs(counts[nonzero])))
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def add(self, items: List[Tuple[str, str, Dict[str, Any]]], case_type_field: str = "case_type"):
+        """
+        Dodanie dokumentów
+
+        Args:
+            items: Lista (id, tekst, payload)
+            case_type_field: Pole payloadu używane do filtrowania
+        """
+        if not items:
+            return
+        self._reserve(self._size + len(items))
+        codes = np.empty(len(items), dtype=np.int32)
+        for offset, (doc_id, text, payload) in enumerate(items):
+            self._matrix[self._size + offset] = self.embed(text)
+            self.ids.append(doc_id)
+            self.payloads.append(payload)
+            codes[offset] = self._case_type_code(str(payload.get(case_type_field, "")))
+        self._case_type_codes[self._size:self._size + len(items)] = codes
+        self._size += len(items)
+
+    def replace(self, position: int, text: str, payload: Dict[str, Any], case_type_field: str = "case_type"):
+        """Podmiana dokumentu na danej pozycji (ten sam identyfikator, nowa treść)"""
+        if not 0 <= position < self._size:
+            raise IndexError(position)
+        self._reserve(self._size)  # Macierz z memmap (tylko do odczytu) kopiowana do RAM
+        self._matrix[position] = self.embed(text)
+        self.payloads[position] = payload
+        self._case_type_codes[position] = self._case_type_code(str(payload.get(case_type_field, "")))
+
+    def search(self, query: str, k: int = 5, case_type: Optional[str] = None) -> List[Tuple[int, float]]:
+        """
+        Top-k dokumentów wg podobieństwa cosinusowego
+
+        Returns:
+            Lista (pozycja w indeksie, wynik) malejąco po wyniku
+        """
+        if self._size == 0 or k <= 0:
+            return []
+
+        scores = self._matrix[:self._size] @ self.embed(query)
+        if case_type is not None:
+            code = self._case_type_lookup.get(case_type)
+            if code is None:
+                return []
+            scores = np.where(self._case_type_codes[:self._size] == code, scores, -np.inf)
+
+        k = min(k, self._size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+    def save(self, directory: str):
+        """Zapis indeksu: vectors.npy + metadane JSON"""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "vectors.npy"), np.ascontiguousarray(self._matrix[:self._size]))
+        with open(os.path.join(directory, "index.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "dim": self.dim,
+                "use_bigrams": self.use_bigrams,
+                "ids": self.ids,
+                "payloads": self.payloads
+            }, f, ensure_ascii=False, default=str)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "HashedVectorIndex":
+        """Odczyt indeksu (macierz przez memmap - bez ładowania całości do RAM)"""
+        with open(os.path.join(directory, "index.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(dim=meta["dim"], use_bigrams=meta["use_bigrams"])
+        index._matrix = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r" if mmap else None)
+        index._size = index._matrix.shape[0]
+        index.ids = meta["ids"]
+        index.payloads = meta["payloads"]
+        index._case_type_codes = np.array(
+            [index._case_type_code(str(p.get("case_type", ""))) for p in index.payloads], dtype=np.int32
+        )
+        return index
+
+    def _case_type_code(self, case_type: str) -> int:
+        code = self._case_type_lookup.get(case_type)
+        if code is None:
+            code = len(self._case_types)
+            self._case_types.append(case_type)
+            self._case_type_lookup[case_type] = code
+        return code
+
+    def _reserve(self, capacity: int):
+        """Powiększenie macierzy (podwajanie pojemności; memmap kopiowany do RAM)"""
+        if capacity <= self._matrix.shape[0] and isinstance(self._matrix, np.ndarray) \
+                and not isinstance(self._matrix, np.memmap):
+            return
+        new_capacity = max(capacity, 2 * self._matrix.shape[0], 64)
+        matrix = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        matrix[:self._size] = self._matrix[:self._size]
+        self._matrix = matrix
+        codes = np.zeros(new_capacity, dtype=np.int32)
+        codes[:self._size] = self._case_type_codes[:self._size]
+        self._case_type_codes = codes
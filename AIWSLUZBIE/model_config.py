@@ -0,0 +1,10 @@
+"""
+⚙️ Konfiguracja modeli - lekki moduł bez ciężkich zależności
+Importowany przez adaptery i asystenta zamiast asystent_ai_gqpa_integrated (szybki start)
+"""
+
+import os
+
+# Domyślnie używany model Gemini (nadpisywany przez GEMINI_MODEL_NAME)
+DEFAULT_GEMINI_MODEL_NAME = "gemini-2.5-flash"
+GEMINI_MODEL_NAME = os.environ.get('GEMINI_MODEL_NAME', DEFAULT_GEMINI_MODEL_NAME)
@@ -0,0 +1,81 @@
+"""
+🔎 Cache wyników wyszukiwania precedensów
+Wyniki zapytań do bazy wektorowej per (typ sprawy, zapytanie, liczba wyników) z TTL,
+unieważniane po zmianie bazy (wersja VectorDatabase) - bez powtarzania wyszukiwań
+dla kolejnych spraw tego samego typu
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+
+class PrecedentSearchCache:
+    """Cache LRU wyników wyszukiwania precedensów z czasem życia wpisów"""
+
+    def __init__(self, ttl_seconds: Optional[float] = 900.0, max_entries: int = 512):
+        """
+        Args:
+            ttl_seconds: Czas życia wpisu w sekundach (None = bez limitu)
+            max_entries: Maksymalna liczba zapamiętanych zapytań (LRU)
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'expired': 0, 'stale': 0, 'invalidations': 0}
+
+    @staticmethod
+    def make_key(case_type: str, query: str, n_results: int) -> Tuple[str, str, int]:
+        return (case_type, " ".join(query.split()), n_results)
+
+    def get(self, key: Tuple, version: int = 0) -> Optional[List[Dict[str, Any]]]:
+        """Wyniki z cache (kopie słowników) albo None - także gdy wpis wygasł lub baza się zmieniła"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            results, entry_version, created_at = entry
+            if entry_version != version:
+                self.stats['stale'] += 1
+            elif self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds:
+                self.stats['expired'] += 1
+            else:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return [dict(result) for result in results]
+            del self._entries[key]
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, key: Tuple, results: List[Dict[str, Any]], version: int = 0):
+        """Zapis wyników zapytania dla danej wersji bazy"""
+        with self._lock:
+            self._entries[key] = ([dict(result) for result in results], version, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, case_type: Optional[str] = None):
+        """Unieważnienie wpisów (wszystkich albo jednego typu sprawy)"""
+        with self._lock:
+            if case_type is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == case_type]:
+                    del self._entries[key]
+            self.stats['invalidations'] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'entries': len(self._entries),
+                'hit_rate': self.stats['hits'] / lookups if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
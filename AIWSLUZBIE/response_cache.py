@@ -0,0 +1,149 @@
+"""
+💾 Cache odpowiedzi modeli LLM
+Dwupoziomowy cache adresowany treścią: LRU w pamięci + SQLite na dysku
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+
+def make_cache_key(prompt: str, model_name: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Tworzy klucz cache na podstawie treści zapytania
+
+    Args:
+        prompt: Pełny (wzbogacony) prompt wysyłany do modelu
+        model_name: Nazwa modelu
+        params: Parametry generowania (temperature, top_p, max_tokens, json_mode...)
+
+    Returns:
+        Hash SHA-256 (hex)
+    """
+    payload = json.dumps(
+        {'prompt': prompt, 'model': model_name, 'params': params or {}},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Cache odpowiedzi LLM - LRU w pamięci z opcjonalnym trwałym poziomem SQLite"""
+
+    def __init__(self, max_memory_entries: int = 1024,
+                 db_path: Optional[str] = "./llm_cache/responses.sqlite",
+                 ttl_seconds: Optional[float] = None):
+        """
+        Args:
+            max_memory_entries: Maksymalna liczba wpisów w pamięci (LRU)
+            db_path: Ścieżka do pliku SQLite (None = tylko pamięć)
+            ttl_seconds: Czas życia wpisu w sekundach (None = bez limitu)
+        """
+        self.max_memory_entries = max_memory_entries
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0}
+
+        if db_path:
+            try:
+                directory = os.path.dirname(db_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Cache dyskowy niedostępny ({e}) - używam tylko pamięci")
+                self._db = None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Pobranie odpowiedzi z cache (najpierw pamięć, potem dysk)"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return dict(value)
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if not self._expired(row[1], now):
+                        value = json.loads(row[0])
+                        self._remember(key, value, row[1])
+                        self.stats['disk_hits'] += 1
+                        return dict(value)
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.stats['misses'] += 1
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Zapisanie odpowiedzi w obu poziomach cache"""
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, dict(value), created_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False, default=str), created_at)
+                )
+                self._db.commit()
+            self.stats['writes'] += 1
+
+    def clear(self):
+        """Wyczyszczenie cache (pamięć i dysk)"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statystyki cache"""
+        with self._lock:
+            hits = self.stats['memory_hits'] + self.stats['disk_hits']
+            lookups = hits + self.stats['misses']
+            return {
+                **self.stats,
+                'memory_entries': len(self._memory),
+                'hit_rate': hits / lookups if lookups else 0.0,
+                'persistent': self._db is not None
+            }
+
+    def close(self):
+        """Zamknięcie połączenia z bazą SQLite"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _remember(self, key: str, value: Dict[str, Any], created_at: float):
+        """Wstawienie do LRU w pamięci z wyrzuceniem najstarszych wpisów"""
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
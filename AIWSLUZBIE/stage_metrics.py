@@ -0,0 +1,151 @@
+"""
+📈 Metryki czasu etapów potoku (chunkowanie, guardrails, LLM, precedensy, parsowanie)
+Histogram opóźnień na etap - łączenie między procesami (eksport liczników kubełków)
+i percentyle p50/p95/p99 bez przechowywania pojedynczych pomiarów
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Union
+
+from interaction_log import LatencyHistogram
+
+# Granice kubełków (sekundy, skala logarytmiczna x1.2: 10 µs - ok. 4 min)
+STAGE_BUCKETS = tuple(round(0.00001 * 1.2 ** i, 9) for i in range(94))
+
+# Etapy mierzone przez asystenta
+STAGES = (
+    "chunking",           # Podział dokumentów na fragmenty
+    "guardrails",         # Walidacja wejścia i sanityzacja wyjścia
+    "llm_call",           # Wywołanie modelu (bez trafień cache)
+    "precedent_search",   # Wyszukiwanie precedensów (z cache wyników)
+    "parsing",            # Dekodowanie odpowiedzi JSON
+    "analyze_case",       # Cała analiza sprawy
+    "generate_decision",  # Całe generowanie projektu decyzji
+)
+
+
+class StageMetrics:
+    """Rejestr histogramów czasu etapów (bezpieczny wątkowo)"""
+
+    def __init__(self, bounds: tuple = STAGE_BUCKETS):
+        self.bounds = bounds
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def observe(self, stage: str, seconds: float):
+        """Zapis czasu trwania etapu"""
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = LatencyHistogram(self.bounds)
+            histogram.add(max(0.0, seconds))
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Pomiar bloku kodu: with metrics.timer("parsing"): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def mean(self, stage: str) -> float:
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            return histogram.mean() if histogram is not None else 0.0
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Percentyle i liczniki per etap (sekundy)"""
+        with self._lock:
+            return {stage: histogram.to_dict() for stage, histogram in sorted(self._histograms.items())}
+
+    def merge(self, other: Union["StageMetrics", Dict[str, Any]]):
+        """Dołączenie pomiarów innego rejestru lub wyniku export() (np. z innego procesu)"""
+        if isinstance(other, dict):
+            other = StageMetrics.from_export(other)
+        if other.bounds != self.bounds:
+            raise ValueError("Rejestry mają różne granice kubełków")
+        with other._lock:
+            histograms = {stage: _copy(histogram) for stage, histogram in other._histograms.items()}
+        with self._lock:
+            for stage, histogram in histograms.items():
+                if stage in self._histograms:
+                    self._histograms[stage].merge(histogram)
+                else:
+                    self._histograms[stage] = histogram
+
+    def export(self) -> Dict[str, Any]:
+        """Stan do zapisu/łączenia: granice kubełków i niezerowe liczniki per etap"""
+        with self._lock:
+            return {
+                "bounds": list(self.bounds),
+                "started_at": self.started_at,
+                "stages": {
+                    stage: {
+                        "count": histogram.count,
+                        "total": histogram.total,
+                        "max": histogram.max,
+                        "buckets": {str(index): count for index, count in enumerate(histogram.counts) if count}
+                    }
+                    for stage, histogram in self._histograms.items()
+                }
+            }
+
+    @classmethod
+    def from_export(cls, data: Dict[str, Any]) -> "StageMetrics":
+        metrics = cls(bounds=tuple(data.get("bounds", STAGE_BUCKETS)))
+        metrics.started_at = data.get("started_at", metrics.started_at)
+        for stage, state in data.get("stages", {}).items():
+            histogram = LatencyHistogram(metrics.bounds)
+            for index, count in state.get("buckets", {}).items():
+                histogram.counts[int(index)] = count
+            histogram.count = state.get("count", sum(histogram.counts))
+            histogram.total = state.get("total", 0.0)
+            histogram.max = state.get("max", 0.0)
+            metrics._histograms[stage] = histogram
+        return metrics
+
+    def to_prometheus(self, name: str = "hama_stage_duration_seconds") -> str:
+        """Format tekstowy Prometheus (histogram z etykietą stage, kubełki skumulowane)"""
+        lines = [
+            f"# HELP {name} Czas trwania etapów potoku asystenta",
+            f"# TYPE {name} histogram"
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip(self.bounds, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.total:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self.started_at = time.time()
+
+
+def _copy(histogram: LatencyHistogram) -> LatencyHistogram:
+    copy = LatencyHistogram(histogram.bounds)
+    copy.merge(histogram)
+    return copy
+
+
+_metrics: Optional[StageMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_stage_metrics() -> StageMetrics:
+    """Współdzielony rejestr procesu (domyślny dla adaptera, analizatora i asystenta)"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = StageMetrics()
+    return _metrics
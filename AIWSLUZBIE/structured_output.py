@@ -0,0 +1,219 @@
+"""
+🧩 Strukturalne odpowiedzi modeli LLM (JSON)
+Przyrostowy parser JSON (jeden przebieg po tekście, także strumieniowo), naprawa obiektu
+uciętego limitem tokenów oraz walidacja względem uproszczonego JSON Schema
+"""
+
+import json
+from typing import Dict, List, Any, Optional, Iterable, Union
+
+# Typy JSON Schema -> typy Pythona
+_SCHEMA_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "number": (int, float),
+    "integer": int,
+    "boolean": bool,
+    "null": type(None),
+}
+
+_CLOSING = {"{": "}", "[": "]"}
+
+# Maksymalne zagnieżdżenie ponownego skanu wnętrza uszkodzonego obiektu
+_MAX_RETRY_DEPTH = 16
+
+
+class IncrementalJSONParser:
+    """
+    Wyszukiwanie obiektów JSON w tekście dostarczanym kawałkami
+
+    Każdy znak jest odwiedzany raz (stan: stos nawiasów, łańcuch, escape), a json.loads
+    wywoływany tylko dla domkniętego kandydata - czas liniowy względem długości odpowiedzi.
+    Tekst poza obiektami (komentarz modelu, bloki ```json) jest pomijany. Gdy zewnętrzny
+    kandydat nie jest poprawnym JSON, jego wnętrze jest skanowane ponownie - zwracane są
+    poprawne obiekty zagnieżdżone.
+    """
+
+    def __init__(self, max_object_size: int = 1_000_000):
+        """
+        Args:
+            max_object_size: Maksymalna długość kandydata w znakach (ochrona pamięci)
+        """
+        self.max_object_size = max_object_size
+        self._parts: List[str] = []
+        self._size = 0  # Łączna długość self._parts
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._depth = 0  # Poziom ponownego skanu (wnętrze uszkodzonego kandydata)
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Dodanie fragmentu tekstu - zwraca obiekty domknięte w tym fragmencie"""
+        found = []
+        segment_start = None if not self._stack else 0
+        for index, char in enumerate(chunk):
+            if not self._stack:
+                if char == "{":
+                    self._stack.append(char)
+                    self._parts = []
+                    self._size = 0
+                    segment_start = index
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in _CLOSING:
+                self._stack.append(char)
+            elif char in "}]":
+                if _CLOSING[self._stack[-1]] != char:
+                    self._reset()  # Niedopasowany nawias - kandydat odrzucony
+                    continue
+                self._stack.pop()
+                if not self._stack:
+                    self._parts.append(chunk[segment_start:index + 1])
+                    candidate = "".join(self._parts)
+                    self._parts = []
+                    self._size = 0
+                    parsed = self._decode(candidate)
+                    if parsed is not None:
+                        found.append(parsed)
+                    else:
+                        found.extend(self._inner_objects(candidate))
+
+        if self._stack:
+            self._parts.append(chunk[segment_start:])
+            self._size += len(chunk) - segment_start
+            if self._size > self.max_object_size:
+                self._reset()
+        return found
+
+    def close(self, repair: bool = True) -> List[Dict[str, Any]]:
+        """
+        Koniec tekstu - opcjonalnie domknięcie obiektu uciętego w połowie (limit tokenów)
+
+        Returns:
+            Lista z naprawionym obiektem albo pusta
+        """
+        if not self._stack or not repair:
+            self._reset()
+            return []
+        text = "".join(self._parts)
+        if self._in_string:
+            text += "\\" if self._escape else ""
+            text += '"'
+        text = text.rstrip()
+        # Ucięty element po przecinku lub dwukropku
+        if text.endswith(","):
+            text = text[:-1]
+        elif text.endswith(":"):
+            text += " null"
+        text += "".join(_CLOSING[bracket] for bracket in reversed(self._stack))
+        self._reset()
+        parsed = self._decode(text)
+        return [parsed] if parsed is not None else []
+
+    def _reset(self):
+        self._parts = []
+        self._size = 0
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+
+    def _inner_objects(self, candidate: str) -> List[Dict[str, Any]]:
+        """Poprawne obiekty wewnątrz uszkodzonego kandydata (skan z pominięciem zewnętrznego '{')"""
+        if self._depth >= _MAX_RETRY_DEPTH:
+            return []
+        parser = IncrementalJSONParser(self.max_object_size)
+        parser._depth = self._depth + 1
+        return parser.feed(candidate[1:])
+
+    @staticmethod
+    def _decode(text: str) -> Optional[Dict[str, Any]]:
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return parsed if isinstance(parsed, dict) else None
+
+
+def iter_json_objects(source: Union[str, Iterable[str]], repair: bool = True) -> Iterable[Dict[str, Any]]:
+    """Obiekty JSON z tekstu lub strumienia fragmentów (kolejno, w miarę domykania)"""
+    parser = IncrementalJSONParser()
+    chunks = [source] if isinstance(source, str) else source
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close(repair=repair)
+
+
+def validate_schema(data: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    Walidacja względem podzbioru JSON Schema (type, properties, required, items, enum,
+    minimum, maximum)
+
+    Returns:
+        Lista błędów (pusta = zgodny)
+    """
+    errors = []
+    expected = schema.get("type")
+    if expected is not None:
+        types = expected if isinstance(expected, list) else [expected]
+        if not any(_is_type(data, name) for name in types):
+            return [f"{path}: oczekiwano {'|'.join(types)}, jest {type(data).__name__}"]
+
+    if "enum" in schema and data not in schema["enum"]:
+        errors.append(f"{path}: wartość {data!r} spoza {schema['enum']}")
+
+    if isinstance(data, (int, float)) and not isinstance(data, bool):
+        if "minimum" in schema and data < schema["minimum"]:
+            errors.append(f"{path}: {data} < {schema['minimum']}")
+        if "maximum" in schema and data > schema["maximum"]:
+            errors.append(f"{path}: {data} > {schema['maximum']}")
+
+    if isinstance(data, dict):
+        for name in schema.get("required", []):
+            if name not in data:
+                errors.append(f"{path}: brak pola '{name}'")
+        for name, subschema in schema.get("properties", {}).items():
+            if name in data:
+                errors.extend(validate_schema(data[name], subschema, f"{path}.{name}"))
+
+    if isinstance(data, list) and "items" in schema:
+        for index, item in enumerate(data):
+            errors.extend(validate_schema(item, schema["items"], f"{path}[{index}]"))
+
+    return errors
+
+
+def extract_json(source: Union[str, Iterable[str]], schema: Optional[Dict[str, Any]] = None,
+                 repair: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Pierwszy obiekt JSON z odpowiedzi modelu zgodny ze schematem
+
+    Args:
+        source: Odpowiedź modelu (tekst lub strumień fragmentów)
+        schema: Uproszczony JSON Schema (None = dowolny obiekt)
+        repair: Czy domykać obiekt ucięty na końcu odpowiedzi
+
+    Returns:
+        Obiekt albo None, jeśli odpowiedź nie zawiera poprawnego obiektu
+    """
+    for parsed in iter_json_objects(source, repair=repair):
+        if schema is None or not validate_schema(parsed, schema):
+            return parsed
+    return None
+
+
+def _is_type(value: Any, name: str) -> bool:
+    if name in ("number", "integer") and isinstance(value, bool):
+        return False
+    return isinstance(value, _SCHEMA_TYPES.get(name, object))
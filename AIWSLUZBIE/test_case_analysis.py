@@ -0,0 +1,72 @@
+"""
+🧪 Testy równoległej analizy dokumentów sprawy - czas etapu i kolejność wyników (wolny adapter fake)
+Uruchomienie: python -m pytest AIWSLUZBIE/test_case_analysis.py
+"""
+
+import os
+import sys
+import math
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from asystent_ai_gqpa_integrated import AdministrativeCase, GeminiCognitiveAdapter, HAMAAdministrativeAssistant
+from stage_metrics import StageMetrics
+
+DELAY = 0.15
+
+
+def _assistant(max_concurrency: int) -> HAMAAdministrativeAssistant:
+    adapter = GeminiCognitiveAdapter(None, use_local_model=True, model_backend="fake", stage_metrics=StageMetrics())
+    adapter.local_adapter.fake.delay = DELAY
+    return HAMAAdministrativeAssistant(adapter, max_concurrency=max_concurrency)
+
+
+def _case(case_id: str, n_documents: int) -> AdministrativeCase:
+    # Krótkie dokumenty - jeden fragment, jedno wywołanie modelu na dokument
+    documents = [
+        {"type": f"zalacznik_{i}", "content": f"Załącznik numer {i} do wniosku o nadanie kategorii."}
+        for i in range(n_documents)
+    ]
+    return AdministrativeCase(
+        case_id=case_id, case_type="kategoria_hotelu", documents=documents,
+        parties=["Wnioskodawca"], status="nowa", deadline=None
+    )
+
+
+@pytest.mark.parametrize('n_documents, max_concurrency', [(7, 3), (4, 4), (5, 1)])
+def test_document_stage_time_and_order(n_documents, max_concurrency):
+    assistant = _assistant(max_concurrency)
+    case = _case(f"SPR-{n_documents}-{max_concurrency}", n_documents)
+    assistant.add_case(case)
+    fake = assistant.adapter.local_adapter.fake
+
+    start = time.monotonic()
+    analyses = assistant._analyze_documents(case)
+    elapsed = time.monotonic() - start
+
+    expected = DELAY * math.ceil(n_documents / max_concurrency)
+    assert expected * 0.9 <= elapsed < expected + DELAY * 0.8
+    assert fake.calls == n_documents
+    assert [analysis.document_id for analysis in analyses] == [
+        f"DOC-{case.case_id}-zalacznik_{i}" for i in range(n_documents)
+    ]
+
+
+def test_analyze_case_tracks_slowest_batch_not_sum():
+    assistant = _assistant(max_concurrency=4)
+    case = _case("SPR-PELNA", 8)
+    assistant.add_case(case)
+    stages = []
+
+    start = time.monotonic()
+    analysis = assistant.analyze_case(case.case_id, progress_callback=lambda stage, *args: stages.append(stage))
+    elapsed = time.monotonic() - start
+
+    # 2 tury dokumentów + synteza, zamiast 8 dokumentów + synteza kolejno
+    assert "error" not in analysis
+    assert elapsed < DELAY * 3 + DELAY * 0.8
+    assert assistant.adapter.local_adapter.fake.calls == 9
+    assert stages[0] == "documents" and "cognitive_analysis" in stages
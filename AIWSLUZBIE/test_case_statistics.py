@@ -0,0 +1,112 @@
+"""
+🧪 Testy przyrostowych statystyk spraw - zgodność z pełnym przeliczeniem po add_case, analizie i decyzji
+Uruchomienie: python -m pytest AIWSLUZBIE/test_case_statistics.py
+"""
+
+import os
+import re
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from asystent_ai_gqpa_integrated import AdministrativeCase, GeminiCognitiveAdapter, HAMAAdministrativeAssistant
+from case_statistics import CaseStatistics
+from stage_metrics import StageMetrics
+
+RISK_BY_CASE = {"SPR-1": "niski", "SPR-2": "wysoki", "SPR-3": "średni", "SPR-4": "wysoki"}
+
+
+def _assistant(risk_override=None) -> HAMAAdministrativeAssistant:
+    adapter = GeminiCognitiveAdapter(None, use_local_model=True, model_backend="fake", stage_metrics=StageMetrics())
+    fake = adapter.local_adapter.fake
+    fake.delay = 0.0
+    risk_override = {} if risk_override is None else risk_override
+
+    def respond(prompt, latency, **kwargs):
+        # Poziom ryzyka zależny od sprawy w prompcie (inne odpowiedzi - inne agregaty)
+        match = re.search(r"- ID: (\S+)", prompt)
+        case_id = match.group(1) if match else None
+        risk = risk_override.get(case_id, RISK_BY_CASE.get(case_id, "średni"))
+        body = {"summary": f"Sprawa {case_id}", "risk_level": risk, "legal_issues": [],
+                "recommendations": "", "risk_factors": []}
+        return {'response': json.dumps(body, ensure_ascii=False), 'success': True, 'error': None, 'latency': latency}
+
+    fake._response = respond
+    return HAMAAdministrativeAssistant(adapter, max_concurrency=2)
+
+
+def _case(case_id: str, case_type: str, status: str = "nowa") -> AdministrativeCase:
+    return AdministrativeCase(
+        case_id=case_id, case_type=case_type,
+        documents=[{"type": "wniosek", "content": f"Wniosek w sprawie {case_id}."}],
+        parties=["Wnioskodawca"], status=status, deadline=None
+    )
+
+
+def _assert_consistent(assistant: HAMAAdministrativeAssistant):
+    assert assistant.case_stats.check_consistency(assistant.cases.values())
+    reference = CaseStatistics()
+    reference.rebuild(assistant.cases.values())
+    assert assistant.case_stats.get_stats() == reference.get_stats()
+
+
+def test_incremental_stats_match_full_rebuild():
+    assistant = _assistant()
+    cases = [
+        _case("SPR-1", "kategoria_hotelu"),
+        _case("SPR-2", "kategoria_hotelu", status="w_toku"),
+        _case("SPR-3", "kwalifikacja_zawodowa"),
+        _case("SPR-4", "zakaz_dzialalnosci", status="w_toku")
+    ]
+    for case in cases:
+        assert assistant.add_case(case)
+        _assert_consistent(assistant)
+
+    for case_id in ("SPR-1", "SPR-2", "SPR-4"):
+        assert "error" not in assistant.analyze_case(case_id)
+        _assert_consistent(assistant)
+
+    assistant.generate_decision_draft("SPR-2", "negatywna")
+    assistant.generate_decision_draft("SPR-3", "pozytywna")
+    _assert_consistent(assistant)
+
+    stats = assistant.get_case_statistics()
+    assert stats["total_cases"] == 4
+    assert stats["cases_by_status"] == {"nowa": 2, "w_toku": 2}
+    assert stats["cases_by_type"] == {"kategoria_hotelu": 2, "kwalifikacja_zawodowa": 1, "zakaz_dzialalnosci": 1}
+    assert stats["cases_by_risk"] == {"niski": 1, "średni": 0, "wysoki": 2, "krytyczny": 0}
+    assert stats["cases_with_decisions"] == 2
+
+
+def test_reanalysis_and_readded_case_replace_previous_state():
+    risk_override = {}
+    assistant = _assistant(risk_override)
+    assistant.add_case(_case("SPR-1", "kategoria_hotelu"))
+    assistant.add_case(_case("SPR-2", "kategoria_hotelu"))
+    assistant.analyze_case("SPR-1")
+    assistant.analyze_case("SPR-2")
+
+    # Ponowna analiza z innym poziomem ryzyka - poprzedni poziom odjęty
+    risk_override["SPR-1"] = "wysoki"
+    assistant.analyze_case("SPR-1")
+    _assert_consistent(assistant)
+    assert assistant.get_case_statistics()["cases_by_risk"]["niski"] == 0
+
+    # Ta sama sprawa dodana ponownie (nowy typ, bez analizy) - liczona raz
+    assistant.add_case(_case("SPR-2", "kwalifikacja_zawodowa"))
+    _assert_consistent(assistant)
+    stats = assistant.get_case_statistics()
+    assert stats["total_cases"] == 2
+    assert stats["cases_by_type"] == {"kategoria_hotelu": 1, "kwalifikacja_zawodowa": 1}
+    assert stats["cases_by_risk"]["wysoki"] == 1
+
+
+def test_verify_rebuilds_after_out_of_band_change():
+    assistant = _assistant()
+    assistant.add_case(_case("SPR-1", "kategoria_hotelu"))
+    assistant.cases["SPR-1"].status = "zakonczona"  # Zmiana z pominięciem observe()
+
+    assert not assistant.case_stats.check_consistency(assistant.cases.values())
+    assert assistant.get_case_statistics(verify=True)["cases_by_status"] == {"zakonczona": 1}
+    _assert_consistent(assistant)
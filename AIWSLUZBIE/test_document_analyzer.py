@@ -0,0 +1,99 @@
+"""
+🧪 Testy DocumentAnalyzer - cache analiz fragmentów (LRU, klucz = prompt) i wspólna pula fragmentów
+Uruchomienie: python -m pytest AIWSLUZBIE/test_document_analyzer.py
+"""
+
+import os
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from asystent_ai_gqpa_integrated import AdministrativeCase, DocumentAnalyzer
+from stage_metrics import StageMetrics
+
+RESPONSE = '{"key_facts": ["fakt"], "legal_references": [], "risk_factors": [], "confidence": 0.8}'
+
+
+class CountingAdapter:
+    """Adapter testowy - liczba wywołań i maksymalna liczba wywołań naraz"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.stage_metrics = StageMetrics()
+        self.prompts = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def cognitive_query(self, prompt, json_mode=False, priority="interactive"):
+        with self._lock:
+            self.prompts.append(prompt)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return {'response': RESPONSE, 'success': True}
+
+
+def _case(case_id: str, documents) -> AdministrativeCase:
+    return AdministrativeCase(
+        case_id=case_id, case_type="kategoria_hotelu", documents=documents,
+        parties=["Wnioskodawca"], status="nowa", deadline=None
+    )
+
+
+def _document(text: str, doc_type: str = "wniosek") -> dict:
+    return {"type": doc_type, "content": text}
+
+
+def test_cache_hits_only_for_identical_prompt():
+    adapter = CountingAdapter()
+    analyzer = DocumentAnalyzer(adapter)
+    document = _document("Wnioskodawca prowadzi hotel od 2015 roku.")
+
+    analyzer.analyze_document(document, _case("SPR-1", [document]))
+    analyzer.analyze_document(document, _case("SPR-1", [document]))
+    assert len(adapter.prompts) == 1
+
+    # Ta sama treść w innej sprawie - prompt zawiera ID sprawy, więc nowe zapytanie
+    analyzer.analyze_document(document, _case("SPR-2", [document]))
+    assert len(adapter.prompts) == 2
+    assert "SPR-2" in adapter.prompts[-1]
+
+
+def test_cache_is_bounded_lru():
+    adapter = CountingAdapter()
+    analyzer = DocumentAnalyzer(adapter, analysis_cache_size=2)
+    case = _case("SPR-1", [])
+    documents = [_document(f"Dokument numer {i}.") for i in range(3)]
+
+    for document in documents:
+        analyzer.analyze_document(document, case)
+    assert len(analyzer.analysis_cache) == 2
+
+    analyzer.analyze_document(documents[2], case)  # Najnowszy - w cache
+    analyzer.analyze_document(documents[0], case)  # Usunięty jako najstarszy
+    assert len(adapter.prompts) == 4
+
+
+def test_documents_share_one_chunk_pool():
+    adapter = CountingAdapter(delay=0.05)
+    analyzer = DocumentAnalyzer(adapter, chunk_size=100, chunk_overlap=0, max_chunk_concurrency=3)
+    case = _case("SPR-1", [])
+    sentence = "Obiekt spełnia wymagania kategorii. "
+    documents = [_document(f"Dokument {d}. " + sentence * 12) for d in range(4)]
+
+    try:
+        # 4 dokumenty naraz, każdy w kilku fragmentach - łącznie najwyżej 3 zapytania do modelu
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            analyses = list(pool.map(lambda document: analyzer.analyze_document(document, case), documents))
+    finally:
+        analyzer.close()
+
+    assert len(adapter.prompts) > len(documents)
+    assert adapter.max_active <= 3
+    assert all(analysis.key_facts == ["fakt"] for analysis in analyses)
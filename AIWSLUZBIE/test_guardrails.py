@@ -0,0 +1,66 @@
+"""
+🧪 Testy skanera guardrails - sygnatury ataków wewnątrz danych osobowych i nakładające się rodzaje PII
+Uruchomienie: python -m pytest AIWSLUZBIE/test_guardrails.py
+"""
+
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from guardrails_detailed import SecurityGuardrails
+
+guardrails = SecurityGuardrails()
+
+
+def test_injection_inside_email_is_rejected():
+    for text in ["a--b@x.com", "kontakt jan--x@test.pl prosze", "jan';@test.pl"]:
+        is_valid, message = guardrails.validate_input(text, "query")
+        assert not is_valid, text
+        assert "SQL injection" in message
+
+
+def test_rejection_messages_keep_category_order():
+    assert guardrails.validate_input("<script>delete</script>", "query") == (
+        False, "Wykryto niebezpieczne słowo kluczowe: delete"
+    )
+    assert guardrails.validate_input("<script>alert('x')</script>", "query") == (
+        False, "Wykryto potencjalną próbę SQL injection"
+    )
+    assert guardrails.validate_input('<a onclick="x()">', "query") == (False, "Wykryto potencjalną próbę XSS")
+    assert guardrails.validate_input("wniosek o wpis do rejestru jan@test.pl", "query") == (True, "OK")
+
+
+def test_overlapping_pii_kinds_are_reported():
+    detected = guardrails.detect_personal_data("tel 123456789")
+    assert detected == {"regon": ["123456789"], "telefon": ["123456789"]}
+
+
+def test_anonymize_prefers_earlier_pattern_on_overlap():
+    text, stats = guardrails.anonymize_personal_data("PESEL 44051401359, tel 123456789, mail jan@test.pl")
+    assert stats == {"pesel": 1, "regon": 1, "email": 1}
+    assert "44051401359" not in text and "123456789" not in text and "jan@test.pl" not in text
+    assert "[PESEL_HASH_" in text and "[REGON_HASH_" in text
+
+
+def test_scan_returns_sorted_typed_spans():
+    text = "a--b@x.com"
+    matches = guardrails.scan(text)
+    assert [(m.kind, m.category) for m in matches] == [("email", "pii"), ("sql_token", "sql_injection")]
+    assert all(text[m.start:m.end] == m.value for m in matches)
+
+
+def test_dict_input_is_scanned_as_str_repr():
+    # str(dict) zawiera apostrofy - tak jak przed prekompilacją wzorców
+    assert guardrails.validate_input({'a': 'b'}, "query") == (False, "Wykryto potencjalną próbę SQL injection")
+    reason = guardrails.validate_input({'termin': datetime(2024, 1, 1)}, "query")[1]
+    assert "JSON" not in reason
+
+
+def test_personal_data_scan_skips_attack_signatures():
+    text = "a--b@x.com; tel 123456789"
+    matches = guardrails.scan_personal_data(text)
+    assert {m.category for m in matches} == {"pii"}
+    assert [m.kind for m in matches] == ["email", "regon", "telefon"]
+    assert guardrails.detect_personal_data(text, matches) == guardrails.detect_personal_data(text)
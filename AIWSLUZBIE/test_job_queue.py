@@ -0,0 +1,176 @@
+"""
+🧪 Testy kolejki zadań w tle - postęp, wyniki częściowe, anulowanie, usuwanie z pamięci, restart
+Uruchomienie: python -m pytest AIWSLUZBIE/test_job_queue.py
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from job_queue import JobQueue
+
+
+def _wait_for(queue: JobQueue, job_id: str, statuses, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job is not None and job["status"] in statuses:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Zadanie {job_id} nie osiągnęło statusu {statuses}: {queue.get(job_id)}")
+
+
+def _staged(context, stages: int = 3):
+    for i in range(stages):
+        context.report(f"etap_{i}", progress=(i + 1) / stages, partial={f"etap_{i}": i})
+    return {"stages": stages}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(max_workers=1, db_path=str(tmp_path / "jobs.sqlite"))
+    yield queue
+    queue.shutdown(wait=True)
+
+
+def test_submit_reports_progress_and_partial_results(queue):
+    queue.register("staged", _staged)
+    job = queue.submit("staged", {"stages": 4})
+    assert job["status"] == "queued"
+
+    done = _wait_for(queue, job["job_id"], ("completed",))
+    assert done["result"] == {"stages": 4}
+    assert done["progress"] == 1.0
+    assert done["stage"] == "etap_3"
+    assert done["partial"] == {"etap_0": 0, "etap_1": 1, "etap_2": 2, "etap_3": 3}
+    assert queue.list_jobs(status="completed")[0]["job_id"] == job["job_id"]
+
+
+def test_failing_handler_marks_job_failed(queue):
+    def broken(context):
+        raise RuntimeError("brak dokumentów")
+
+    queue.register("broken", broken)
+    job = _wait_for(queue, queue.submit("broken")["job_id"], ("failed",))
+    assert job["error"] == "brak dokumentów"
+
+
+def test_cancel_running_job_stops_at_stage_boundary(queue):
+    started, release = threading.Event(), threading.Event()
+
+    def blocking(context):
+        context.report("start", progress=0.1)
+        started.set()
+        release.wait(5)
+        context.report("po_blokadzie", progress=0.5)
+        return "nie powinno dojść"
+
+    queue.register("blocking", blocking)
+    job_id = queue.submit("blocking")["job_id"]
+    assert started.wait(5)
+
+    requested = queue.cancel(job_id)
+    assert requested["status"] == "running" and requested["cancel_requested"]
+    release.set()
+
+    job = _wait_for(queue, job_id, ("cancelled",))
+    assert job["stage"] == "start"
+    assert job["result"] is None
+
+
+def test_cancel_queued_job_never_runs(queue):
+    started, release = threading.Event(), threading.Event()
+    ran = []
+
+    def blocking(context):
+        started.set()
+        release.wait(5)
+
+    queue.register("blocking", blocking)
+    queue.register("record", lambda context: ran.append(True))
+    first = queue.submit("blocking")["job_id"]
+    assert started.wait(5)
+
+    second = queue.submit("record")["job_id"]
+    assert queue.cancel(second)["status"] == "cancelled"
+    release.set()
+    _wait_for(queue, first, ("completed",))
+
+    assert queue.get(second)["status"] == "cancelled"
+    assert ran == []
+
+
+def test_evicted_job_is_served_and_cancelled_from_sqlite(tmp_path):
+    queue = JobQueue(max_workers=1, db_path=str(tmp_path / "jobs.sqlite"), max_memory_jobs=2)
+    queue.register("staged", _staged)
+    try:
+        job_ids = []
+        for _ in range(4):
+            job_ids.append(queue.submit("staged")["job_id"])
+            _wait_for(queue, job_ids[-1], ("completed",))
+
+        oldest = job_ids[0]
+        assert oldest not in queue._jobs
+        assert queue.get(oldest)["result"] == {"stages": 3}
+
+        # Anulowanie zakończonego zadania spoza pamięci - stan z SQLite zamiast 404
+        cancelled = queue.cancel(oldest)
+        assert cancelled is not None
+        assert cancelled["status"] == "completed"
+        assert queue.cancel("brak_takiego_zadania") is None
+    finally:
+        queue.shutdown(wait=True)
+
+
+def test_evicted_job_without_database_is_missing():
+    queue = JobQueue(max_workers=1, max_memory_jobs=1)
+    queue.register("staged", _staged)
+    try:
+        first = queue.submit("staged")["job_id"]
+        _wait_for(queue, first, ("completed",))
+        _wait_for(queue, queue.submit("staged")["job_id"], ("completed",))
+        queue.submit("staged")
+        assert queue.get(first) is None
+        assert queue.cancel(first) is None
+    finally:
+        queue.shutdown(wait=True)
+
+
+def test_restart_marks_interrupted_jobs_failed(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite")
+    queue = JobQueue(max_workers=1, db_path=db_path)
+    queue.register("staged", _staged)
+    finished = queue.submit("staged")["job_id"]
+    _wait_for(queue, finished, ("completed",))
+    queue.shutdown(wait=True)
+
+    # Zadania pozostawione w bazie przez przerwany proces
+    db = sqlite3.connect(db_path)
+    for job_id, status in (("przerwane_w_kolejce", "queued"), ("przerwane_w_trakcie", "running")):
+        job = {"job_id": job_id, "kind": "staged", "params": {}, "status": status, "stage": None,
+               "progress": 0.0, "partial": {}, "result": None, "error": None, "cancel_requested": False,
+               "created_at": "2024-01-01T00:00:00", "started_at": None, "finished_at": None}
+        db.execute("INSERT INTO jobs (job_id, kind, status, created_at, job) VALUES (?, ?, ?, ?, ?)",
+                   (job_id, "staged", status, job["created_at"], json.dumps(job)))
+    db.commit()
+    db.close()
+
+    restarted = JobQueue(max_workers=1, db_path=db_path)
+    try:
+        for job_id in ("przerwane_w_kolejce", "przerwane_w_trakcie"):
+            job = restarted.get(job_id)
+            assert job["status"] == "failed"
+            assert "restartem" in job["error"]
+            assert job["finished_at"] is not None
+        assert restarted.get(finished)["status"] == "completed"
+        assert restarted.list_jobs(status="running") == []
+        assert restarted.cancel("przerwane_w_trakcie")["status"] == "failed"
+    finally:
+        restarted.shutdown(wait=True)
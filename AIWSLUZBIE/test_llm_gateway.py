@@ -0,0 +1,88 @@
+"""
+🧪 Testy bramki LLM - łączenie identycznych zapytań przy anulowaniu lidera lub oczekujących
+Uruchomienie: python -m pytest AIWSLUZBIE/test_llm_gateway.py
+"""
+
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from llm_gateway import LLMGateway
+
+
+class _Upstream:
+    """Wywołanie upstream ze sztucznym opóźnieniem i licznikiem"""
+
+    def __init__(self, delay: float = 0.1, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {'response': prompt}
+
+
+def _calls(gateway, upstream, n):
+    return [
+        asyncio.ensure_future(gateway.acall("fake", upstream, "p", coalesce_key="k"))
+        for _ in range(n)
+    ]
+
+
+def test_cancelled_follower_does_not_affect_others():
+    gateway, upstream = LLMGateway(), _Upstream()
+
+    async def scenario():
+        tasks = _calls(gateway, upstream, 4)
+        await asyncio.sleep(0.02)
+        tasks[2].cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert isinstance(results[2], asyncio.CancelledError)
+    assert [r['response'] for i, r in enumerate(results) if i != 2] == ["p", "p", "p"]
+    assert upstream.calls == 1
+
+
+def test_cancelled_leader_hands_over_to_follower():
+    gateway, upstream = LLMGateway(), _Upstream()
+
+    async def scenario():
+        tasks = _calls(gateway, upstream, 3)
+        await asyncio.sleep(0.02)
+        tasks[0].cancel()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert isinstance(results[0], asyncio.CancelledError)
+    assert results[1] == {'response': "p"} and results[2] == {'response': "p"}
+    # Nowy lider wykonał jedno wywołanie za obu oczekujących
+    assert upstream.calls == 2
+
+
+def test_leader_error_is_shared_with_followers():
+    gateway, upstream = LLMGateway(), _Upstream(error=ValueError("upstream"))
+
+    async def scenario():
+        return await asyncio.gather(*_calls(gateway, upstream, 3), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert upstream.calls == 1
+
+
+def test_followers_get_independent_copies():
+    gateway, upstream = LLMGateway(), _Upstream(delay=0.05)
+
+    async def scenario():
+        return await asyncio.gather(*_calls(gateway, upstream, 2))
+
+    first, second = asyncio.run(scenario())
+    first['response'] = "zmieniony"
+    assert second['response'] == "p"
@@ -0,0 +1,85 @@
+"""
+🧪 Testy MicroBatcher - anulowanie zapytań nie może zatrzymać wątku batchera
+Uruchomienie: python -m pytest AIWSLUZBIE/test_micro_batcher.py
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from local_model_adapter import MicroBatcher
+
+
+def _echo_batcher(delay: float = 0.0, **kwargs) -> MicroBatcher:
+    def batch_fn(prompts, params):
+        time.sleep(delay)
+        return [{'response': prompt, 'success': True, 'batch_size': len(prompts)} for prompt in prompts]
+    return MicroBatcher(batch_fn, **kwargs)
+
+
+def test_batches_concurrent_prompts():
+    batcher = _echo_batcher(max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(f"p{i}", {'t': 1}) for i in range(4)]
+    results = [future.result(timeout=5) for future in futures]
+    assert [r['response'] for r in results] == ["p0", "p1", "p2", "p3"]
+    assert results[0]['batch_size'] == 4
+
+
+def test_cancelled_async_caller_does_not_kill_worker():
+    batcher = _echo_batcher(delay=0.2, max_batch_size=4, max_wait_ms=5)
+
+    async def scenario():
+        # Anulowanie w trakcie generowania batcha
+        task = asyncio.ensure_future(asyncio.wrap_future(batcher.submit("a", {})))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        # Kolejne zapytanie musi zostać obsłużone
+        return await asyncio.wait_for(asyncio.wrap_future(batcher.submit("b", {})), timeout=5)
+
+    assert asyncio.run(scenario())['response'] == "b"
+    assert batcher._worker.is_alive()
+
+
+def test_cancelled_before_batch_is_skipped():
+    calls = []
+    gate = threading.Event()
+
+    def batch_fn(prompts, params):
+        gate.wait(5)
+        calls.append(list(prompts))
+        return [{'response': prompt} for prompt in prompts]
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=1, max_wait_ms=0)
+    first = batcher.submit("first", {})
+    time.sleep(0.05)  # "first" w trakcie generowania
+    cancelled = batcher.submit("cancelled", {})
+    assert cancelled.cancel()
+    gate.set()
+    assert first.result(timeout=5)['response'] == "first"
+    assert batcher.submit("next", {}).result(timeout=5)['response'] == "next"
+    assert ["cancelled"] not in calls
+
+
+def test_batch_error_is_reported_and_worker_survives():
+    state = {'fail': True}
+
+    def batch_fn(prompts, params):
+        if state.pop('fail', False):
+            raise ValueError("boom")
+        return [{'response': prompt} for prompt in prompts]
+
+    batcher = MicroBatcher(batch_fn, max_batch_size=2, max_wait_ms=0)
+    try:
+        batcher.submit("x", {}).result(timeout=5)
+        assert False, "oczekiwano wyjątku"
+    except ValueError:
+        pass
+    assert batcher.submit("y", {}).result(timeout=5)['response'] == "y"
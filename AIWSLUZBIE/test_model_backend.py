@@ -0,0 +1,105 @@
+"""
+🧪 Testy wyboru backendu modelu i ścieżki asynchronicznej - adapter fake bez sieci
+Uruchomienie: python -m pytest AIWSLUZBIE/test_model_backend.py
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from asystent_ai_gqpa_integrated import GeminiCognitiveAdapter, HAMAAdministrativeAssistant
+from benchmark import build_corpus
+from stage_metrics import StageMetrics
+
+DELAY = 0.2
+
+
+def _fake_adapter(**kwargs) -> GeminiCognitiveAdapter:
+    adapter = GeminiCognitiveAdapter(None, use_local_model=True, stage_metrics=StageMetrics(), **kwargs)
+    adapter.local_adapter.fake.delay = DELAY
+    return adapter
+
+
+def test_backend_from_argument_and_environment(monkeypatch):
+    adapter = GeminiCognitiveAdapter(None, use_local_model=True, model_backend="fake", stage_metrics=StageMetrics())
+    assert adapter.local_adapter.backend_name == "fake"
+
+    monkeypatch.setenv('MODEL_BACKEND', "fake")
+    monkeypatch.setenv('FAKE_MODEL_DELAY', "0.01")
+    adapter = GeminiCognitiveAdapter(None, use_local_model=True, stage_metrics=StageMetrics())
+    assert adapter.model_backend == "fake"
+    assert adapter.local_adapter.fake.delay == 0.01
+
+    result = adapter.cognitive_query("Czy wniosek jest kompletny?")
+    assert result['success']
+    assert adapter.local_adapter.fake.calls == 1
+
+
+def test_concurrent_async_queries_overlap_model_latency():
+    adapter = _fake_adapter(model_backend="fake")
+    n = 8
+
+    async def run():
+        start = time.monotonic()
+        results = await asyncio.gather(*(
+            adapter.acognitive_query(f"Zapytanie numer {i}") for i in range(n)
+        ))
+        return results, time.monotonic() - start
+
+    results, elapsed = asyncio.run(run())
+    assert all(result['success'] for result in results)
+    assert adapter.local_adapter.fake.calls == n
+    # Wywołania nakładają się - czas bliski jednemu opóźnieniu, nie n * DELAY
+    assert elapsed < DELAY * n / 2
+
+
+def test_pending_query_does_not_block_event_loop():
+    adapter = _fake_adapter(model_backend="fake")
+
+    async def run():
+        ticks = 0
+        query = asyncio.ensure_future(adapter.acognitive_query("Długie zapytanie"))
+        while not query.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        return ticks, query.result()
+
+    ticks, result = asyncio.run(run())
+    assert result['success']
+    assert ticks >= DELAY / 0.01 / 2
+
+
+def test_api_serves_requests_while_decisions_are_generated(monkeypatch):
+    import api_dashboard
+
+    assistant = HAMAAdministrativeAssistant(_fake_adapter(model_backend="fake"))
+    cases = build_corpus(4, 1, document_chars=200)
+    for case in cases:
+        assistant.add_case(case)
+    monkeypatch.setattr(api_dashboard, 'assistant_instance', assistant)
+
+    async def run():
+        transport = httpx.ASGITransport(app=api_dashboard.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            start = time.monotonic()
+            decisions = [
+                asyncio.ensure_future(client.post(f"/api/cases/{case.case_id}/generate-decision", params={"wait": "true"}))
+                for case in cases
+            ]
+            await asyncio.sleep(DELAY / 4)
+            health = await client.get("/api/health")
+            health_elapsed = time.monotonic() - start
+            responses = await asyncio.gather(*decisions)
+            return health, health_elapsed, responses, time.monotonic() - start
+
+    health, health_elapsed, responses, elapsed = asyncio.run(run())
+    assert health.status_code == 200
+    assert health_elapsed < DELAY
+    assert all(response.status_code == 200 for response in responses)
+    assert [response.json()['case_id'] for response in responses] == [case.case_id for case in cases]
+    assert elapsed < DELAY * len(cases) / 2
@@ -0,0 +1,44 @@
+"""
+🧪 Testy parsera odpowiedzi strukturalnych (structured_output)
+Uruchomienie: python -m pytest AIWSLUZBIE/test_structured_output.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from structured_output import IncrementalJSONParser, extract_json, iter_json_objects
+
+
+def test_object_surrounded_by_text():
+    text = 'Oto wynik:\n```json\n{"title": "A", "n": [1, 2, {"x": "}"}]}\n```'
+    assert extract_json(text) == {"title": "A", "n": [1, 2, {"x": "}"}]}
+
+
+def test_inner_object_found_when_outer_is_malformed():
+    text = '{"notatka": brak cudzysłowu, "wynik": {"title": "A", "description": "B"}}'
+    assert extract_json(text, {"type": "object", "required": ["title"]}) == {"title": "A", "description": "B"}
+
+
+def test_nested_retry_and_following_objects():
+    text = '{"a": x, "b": {"c": y, "d": {"ok": 1}}} potem {"next": 2}'
+    assert list(iter_json_objects(text)) == [{"ok": 1}, {"next": 2}]
+
+
+def test_streamed_chunks_and_truncated_repair():
+    chunks = ['{"title": "Scena', 'riusz", "items": [1, 2', ', 3], "reasoning": {"confidence": 0.8']
+    assert list(iter_json_objects(chunks)) == [
+        {"title": "Scenariusz", "items": [1, 2, 3], "reasoning": {"confidence": 0.8}}
+    ]
+
+
+def test_schema_skips_non_matching_objects():
+    text = '{"meta": 1} {"title": "A", "description": "B"}'
+    schema = {"type": "object", "required": ["title", "description"]}
+    assert extract_json(text, schema) == {"title": "A", "description": "B"}
+
+
+def test_deep_malformed_nesting_is_bounded():
+    parser = IncrementalJSONParser()
+    assert parser.feed("{" * 200 + "x" + "}" * 200) == []
@@ -0,0 +1,71 @@
+"""
+🧪 Testy VectorDatabase (lokalny indeks) - upsert po identyfikatorze jak w ChromaDB
+Uruchomienie: python -m pytest AIWSLUZBIE/test_vector_db.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from vector_db import VectorDatabase
+
+
+def _precedent(precedent_id, summary, case_type="kategoria_hotelu"):
+    return {'id': precedent_id, 'case_type': case_type, 'summary': summary, 'content': summary}
+
+
+def _local_db(tmp_path) -> VectorDatabase:
+    db = VectorDatabase(persist_directory=str(tmp_path))
+    db.available = False  # Test lokalnego indeksu także przy zainstalowanym ChromaDB
+    if db.local_index is None:
+        db._init_local_index()
+    return db
+
+
+def test_reimport_counts_only_new_or_changed(tmp_path):
+    db = _local_db(tmp_path)
+    precedents = [_precedent("p1", "hotel cztery gwiazdki"), _precedent("p2", "przewodnik dyplom")]
+    assert db.add_precedents(precedents) == 2
+    version = db.version
+
+    assert db.add_precedents(precedents) == 0
+    assert db.version == version
+    assert not db.add_precedent(precedents[0])
+    assert len(db.local_index) == 2
+
+
+def test_same_id_with_new_content_replaces_entry(tmp_path):
+    db = _local_db(tmp_path)
+    db.add_precedents([_precedent("p1", "hotel cztery gwiazdki"), _precedent("p2", "przewodnik dyplom")])
+
+    assert db.add_precedents([_precedent("p1", "zakaz dzialalnosci biura podrozy", "zakaz_dzialalnosci")]) == 1
+    assert len(db.local_index) == 2
+    assert db.local_index.ids.count("p1") == 1
+
+    results = db.search_precedents("zakaz dzialalnosci biura", case_type="zakaz_dzialalnosci")
+    assert [r['id'] for r in results] == ["p1"]
+    assert db.search_precedents("hotel cztery gwiazdki", case_type="kategoria_hotelu") == []
+
+
+def test_duplicate_ids_in_one_batch_keep_last_version(tmp_path):
+    db = _local_db(tmp_path)
+    added = db.add_precedents([_precedent("p1", "wersja pierwsza"), _precedent("p1", "wersja druga")])
+    assert added == 1
+    assert len(db.local_index) == 1
+    assert db.local_index.payloads[0]['summary'] == "wersja druga"
+
+
+def test_replacement_survives_reload(tmp_path):
+    db = _local_db(tmp_path)
+    db.add_precedents([_precedent("p1", "hotel cztery gwiazdki")])
+    db.add_precedent(_precedent("p1", "hotel pięć gwiazdek"))
+    db.flush()
+
+    reloaded = _local_db(tmp_path)
+    assert len(reloaded.local_index) == 1
+    assert reloaded.local_index.payloads[0]['summary'] == "hotel pięć gwiazdek"
+    assert reloaded.add_precedent(_precedent("p1", "hotel pięć gwiazdek")) is False
+    # Podmiana w indeksie odczytanym przez memmap
+    assert reloaded.add_precedent(_precedent("p1", "przewodnik dyplom studia")) is True
+    assert [r['id'] for r in reloaded.search_precedents("przewodnik dyplom")] == ["p1"]
@@ -5,17 +5,16 @@ Wykorzystuje ChromaDB do przechowywania i wyszukiwania precedensów prawnych
 
 import os
 import json
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import hashlib
+import weakref
+import importlib.util
+from typing import List, Dict, Any, Optional, Iterable
 
-# Opcjonalna zależność - ChromaDB
-try:
-    import chromadb
-    from chromadb.config import Settings
-    CHROMADB_AVAILABLE = True
-except ImportError:
-    CHROMADB_AVAILABLE = False
-    chromadb = None
+from local_vector_index import HashedVectorIndex
+
+# Opcjonalna zależność - ChromaDB (importowana przy tworzeniu bazy, nie przy imporcie modułu)
+CHROMADB_AVAILABLE = importlib.util.find_spec("chromadb") is not None
+if not CHROMADB_AVAILABLE:
     print("ℹ️ ChromaDB nie dostępne - używam symulacji. Zainstaluj: pip install chromadb")
 
 class VectorDatabase:
@@ -26,9 +25,17 @@ class VectorDatabase:
         self.client = None
         self.collection = None
         self.available = False
+        self.local_index: Optional[HashedVectorIndex] = None  # Fallback (gdy ChromaDB niedostępne)
+        self._positions: Dict[str, int] = {}  # id precedensu -> pozycja w lokalnym indeksie
+        self.version = 0  # Zwiększana przy każdej zmianie zawartości (unieważnia cache wyszukiwań)
+        # Niezapisane zmiany lokalnego indeksu - zapis przez flush()/close() lub przy zakończeniu procesu
+        self._pending = {'unsaved': False}
         
         if CHROMADB_AVAILABLE:
             try:
+                import chromadb
+                from chromadb.config import Settings
+                
                 # Utwórz klienta ChromaDB
                 self.client = chromadb.Client(Settings(
                     chroma_db_impl="duckdb+parquet",
@@ -43,54 +50,199 @@ class VectorDatabase:
                 )
                 
                 self.available = True
-                print(f"✅ Vector Database (ChromaDB) załadowana: {len(self.collection.get()['ids'])} dokumentów")
+                print(f"✅ Vector Database (ChromaDB) załadowana: {self.collection.count()} dokumentów")
             except Exception as e:
                 print(f"⚠️ Błąd inicjalizacji ChromaDB: {e}")
                 print("   Używam symulacji")
         else:
             print("⚠️ ChromaDB nie dostępne - używam symulacji")
-            self.precedents_cache = []
+        
+        if not self.available:
+            self._init_local_index()
+            self._register_flush()
+    
+    @property
+    def local_index_directory(self) -> str:
+        return os.path.join(self.persist_directory, "local_index")
+    
+    def _init_local_index(self):
+        """Lokalny indeks wektorowy NumPy - odczyt z dysku, jeśli istnieje"""
+        if os.path.exists(os.path.join(self.local_index_directory, "vectors.npy")):
+            try:
+                self.local_index = HashedVectorIndex.load(self.local_index_directory)
+                self._positions = {doc_id: position for position, doc_id in enumerate(self.local_index.ids)}
+                print(f"✅ Lokalny indeks wektorowy załadowany: {len(self.local_index)} dokumentów")
+                return
+            except Exception as e:
+                print(f"⚠️ Błąd odczytu lokalnego indeksu: {e}")
+        self.local_index = HashedVectorIndex()
+    
+    def _register_flush(self):
+        """Zapis niezapisanych zmian przy zwolnieniu obiektu lub zakończeniu procesu"""
+        weakref.finalize(self, _save_pending, self.local_index, self.local_index_directory, self._pending)
+    
+    @staticmethod
+    def content_hash(precedent: Dict[str, Any]) -> str:
+        """Hash treści precedensu (typ sprawy + streszczenie + treść)"""
+        text = f"{precedent.get('case_type', '')}\n{precedent.get('summary', '')}\n{precedent.get('content', '')}"
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
     
-    def add_precedent(self, precedent: Dict[str, Any]) -> bool:
-        """Dodanie precedensu do bazy"""
+    def add_precedent(self, precedent: Dict[str, Any], persist: bool = False) -> bool:
+        """
+        Dodanie precedensu do bazy
+        
+        Args:
+            persist: Natychmiastowy zapis lokalnego indeksu (domyślnie zapis odroczony - flush()),
+                     zapis po każdym dodaniu to pełny zapis indeksu, czyli O(n^2) I/O dla n dodań
+        
+        Returns:
+            True, jeśli precedens jest nowy albo zmienił treść
+        """
+        return self.add_precedents([precedent], persist=persist) == 1
+    
+    def precedent_id(self, precedent: Dict[str, Any], digest: Optional[str] = None) -> str:
+        """Identyfikator precedensu - pole 'id' albo hash treści"""
+        return precedent.get('id') or f"precedent_{(digest or self.content_hash(precedent))[:32]}"
+    
+    def add_precedents(self, precedents: Iterable[Dict[str, Any]], batch_size: int = 1000, persist: bool = True) -> int:
+        """
+        Wsadowe dodanie precedensów (idempotentny upsert po identyfikatorze)
+        
+        Oba backendy działają tak samo: ten sam id i ta sama treść (hash) - bez zmian,
+        ten sam id i nowa treść - podmiana, nowy id - dodanie.
+        
+        Args:
+            precedents: Precedensy do dodania
+            batch_size: Liczba dokumentów w jednym wywołaniu ChromaDB / indeksu lokalnego
+            persist: Zapis lokalnego indeksu na dysk po dodaniu (tryb bez ChromaDB);
+                     False - zapis odroczony do flush()/close()
+            
+        Returns:
+            Liczba precedensów nowych lub zmienionych
+        """
         if not self.available:
-            # Symulacja
-            self.precedents_cache.append(precedent)
-            return True
+            return self._add_local(precedents, batch_size, persist)
         
-        try:
-            # Przygotuj dane
-            doc_id = precedent.get('id', f"precedent_{datetime.now().timestamp()}")
-            text = f"{precedent.get('summary', '')} {precedent.get('content', '')}"
-            metadata = {
+        written = 0
+        ids, documents, metadatas = [], [], []
+        for precedent in precedents:
+            digest = self.content_hash(precedent)
+            ids.append(self.precedent_id(precedent, digest))
+            documents.append(f"{precedent.get('summary', '')} {precedent.get('content', '')}")
+            metadatas.append({
                 'case_type': precedent.get('case_type', ''),
                 'date': precedent.get('date', ''),
                 'source': precedent.get('source', ''),
-                'keywords': ','.join(precedent.get('keywords', []))
+                'keywords': ','.join(precedent.get('keywords', [])),
+                'content_hash': digest
+            })
+            if len(ids) >= batch_size:
+                written += self._upsert_batch(ids, documents, metadatas)
+                ids, documents, metadatas = [], [], []
+        
+        if ids:
+            written += self._upsert_batch(ids, documents, metadatas)
+        
+        if written:
+            self.version += 1
+        return written
+    
+    def _add_local(self, precedents: Iterable[Dict[str, Any]], batch_size: int, persist: bool) -> int:
+        """Upsert do lokalnego indeksu - podmiana na miejscu, nowe dokumenty paczkami"""
+        changed = 0
+        batch = []
+        batch_positions: Dict[str, int] = {}  # id -> pozycja w bieżącej paczce
+        for precedent in precedents:
+            digest = self.content_hash(precedent)
+            doc_id = self.precedent_id(precedent, digest)
+            text = f"{precedent.get('summary', '')} {precedent.get('content', '')}"
+            item = (doc_id, text, {**precedent, 'content_hash': digest})
+            
+            if doc_id in batch_positions:
+                if batch[batch_positions[doc_id]][2]['content_hash'] != digest:
+                    batch[batch_positions[doc_id]] = item  # Nowy dokument - liczony już raz
+                continue
+            position = self._positions.get(doc_id)
+            if position is not None:
+                if self.local_index.payloads[position].get('content_hash') != digest:
+                    self.local_index.replace(position, text, item[2])
+                    changed += 1
+                continue
+            
+            batch_positions[doc_id] = len(batch)
+            batch.append(item)
+            changed += 1
+            if len(batch) >= batch_size:
+                self._append_local(batch)
+                batch, batch_positions = [], {}
+        self._append_local(batch)
+        
+        if changed:
+            self.version += 1
+            if persist:
+                self.save_local_index()
+            else:
+                self._pending['unsaved'] = True
+        return changed
+    
+    def _append_local(self, batch: List[tuple]):
+        start = len(self.local_index)
+        self.local_index.add(batch)
+        for offset, (doc_id, _, _) in enumerate(batch):
+            self._positions[doc_id] = start + offset
+    
+    def _upsert_batch(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]) -> int:
+        """
+        Zapis jednej paczki do kolekcji (upsert - ponowny import nie duplikuje)
+        
+        Returns:
+            Liczba dokumentów nowych lub zmienionych (niezmienione pomijane - bez ponownego embeddingu)
+        """
+        try:
+            # Ten sam identyfikator w jednej paczce - zostaje ostatnia wersja
+            unique = {doc_id: index for index, doc_id in enumerate(ids)}
+            indices = sorted(unique.values())
+            
+            # Hash treści zapisanych dokumentów - jedno zapytanie na paczkę
+            existing = self.collection.get(ids=[ids[i] for i in indices], include=['metadatas'])
+            stored = {
+                doc_id: (metadata or {}).get('content_hash')
+                for doc_id, metadata in zip(existing.get('ids', []), existing.get('metadatas') or [])
             }
+            indices = [i for i in indices if stored.get(ids[i]) != metadatas[i]['content_hash']]
+            if not indices:
+                return 0
             
-            # Dodaj do kolekcji
-            self.collection.add(
-                documents=[text],
-                ids=[doc_id],
-                metadatas=[metadata]
+            write = getattr(self.collection, 'upsert', None) or self.collection.add
+            write(
+                documents=[documents[i] for i in indices],
+                ids=[ids[i] for i in indices],
+                metadatas=[metadatas[i] for i in indices]
             )
-            
-            return True
+            return len(indices)
         except Exception as e:
-            print(f"⚠️ Błąd dodawania precedensu: {e}")
-            return False
+            print(f"⚠️ Błąd dodawania precedensów: {e}")
+            return 0
     
     def search_precedents(self, query: str, case_type: Optional[str] = None, n_results: int = 5) -> List[Dict[str, Any]]:
         """Wyszukiwanie precedensów przez podobieństwo semantyczne"""
         if not self.available:
-            # Symulacja - zwróć cache lub puste
-            results = []
-            query_lower = query.lower()
-            for prec in self.precedents_cache:
-                if query_lower in str(prec).lower():
-                    results.append(prec)
-            return results[:n_results]
+            # Lokalny indeks - ranking cosinusowy jednym iloczynem macierzowym
+            precedents = []
+            for position, score in self.local_index.search(query, k=n_results, case_type=case_type):
+                payload = self.local_index.payloads[position]
+                precedents.append({
+                    'id': self.local_index.ids[position],
+                    'summary': payload.get('summary', '')[:200],
+                    'relevance_score': score,
+                    'metadata': {
+                        'case_type': payload.get('case_type', ''),
+                        'date': payload.get('date', ''),
+                        'source': payload.get('source', ''),
+                        'keywords': ','.join(payload.get('keywords', []))
+                    }
+                })
+            return precedents
         
         try:
             # Filtry metadanych
@@ -125,8 +277,8 @@ class VectorDatabase:
         """Statystyki bazy"""
         if not self.available:
             return {
-                'total_documents': len(self.precedents_cache),
-                'status': 'simulation'
+                'total_documents': len(self.local_index),
+                'status': 'local_index'
             }
         
         try:
@@ -143,6 +295,25 @@ class VectorDatabase:
                 'error': str(e)
             }
     
+    def save_local_index(self):
+        """Zapis lokalnego indeksu wektorowego (np.save)"""
+        if self.local_index is None:
+            return
+        try:
+            self.local_index.save(self.local_index_directory)
+            self._pending['unsaved'] = False
+        except OSError as e:
+            print(f"⚠️ Błąd zapisu lokalnego indeksu: {e}")
+    
+    def flush(self):
+        """Zapis odroczonych zmian lokalnego indeksu (bez zapisu, jeśli nic się nie zmieniło)"""
+        if self._pending['unsaved']:
+            self.save_local_index()
+    
+    def close(self):
+        """Zapis odroczonych zmian przed zamknięciem"""
+        self.flush()
+    
     def load_sample_precedents(self):
         """Ładowanie przykładowych precedensów (dla demo)"""
         sample_precedents = [
@@ -175,8 +346,16 @@ class VectorDatabase:
             }
         ]
         
-        for precedent in sample_precedents:
-            self.add_precedent(precedent)
+        loaded = self.add_precedents(sample_precedents)
         
-        print(f"✅ Załadowano {len(sample_precedents)} przykładowych precedensów")
+        print(f"✅ Załadowano {loaded} przykładowych precedensów")
 
+
+def _save_pending(local_index: HashedVectorIndex, directory: str, pending: Dict[str, bool]):
+    """Zapis niezapisanego indeksu (weakref.finalize - bez referencji do VectorDatabase)"""
+    if pending['unsaved']:
+        try:
+            local_index.save(directory)
+            pending['unsaved'] = False
+        except OSError as e:
+            print(f"⚠️ Błąd zapisu lokalnego indeksu: {e}")
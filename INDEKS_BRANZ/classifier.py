@@ -11,15 +11,35 @@ Klasyfikuje branże do 5 kategorii:
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional
 from config import KATEGORIE_BRANZ
 
 
+# Kategoria nakładana na klasyfikację według indeksu (zakres indeksu z KATEGORIE_BRANZ)
+KATEGORIA_FINANSOWANIE = 'wymagajace_finansowania'
+
+
 class IndustryClassifier:
     """Klasa do klasyfikacji branż"""
     
-    def __init__(self):
-        self.kategorie = KATEGORIE_BRANZ
+    def __init__(self, kategorie: Optional[Dict[str, Dict]] = None,
+                 prog_zadluzenia: float = 1.2, prog_inwestycji: float = 15):
+        """
+        Args:
+            kategorie: Definicje kategorii z progami indeksu (domyślnie KATEGORIE_BRANZ z config)
+            prog_zadluzenia: Zadłużenie (D/E), powyżej którego branża wymaga finansowania
+            prog_inwestycji: Dynamika inwestycji, powyżej której branża wymaga finansowania
+        """
+        self.kategorie = kategorie if kategorie is not None else KATEGORIE_BRANZ
+        self.prog_zadluzenia = prog_zadluzenia
+        self.prog_inwestycji = prog_inwestycji
+        
+        # Kategorie podstawowe od najwyższego progu - pierwsza spełniona wygrywa (np.select)
+        self._progi = sorted(
+            ((nazwa, opis['indeks_min']) for nazwa, opis in self.kategorie.items()
+             if nazwa != KATEGORIA_FINANSOWANIE),
+            key=lambda item: item[1], reverse=True
+        )
     
     def classify_industries(self, df_with_index: pd.DataFrame) -> pd.DataFrame:
         """
@@ -34,34 +54,10 @@ class IndustryClassifier:
         print("\n[INFO] Klasyfikacja branz...")
         
         df = df_with_index.copy()
-        df['kategoria'] = None
-        df['kategoria_opis'] = None
-        
-        for idx, row in df.iterrows():
-            indeks = row.get('indeks_hama', 0)
-            
-            # Podstawowa klasyfikacja na podstawie indeksu
-            if indeks >= 70:
-                kategoria = 'wzrostowe'
-            elif indeks >= 50:
-                kategoria = 'stabilne'
-            elif indeks >= 30:
-                kategoria = 'ryzykowne'
-            else:
-                kategoria = 'kurczace_sie'
-            
-            # Dodatkowa logika: "Wymagające finansowania"
-            # Branże z potencjałem (średni indeks) ale wysokim zadłużeniem lub potrzebą inwestycji
-            if 40 <= indeks <= 70:
-                zadluzenie = row.get('zadluzenie', 0)
-                inwestycje = row.get('inwestycje', 0)
-                
-                # Jeśli wysokie zadłużenie LUB wysokie inwestycje = potrzeba kapitału
-                if zadluzenie > 1.2 or inwestycje > 15:
-                    kategoria = 'wymagajace_finansowania'
-            
-            df.at[idx, 'kategoria'] = kategoria
-            df.at[idx, 'kategoria_opis'] = self.kategorie[kategoria]['opis']
+        kategorie = pd.Series(self.assign_categories(df), index=df.index, dtype=object)
+        opisy = {nazwa: opis['opis'] for nazwa, opis in self.kategorie.items()}
+        df['kategoria'] = kategorie
+        df['kategoria_opis'] = kategorie.map(opisy).astype(object)
         
         # Statystyki klasyfikacji
         print("\n[STATS] Statystyki klasyfikacji:")
@@ -73,27 +69,68 @@ class IndustryClassifier:
         
         return df
     
+    def assign_categories(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Kategorie dla wszystkich branż naraz (bez kopiowania ramki i komunikatów) -
+        np. do szybkiej reklasyfikacji wariantów "co jeśli" z innymi progami
+        
+        Returns:
+            Tablica nazw kategorii w kolejności wierszy
+        """
+        indeks = self._column(df, 'indeks_hama')
+        
+        # Podstawowa klasyfikacja na podstawie indeksu (NaN - najniższa kategoria)
+        kategoria = np.select(
+            [indeks >= prog for _, prog in self._progi[:-1]],
+            [nazwa for nazwa, _ in self._progi[:-1]],
+            default=self._progi[-1][0]
+        ).astype(object)
+        
+        # Dodatkowa logika: "Wymagające finansowania"
+        # Branże z potencjałem (średni indeks) ale wysokim zadłużeniem lub potrzebą inwestycji
+        finansowanie = self.kategorie.get(KATEGORIA_FINANSOWANIE)
+        if finansowanie is not None:
+            potrzeba_kapitalu = (
+                (indeks >= finansowanie['indeks_min']) & (indeks <= finansowanie['indeks_max'])
+                & ((self._column(df, 'zadluzenie') > self.prog_zadluzenia)
+                   | (self._column(df, 'inwestycje') > self.prog_inwestycji))
+            )
+            kategoria[potrzeba_kapitalu] = KATEGORIA_FINANSOWANIE
+        
+        return kategoria
+    
+    @staticmethod
+    def _column(df: pd.DataFrame, name: str) -> np.ndarray:
+        """Kolumna liczbowa (brak kolumny = 0)"""
+        if name not in df.columns:
+            return np.zeros(len(df))
+        return df[name].to_numpy(dtype=float)
+    
     def get_category_summary(self, df_classified: pd.DataFrame) -> Dict[str, Dict]:
         """
-        Zwraca podsumowanie dla każdej kategorii
+        Zwraca podsumowanie dla każdej kategorii (jedno grupowanie)
         
         Returns:
             Dict z statystykami dla każdej kategorii
         """
+        grouped = df_classified.groupby('kategoria', sort=False)
+        stats = grouped['indeks_hama'].agg(['size', 'mean', 'min', 'max'])
+        positions = grouped.indices
+        records = df_classified[['pkd', 'nazwa', 'indeks_hama']].to_dict('records')
+        
         summary = {}
         
         for kategoria in self.kategorie.keys():
-            df_cat = df_classified[df_classified['kategoria'] == kategoria]
-            
-            if len(df_cat) == 0:
+            if kategoria not in stats.index:
                 continue
             
+            row = stats.loc[kategoria]
             summary[kategoria] = {
-                'liczba_branz': len(df_cat),
-                'sredni_indeks': df_cat['indeks_hama'].mean(),
-                'min_indeks': df_cat['indeks_hama'].min(),
-                'max_indeks': df_cat['indeks_hama'].max(),
-                'branze': df_cat[['pkd', 'nazwa', 'indeks_hama']].to_dict('records')
+                'liczba_branz': int(row['size']),
+                'sredni_indeks': row['mean'],
+                'min_indeks': row['min'],
+                'max_indeks': row['max'],
+                'branze': [records[i] for i in positions[kategoria]]
             }
         
         return summary
@@ -0,0 +1,219 @@
+"""
+⚡ Równoległe zbieranie danych źródłowych HAMA Diamond-Indeks Branż
+
+- Każde źródło w osobnym zadaniu - czas zbierania zbliża się do najwolniejszego źródła
+- Limiter token bucket zamiast stałych opóźnień między zapytaniami
+- Pula wątków per źródło dla zapytań per branża (np. Google Trends)
+- Timeout per źródło i częściowe niepowodzenia: błędne źródło = pusty DataFrame
+- Wątki-demony: źródło porzucone po timeoucie nie wstrzymuje zakończenia procesu
+"""
+
+import time
+import queue
+import threading
+import pandas as pd
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError, wait
+from typing import Dict, List, Optional, Callable, Any, Iterable
+
+
+class TokenBucket:
+    """Limiter zapytań (token bucket) bezpieczny wątkowo"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate: Tokeny na sekundę (średnia liczba zapytań/s)
+            capacity: Maksymalna liczba tokenów (dopuszczalna seria zapytań)
+        """
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate i capacity muszą być dodatnie")
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Pobranie tokenów - czeka, aż będą dostępne
+
+        Returns:
+            True albo False, jeśli nie udało się przed upływem timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait_time = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_time = min(wait_time, remaining)
+            time.sleep(wait_time)
+
+
+class SourceTimeout(Exception):
+    """Źródło nie zakończyło pobierania w wyznaczonym czasie"""
+
+
+class DaemonThreadPool:
+    """
+    Pula wątków-demonów o interfejsie submit/shutdown jak ThreadPoolExecutor
+
+    Wątki ThreadPoolExecutor są dołączane przy zakończeniu interpretera, więc zapytanie
+    porzucone po timeoucie wydłużałoby działanie procesu aż do swojego końca. Wątek-demon
+    jest przy zakończeniu procesu po prostu zatrzymywany (porzucone zapytanie nie kończy się).
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "collect"):
+        self.max_workers = max(1, max_workers)
+        self.thread_name_prefix = thread_name_prefix
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._threads: List[threading.Thread] = []
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        future: Future = Future()
+        self._queue.put((future, func, args, kwargs))
+        if len(self._threads) < self.max_workers:
+            thread = threading.Thread(
+                target=self._worker, name=f"{self.thread_name_prefix}-{len(self._threads)}", daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+        return future
+
+    def shutdown(self, cancel_futures: bool = True):
+        """Zakończenie wątków po bieżących zadaniach (bez czekania); zadania w kolejce anulowane"""
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+        for _ in self._threads:
+            self._queue.put(None)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            future, func, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+
+def map_items(func: Callable[[Any], Any], items: Iterable[Any], workers: int = 1,
+              limiter: Optional[TokenBucket] = None,
+              deadline: Optional[float] = None) -> List[Any]:
+    """
+    Zapytania per element (np. per branża) w puli wątków źródła, z limitem zapytań
+
+    Args:
+        func: Funkcja wywoływana dla każdego elementu
+        items: Elementy (kolejność wyników jak kolejność elementów)
+        workers: Liczba wątków puli źródła
+        limiter: Limiter zapytań (token pobierany przed każdym wywołaniem)
+        deadline: Chwila (time.monotonic) po której pozostałe zapytania są porzucane
+
+    Raises:
+        SourceTimeout: gdy deadline minie przed zakończeniem wszystkich zapytań
+    """
+    def call(item):
+        if limiter is not None:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not limiter.acquire(timeout=timeout):
+                raise SourceTimeout("Przekroczony czas oczekiwania na limit zapytań")
+        return func(item)
+
+    items = list(items)
+    if workers <= 1:
+        results = []
+        for item in items:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise SourceTimeout("Przekroczony czas źródła")
+            results.append(call(item))
+        return results
+
+    executor = DaemonThreadPool(workers, thread_name_prefix="collect-item")
+    try:
+        futures = [executor.submit(call, item) for item in items]
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        _, pending = wait(futures, timeout=timeout)
+        if pending:
+            raise SourceTimeout("Przekroczony czas źródła")
+        return [future.result() for future in futures]
+    finally:
+        # Bez czekania na zapytania porzucone po timeoucie
+        executor.shutdown(cancel_futures=True)
+
+
+def collect_sources(sources: Dict[str, Callable[[], pd.DataFrame]],
+                    timeouts: Optional[Dict[str, float]] = None,
+                    max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Równoległe pobranie wszystkich źródeł
+
+    Args:
+        sources: {nazwa: funkcja zwracająca DataFrame} (w testach - lokalne atrapy)
+        timeouts: Limit czasu per źródło w sekundach od startu zbierania (brak = bez limitu);
+            wątek przerwanego źródła (demon) nie jest zabijany - jego wynik jest porzucany,
+            a proces może się zakończyć bez czekania na niego
+        max_workers: Liczba źródeł pobieranych naraz (domyślnie wszystkie)
+
+    Returns:
+        Dict z kluczami:
+            data: {nazwa: DataFrame} - dla nieudanych źródeł pusty DataFrame
+            errors: {nazwa: opis błędu}
+            durations: {nazwa: czas pobierania w sekundach (dla timeoutu - do przerwania)}
+    """
+    timeouts = timeouts or {}
+    data: Dict[str, pd.DataFrame] = {}
+    errors: Dict[str, str] = {}
+    durations: Dict[str, float] = {}
+    if not sources:
+        return {'data': data, 'errors': errors, 'durations': durations}
+
+    def run(name: str, func: Callable[[], pd.DataFrame]):
+        start = time.monotonic()
+        try:
+            return func()
+        finally:
+            durations.setdefault(name, time.monotonic() - start)
+
+    executor = DaemonThreadPool(max_workers or len(sources), thread_name_prefix="collect-source")
+    try:
+        started = time.monotonic()
+        futures = {name: executor.submit(run, name, func) for name, func in sources.items()}
+        for name, future in futures.items():
+            timeout = timeouts.get(name)
+            remaining = None if timeout is None else max(0.0, started + timeout - time.monotonic())
+            try:
+                result = future.result(timeout=remaining)
+                data[name] = result if isinstance(result, pd.DataFrame) else pd.DataFrame(result)
+            except FutureTimeoutError:
+                future.cancel()
+                errors[name] = f"przekroczono limit czasu ({timeout} s)"
+            except Exception as e:
+                errors[name] = f"{type(e).__name__}: {e}"
+            if name in errors:
+                print(f"  [WARNING] Zrodlo {name} niedostepne - {errors[name]}")
+                data[name] = pd.DataFrame()
+                durations.setdefault(name, time.monotonic() - started)
+    finally:
+        # Źródło po timeoucie nie blokuje wyników pozostałych ani zakończenia procesu
+        executor.shutdown(cancel_futures=True)
+
+    return {'data': data, 'errors': errors, 'durations': durations}
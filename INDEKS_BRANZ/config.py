@@ -17,6 +17,9 @@ OUTPUTS_DIR = BASE_DIR / "outputs"
 REPORTS_DIR = OUTPUTS_DIR / "raporty"
 CHARTS_DIR = OUTPUTS_DIR / "wykresy"
 
+# Format magazynu surowych danych (raw_store): parquet, feather (wymagają pyarrow) lub csv
+RAW_DATA_FORMAT = "parquet"
+
 # Tworzenie katalogów
 for dir_path in [RAW_DATA_DIR, PROCESSED_DATA_DIR, REPORTS_DIR, CHARTS_DIR]:
     dir_path.mkdir(parents=True, exist_ok=True)
@@ -183,6 +186,19 @@ ZRODLA_DANYCH = {
     }
 }
 
+# Równoległe zbieranie danych (klucze jak w DataCollector.collect_all_data)
+ZBIERANIE_CONFIG = {
+    "max_workers": 4,  # Źródła pobierane równolegle
+    # timeout - limit czasu źródła (s); workers/rate_limit/burst - zapytania per branża (tylko Google Trends)
+    "zrodla": {
+        "gus": {"timeout": 120},
+        "krs": {"timeout": 120},
+        # Google Trends: limit zapytań zamiast stałego sleep(1) po każdej branży
+        "trends": {"timeout": 300, "workers": 2, "rate_limit": 1.0, "burst": 1},
+        "npk": {"timeout": 60}
+    }
+}
+
 # ============================================================================
 # PARAMETRY HAMA DIAMOND
 # ============================================================================
@@ -11,11 +11,12 @@ Pobiera dane z różnych źródeł:
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Callable
 import requests
 from datetime import datetime, timedelta
 import time
 import json
+import threading
 
 try:
     from pytrends.request import TrendReq
@@ -24,16 +25,36 @@ except ImportError:
     PTRENDS_AVAILABLE = False
     print("[WARNING] pytrends nie jest zainstalowany - Google Trends bedzie niedostepne")
 
-from config import RAW_DATA_DIR, BRANZE_PKD, ZRODLA_DANYCH
+from config import RAW_DATA_DIR, RAW_DATA_FORMAT, BRANZE_PKD, ZRODLA_DANYCH, ZBIERANIE_CONFIG
+from raw_store import RawDataStore
+from collection import TokenBucket, collect_sources, map_items
 
 
 class DataCollector:
     """Klasa do pobierania danych z różnych źródeł"""
     
-    def __init__(self):
+    def __init__(self, zbieranie_config: Optional[Dict] = None):
+        """
+        Args:
+            zbieranie_config: Parametry równoległego zbierania (domyślnie ZBIERANIE_CONFIG z config)
+        """
         self.raw_data_dir = RAW_DATA_DIR
+        # Snapshoty partycjonowane po źródle i dacie + manifest najnowszych wersji
+        self.store = RawDataStore(self.raw_data_dir, RAW_DATA_FORMAT)
         self.branze = BRANZE_PKD
         self.pytrends = None
+        self.zbieranie_config = zbieranie_config if zbieranie_config is not None else ZBIERANIE_CONFIG
+        self.collection_errors: Dict[str, str] = {}
+        self.collection_durations: Dict[str, float] = {}
+        
+        # Limitery zapytań per źródło - współdzielone przez wątki puli źródła
+        self.limiters = {
+            name: TokenBucket(params['rate_limit'], params.get('burst', 1))
+            for name, params in self.zbieranie_config.get('zrodla', {}).items()
+            if params.get('rate_limit')
+        }
+        # TrendReq trzyma stan zapytania (build_payload) - osobny klient na wątek
+        self._trends_local = threading.local()
         
         if PTRENDS_AVAILABLE:
             try:
@@ -41,43 +62,60 @@ class DataCollector:
             except Exception as e:
                 print(f"⚠️ Nie udało się zainicjalizować pytrends: {e}")
     
-    def collect_all_data(self) -> Dict[str, pd.DataFrame]:
+    def collect_all_data(self, sources: Optional[Dict[str, Callable[[], pd.DataFrame]]] = None,
+                         save: bool = True) -> Dict[str, pd.DataFrame]:
         """
-        Pobiera wszystkie dostępne dane
+        Pobiera wszystkie dostępne dane - źródła równolegle
+        
+        Czas zbierania zbliża się do najwolniejszego źródła zamiast sumy wszystkich.
+        Źródło z błędem lub po przekroczeniu limitu czasu daje pusty DataFrame
+        (szczegóły w self.collection_errors), pozostałe wyniki są zachowane.
+        
+        Args:
+            sources: {nazwa: funkcja zwracająca DataFrame} (domyślnie GUS, KRS, Trends, NPK)
+            save: Czy zapisać surowe dane w magazynie
         
         Returns:
             Dict z DataFrame dla każdego źródła
         """
         print("\n[INFO] Rozpoczynam zbieranie danych...")
         
-        data = {}
+        if sources is None:
+            sources = self._default_sources()
         
-        # 1. Dane GUS (symulowane - w produkcji podpinamy API lub pliki CSV)
-        print("  [GUS] Pobieranie danych GUS...")
-        data['gus'] = self._collect_gus_data()
+        params = self.zbieranie_config.get('zrodla', {})
+        result = collect_sources(
+            sources,
+            timeouts={name: params[name]['timeout'] for name in sources if params.get(name, {}).get('timeout')},
+            max_workers=self.zbieranie_config.get('max_workers')
+        )
+        data = result['data']
+        self.collection_errors = result['errors']
+        self.collection_durations = result['durations']
         
-        # 2. Dane KRS (symulowane)
-        print("  [KRS] Pobieranie danych KRS...")
-        data['krs'] = self._collect_krs_data()
-        
-        # 3. Google Trends
-        if self.pytrends:
-            print("  [INFO] Pobieranie Google Trends...")
-            data['trends'] = self._collect_google_trends()
-        else:
-            print("  [WARNING] Google Trends pominiete (brak pytrends)")
-            data['trends'] = pd.DataFrame()
-        
-        # 4. Nastroje konsumenckie (NBP)
-        print("  [NBP] Pobieranie nastrojow konsumenckich...")
-        data['npk'] = self._collect_npk_data()
+        for name, df in data.items():
+            status = "[WARNING]" if name in self.collection_errors else "[OK]"
+            print(f"    {status} {name}: {len(df)} rekordow ({self.collection_durations.get(name, 0.0):.2f} s)")
         
         # Zapis surowych danych
-        self._save_raw_data(data)
+        if save:
+            self._save_raw_data(data)
         
         print("[OK] Zbieranie danych zakonczone\n")
         return data
     
+    def _default_sources(self) -> Dict[str, Callable[[], pd.DataFrame]]:
+        """Kolektory źródeł w kolejności wyników"""
+        print("  [INFO] Pobieranie: GUS, KRS, Google Trends, NBP (rownolegle)")
+        if not self.pytrends:
+            print("  [WARNING] Google Trends pominiete (brak pytrends)")
+        return {
+            'gus': self._collect_gus_data,      # symulowane - w produkcji API lub pliki CSV
+            'krs': self._collect_krs_data,      # symulowane
+            'trends': self._collect_google_trends if self.pytrends else pd.DataFrame,
+            'npk': self._collect_npk_data,      # nastroje konsumenckie (NBP)
+        }
+    
     def _collect_gus_data(self) -> pd.DataFrame:
         """
         Pobiera dane z GUS (stat.gov.pl)
@@ -142,46 +180,58 @@ class DataCollector:
         if not self.pytrends:
             return pd.DataFrame()
         
-        branze_list = list(self.branze.keys())
-        data = []
+        params = self.zbieranie_config.get('zrodla', {}).get('trends', {})
+        timeout = params.get('timeout')
+        deadline = time.monotonic() + timeout if timeout else None
         
-        # Google Trends ma limity - pobieramy pojedynczo z opóźnieniami
-        for pkd in branze_list:
-            nazwa = self.branze[pkd]['nazwa']
-            
-            try:
-                # Pobierz trendy dla nazwy branży
-                keywords = [nazwa]
-                self.pytrends.build_payload(keywords, cat=0, timeframe='today 12-m', geo='PL')
-                
-                trends_data = self.pytrends.interest_over_time()
-                
-                if not trends_data.empty:
-                    avg_trend = trends_data[keywords[0]].mean()
-                else:
-                    avg_trend = np.random.uniform(20, 80)  # Fallback
-                
-                data.append({
-                    'pkd': pkd,
-                    'nazwa': nazwa,
-                    'trend_wyszukiwan': avg_trend
-                })
-                
-                # Opóźnienie aby uniknąć rate limitów
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"    [WARNING] Blad dla {nazwa}: {e}")
-                # Fallback - losowa wartość
-                data.append({
-                    'pkd': pkd,
-                    'nazwa': nazwa,
-                    'trend_wyszukiwan': np.random.uniform(20, 80)
-                })
+        # Google Trends ma limity - tempo zapytań wyznacza limiter (token bucket)
+        data = map_items(
+            self._fetch_trend, list(self.branze.keys()),
+            workers=params.get('workers', 1),
+            limiter=self.limiters.get('trends'),
+            deadline=deadline
+        )
         
         df = pd.DataFrame(data)
         return df
     
+    def _fetch_trend(self, pkd: str) -> Dict:
+        """Średni trend wyszukiwań dla nazwy branży (jedno zapytanie)"""
+        nazwa = self.branze[pkd]['nazwa']
+        
+        try:
+            client = self._trends_client()
+            
+            # Pobierz trendy dla nazwy branży
+            keywords = [nazwa]
+            client.build_payload(keywords, cat=0, timeframe='today 12-m', geo='PL')
+            
+            trends_data = client.interest_over_time()
+            
+            if not trends_data.empty:
+                avg_trend = trends_data[keywords[0]].mean()
+            else:
+                avg_trend = np.random.uniform(20, 80)  # Fallback
+            
+        except Exception as e:
+            print(f"    [WARNING] Blad dla {nazwa}: {e}")
+            # Fallback - losowa wartość
+            avg_trend = np.random.uniform(20, 80)
+        
+        return {
+            'pkd': pkd,
+            'nazwa': nazwa,
+            'trend_wyszukiwan': avg_trend
+        }
+    
+    def _trends_client(self):
+        """Klient pytrends bieżącego wątku puli Google Trends"""
+        client = getattr(self._trends_local, 'client', None)
+        if client is None:
+            client = TrendReq(hl='pl-PL', tz=360)
+            self._trends_local.client = client
+        return client
+    
     def _collect_npk_data(self) -> pd.DataFrame:
         """
         Pobiera dane o nastrojach konsumenckich (NBP)
@@ -214,32 +264,27 @@ class DataCollector:
         return df
     
     def _save_raw_data(self, data: Dict[str, pd.DataFrame]):
-        """Zapisuje surowe dane do plików CSV"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        """Zapisuje surowe dane jako snapshoty magazynu (jedna data pobrania dla wszystkich źródeł)"""
+        collected_at = datetime.now()
         
         for source_name, df in data.items():
             if not df.empty:
-                filepath = self.raw_data_dir / f"{source_name}_{timestamp}.csv"
-                df.to_csv(filepath, index=False, encoding='utf-8-sig')
-                print(f"    [OK] Zapisano: {filepath.name}")
+                entry = self.store.save(source_name, df, collected_at=collected_at)
+                print(f"    [OK] Zapisano: {entry['path']}")
     
-    def load_raw_data(self, source: str) -> Optional[pd.DataFrame]:
+    def load_raw_data(self, source: str, columns: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
         """
         Ładuje ostatnie surowe dane dla danego źródła
         
         Args:
             source: nazwa źródła (gus, krs, trends, npk)
+            columns: wczytywane kolumny (None = wszystkie)
         
         Returns:
             DataFrame lub None
         """
-        files = list(self.raw_data_dir.glob(f"{source}_*.csv"))
-        if not files:
-            return None
-        
-        # Najnowszy plik
-        latest_file = max(files, key=lambda p: p.stat().st_mtime)
-        return pd.read_csv(latest_file, encoding='utf-8-sig')
+        # Najnowszy snapshot z manifestu - bez skanowania katalogu (starsze pliki CSV jako fallback)
+        return self.store.load(source, columns=columns)
 
 
 if __name__ == "__main__":
@@ -10,7 +10,7 @@ Wykorzystuje HAMA Diamond do:
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Tuple, Optional
 from pathlib import Path
 import sys
 
@@ -32,6 +32,30 @@ else:
     print("[WARNING] HAMA Diamond Core nie znaleziony - uzywam uproszczonego silnika")
 
 from config import HAMA_CONFIG, WSKAZNIKI_WAGI
+from indicators import INDICATOR_COLUMNS
+
+# Wskaźniki odwracane przy normalizacji (niższe = lepsze)
+INVERTED_INDICATORS = ['zadluzenie', 'szkodowosc']
+
+
+def _row_quantile(ordered: np.ndarray, counts: np.ndarray, q: float, median: bool = False) -> np.ndarray:
+    """
+    Kwantyl (interpolacja liniowa jak numpy/pandas) każdego wiersza posortowanej macierzy
+    z NaN na końcu; median=True - mediana jako średnia dwóch środkowych wartości
+    """
+    rows = np.arange(ordered.shape[0])
+    last = np.maximum(counts - 1, 0)
+    position = q * last
+    lower = np.floor(position).astype(int)
+    upper = np.minimum(lower + 1, last)
+    a = ordered[rows, lower]
+    b = ordered[rows, upper]
+    if median:
+        return np.where(lower == position, a, (a + b) / 2)
+    t = position - lower
+    diff = b - a
+    # Ten sam wzór co numpy (_lerp) - wynik identyczny z Series.quantile
+    return np.where(t >= 0.5, b - diff * (1 - t), a + diff * t)
 
 
 class HAMADiamondScoringEngine:
@@ -101,82 +125,87 @@ class HAMADiamondScoringEngine:
         
         Metody:
         - min_max: (x - min) / (max - min)
-        - z_score: standaryzacja, potem min_max
+        - z_score: standaryzacja, potem sigmoid
         - robust: używa mediany i IQR
+        
+        Wszystkie wskaźniki naraz - macierz wskaźnik x branża, statystyki liczone
+        po wierszach z pominięciem NaN
         """
         method = self.config['normalizacja']['metoda']
         df_norm = df.copy()
         
-        # Lista wskaźników do normalizacji
-        indicator_cols = [
-            'dynamika_przychodow',
-            'rentownosc',
-            'zadluzenie',  # Odwrócone (niższe = lepsze)
-            'szkodowosc',  # Odwrócone
-            'dynamika_eksportu',
-            'inwestycje',
-            'nastroje_konsumenckie',
-            'trendy_wyszukiwan',
-            'nowe_firmy',
-            'produktywnosc'
-        ]
+        indicator_cols = [col for col in INDICATOR_COLUMNS if col in df_norm.columns]
+        if not indicator_cols:
+            return df_norm
         
-        for col in indicator_cols:
-            if col not in df_norm.columns:
-                continue
-            
-            # Pomiń NaN
-            values = df_norm[col].dropna()
-            if len(values) == 0:
-                continue
-            
+        matrix = np.ascontiguousarray(df_norm[indicator_cols].to_numpy(dtype=float).T)
+        valid = ~np.isnan(matrix)
+        counts = valid.sum(axis=1)
+        
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
             if method == 'min_max':
-                min_val = values.min()
-                max_val = values.max()
-                if max_val != min_val:
-                    df_norm[f'{col}_norm'] = (df_norm[col] - min_val) / (max_val - min_val)
-                else:
-                    df_norm[f'{col}_norm'] = 0.5
-            
+                normalized = self._min_max_rows(matrix, valid)
             elif method == 'z_score':
-                mean_val = values.mean()
-                std_val = values.std()
-                if std_val > 0:
-                    z_scores = (df_norm[col] - mean_val) / std_val
-                    # Przekształć z-score na 0-1 (używając sigmoid)
-                    df_norm[f'{col}_norm'] = 1 / (1 + np.exp(-z_scores))
-                else:
-                    df_norm[f'{col}_norm'] = 0.5
-            
+                normalized = self._z_score_rows(matrix, valid, counts)
             elif method == 'robust':
-                median_val = values.median()
-                q75 = values.quantile(0.75)
-                q25 = values.quantile(0.25)
-                iqr = q75 - q25
-                if iqr > 0:
-                    df_norm[f'{col}_norm'] = (df_norm[col] - median_val) / iqr
-                    # Clip do 0-1
-                    df_norm[f'{col}_norm'] = np.clip(df_norm[f'{col}_norm'], -3, 3)
-                    df_norm[f'{col}_norm'] = (df_norm[f'{col}_norm'] + 3) / 6
-                else:
-                    df_norm[f'{col}_norm'] = 0.5
-            
-            # Odwróć wskaźniki, gdzie niższe = lepsze
-            if col in ['zadluzenie', 'szkodowosc']:
-                df_norm[f'{col}_norm'] = 1 - df_norm[f'{col}_norm']
-            
-            # Clip do zakresu
-            if self.config['normalizacja']['clip']:
-                clip_min = self.config['normalizacja']['clip_min']
-                clip_max = self.config['normalizacja']['clip_max']
-                df_norm[f'{col}_norm'] = np.clip(
-                    df_norm[f'{col}_norm'],
-                    clip_min,
-                    clip_max
-                )
+                normalized = self._robust_rows(matrix, counts)
+            else:
+                raise ValueError(f"Nieznana metoda normalizacji: {method}")
+        
+        # Odwróć wskaźniki, gdzie niższe = lepsze
+        inverted = np.isin(indicator_cols, INVERTED_INDICATORS)
+        normalized[inverted] = 1 - normalized[inverted]
+        
+        # Clip do zakresu
+        if self.config['normalizacja']['clip']:
+            normalized = np.clip(
+                normalized,
+                self.config['normalizacja']['clip_min'],
+                self.config['normalizacja']['clip_max']
+            )
+        
+        # Wskaźniki bez żadnej wartości pomijane (brak kolumny _norm)
+        for i, col in enumerate(indicator_cols):
+            if counts[i] > 0:
+                df_norm[f'{col}_norm'] = normalized[i]
         
         return df_norm
     
+    @staticmethod
+    def _min_max_rows(matrix: np.ndarray, valid: np.ndarray) -> np.ndarray:
+        """(x - min) / (max - min) w każdym wierszu; wiersz stały = 0.5"""
+        min_val = np.where(valid, matrix, np.inf).min(axis=1)[:, None]
+        max_val = np.where(valid, matrix, -np.inf).max(axis=1)[:, None]
+        normalized = (matrix - min_val) / (max_val - min_val)
+        normalized[(max_val == min_val)[:, 0]] = 0.5
+        return normalized
+    
+    @staticmethod
+    def _z_score_rows(matrix: np.ndarray, valid: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """Sigmoid z-score (odchylenie z próby, ddof=1) w każdym wierszu; brak rozrzutu = 0.5"""
+        mean_val = (np.where(valid, matrix, 0.0).sum(axis=1) / counts)[:, None]
+        squares = np.where(valid, (mean_val - matrix) ** 2, 0.0)
+        std_val = np.sqrt(squares.sum(axis=1) / (counts - 1))[:, None]
+        z_scores = (matrix - mean_val) / std_val
+        # Przekształć z-score na 0-1 (używając sigmoid)
+        normalized = 1 / (1 + np.exp(-z_scores))
+        # Wiersz stały wprost z min == max - błąd zaokrąglenia średniej daje odchylenie ~1e-16
+        constant = np.where(valid, matrix, np.inf).min(axis=1) == np.where(valid, matrix, -np.inf).max(axis=1)
+        normalized[~(std_val > 0)[:, 0] | constant] = 0.5
+        return normalized
+    
+    @staticmethod
+    def _robust_rows(matrix: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """(x - mediana) / IQR przycięte do [-3, 3] i przeskalowane do 0-1; IQR = 0 -> 0.5"""
+        # Sortowanie wierszy - NaN na końcu, wartości na pozycjach 0..count-1
+        ordered = np.sort(matrix, axis=1)
+        median_val = _row_quantile(ordered, counts, 0.5, median=True)[:, None]
+        iqr = (_row_quantile(ordered, counts, 0.75) - _row_quantile(ordered, counts, 0.25))[:, None]
+        normalized = np.clip((matrix - median_val) / iqr, -3, 3)
+        normalized = (normalized + 3) / 6
+        normalized[~(iqr > 0)[:, 0]] = 0.5
+        return normalized
+    
     def _calculate_dynamic_weights(self, df_normalized: pd.DataFrame) -> Dict[str, float]:
         """
         ETAP 3: Dynamiczne ważenie wskaźników
@@ -248,53 +277,38 @@ class HAMADiamondScoringEngine:
             if base_name in weights:
                 indicator_mapping[base_name] = col
         
-        # Oblicz indeks dla każdej branży
-        indices = []
+        # Macierz wskaźnik x branża i wagi wskaźników (kolumna)
+        values = df_normalized[list(indicator_mapping.values())].to_numpy(dtype=float).T
+        available = ~np.isnan(values)
+        base_w = np.array([weights[name] for name in indicator_mapping], dtype=float)[:, None]
         
-        for idx, row in df_normalized.iterrows():
-            values = []
-            w = []
-            
-            for indicator_name, col_name in indicator_mapping.items():
-                if col_name in df_normalized.columns:
-                    value = row[col_name]
-                    if not pd.isna(value):
-                        values.append(value)
-                        w.append(weights[indicator_name])
-            
-            if len(values) == 0:
-                indices.append(0.0)
-                continue
-            
-            # Normalizuj wagi dla dostępnych wskaźników
-            total_w = sum(w)
-            if total_w > 0:
-                w = [wi / total_w for wi in w]
-            
-            # Agregacja
-            if method == 'weighted_sum':
-                index = sum(v * w[i] for i, v in enumerate(values))
+        # Wagi dostępnych wskaźników znormalizowane per branża
+        w = np.where(available, base_w, 0.0)
+        total_w = w.sum(axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            w = np.where(total_w > 0, w / total_w, w)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weighted_sum = np.where(available, values * w, 0.0).sum(axis=0)
             
-            elif method == 'geometric_mean':
-                # Średnia geometryczna ważona
-                log_values = [np.log(max(v, 0.001)) for v in values]  # Unikaj log(0)
-                log_index = sum(log_v * w[i] for i, log_v in enumerate(log_values))
-                index = np.exp(log_index)
+            if method == 'geometric_mean':
+                # Średnia geometryczna ważona (max 0.001 - unikaj log(0))
+                log_values = np.log(np.maximum(np.where(available, values, 1.0), 0.001))
+                index = np.exp(np.where(available, log_values * w, 0.0).sum(axis=0))
             
             elif method == 'harmonic_mean':
-                # Średnia harmoniczna ważona
-                if all(v > 0 for v in values):
-                    inv_values = [w[i] / v for i, v in enumerate(values)]
-                    index = sum(w) / sum(inv_values) if sum(inv_values) > 0 else 0.0
-                else:
-                    index = sum(v * w[i] for i, v in enumerate(values))  # Fallback
+                # Średnia harmoniczna ważona - tylko gdy wszystkie wartości > 0
+                all_positive = np.where(available, values > 0, True).all(axis=0)
+                inv_sum = np.where(available, w / values, 0.0).sum(axis=0)
+                harmonic = np.where(inv_sum > 0, w.sum(axis=0) / inv_sum, 0.0)
+                index = np.where(all_positive, harmonic, weighted_sum)  # Fallback: suma ważona
             
             else:
-                # Domyślnie: weighted_sum
-                index = sum(v * w[i] for i, v in enumerate(values))
-            
-            # Skaluj do 0-100
-            indices.append(index * 100)
+                # weighted_sum (domyślnie)
+                index = weighted_sum
+        
+        # Skaluj do 0-100; branże bez wskaźników = 0
+        indices = np.where(available.any(axis=0), index * 100, 0.0)
         
         df_result['indeks_hama'] = indices
         
@@ -0,0 +1,121 @@
+"""
+📐 Referencyjna (iteracyjna) implementacja normalizacji i agregacji HAMA Diamond
+
+Wersja sprzed wektoryzacji HAMADiamondScoringEngine - kolumna po kolumnie
+i iterrows po branżach. Używana wyłącznie w testach równoważności
+(test_hama_scoring.py), nie w produkcyjnym liczeniu indeksu.
+"""
+
+import pandas as pd
+import numpy as np
+from typing import Dict
+
+from indicators import INDICATOR_COLUMNS
+
+
+def normalize_indicators(df: pd.DataFrame, config: Dict) -> pd.DataFrame:
+    """Normalizacja wskaźników do skali 0-1 (min_max, z_score, robust)"""
+    method = config['normalizacja']['metoda']
+    df_norm = df.copy()
+
+    for col in INDICATOR_COLUMNS:
+        if col not in df_norm.columns:
+            continue
+
+        # Pomiń NaN
+        values = df_norm[col].dropna()
+        if len(values) == 0:
+            continue
+
+        if method == 'min_max':
+            min_val = values.min()
+            max_val = values.max()
+            if max_val != min_val:
+                df_norm[f'{col}_norm'] = (df_norm[col] - min_val) / (max_val - min_val)
+            else:
+                df_norm[f'{col}_norm'] = 0.5
+
+        elif method == 'z_score':
+            mean_val = values.mean()
+            std_val = values.std()
+            if std_val > 0:
+                z_scores = (df_norm[col] - mean_val) / std_val
+                df_norm[f'{col}_norm'] = 1 / (1 + np.exp(-z_scores))
+            else:
+                df_norm[f'{col}_norm'] = 0.5
+
+        elif method == 'robust':
+            median_val = values.median()
+            iqr = values.quantile(0.75) - values.quantile(0.25)
+            if iqr > 0:
+                df_norm[f'{col}_norm'] = (df_norm[col] - median_val) / iqr
+                df_norm[f'{col}_norm'] = np.clip(df_norm[f'{col}_norm'], -3, 3)
+                df_norm[f'{col}_norm'] = (df_norm[f'{col}_norm'] + 3) / 6
+            else:
+                df_norm[f'{col}_norm'] = 0.5
+
+        # Odwróć wskaźniki, gdzie niższe = lepsze
+        if col in ['zadluzenie', 'szkodowosc']:
+            df_norm[f'{col}_norm'] = 1 - df_norm[f'{col}_norm']
+
+        if config['normalizacja']['clip']:
+            df_norm[f'{col}_norm'] = np.clip(
+                df_norm[f'{col}_norm'],
+                config['normalizacja']['clip_min'],
+                config['normalizacja']['clip_max']
+            )
+
+    return df_norm
+
+
+def aggregate_to_index(df_normalized: pd.DataFrame, weights: Dict[str, float], config: Dict) -> pd.DataFrame:
+    """Agregacja znormalizowanych wskaźników (weighted_sum, geometric_mean, harmonic_mean)"""
+    method = config['agregacja']['metoda']
+    df_result = df_normalized.copy()
+
+    indicator_mapping = {}
+    for col in df_normalized.columns:
+        if col.endswith('_norm'):
+            base_name = col.replace('_norm', '')
+            if base_name in weights:
+                indicator_mapping[base_name] = col
+
+    indices = []
+    for _, row in df_normalized.iterrows():
+        values = []
+        w = []
+        for indicator_name, col_name in indicator_mapping.items():
+            value = row[col_name]
+            if not pd.isna(value):
+                values.append(value)
+                w.append(weights[indicator_name])
+
+        if len(values) == 0:
+            indices.append(0.0)
+            continue
+
+        # Normalizuj wagi dla dostępnych wskaźników
+        total_w = sum(w)
+        if total_w > 0:
+            w = [wi / total_w for wi in w]
+
+        if method == 'geometric_mean':
+            log_values = [np.log(max(v, 0.001)) for v in values]
+            index = np.exp(sum(log_v * w[i] for i, log_v in enumerate(log_values)))
+        elif method == 'harmonic_mean':
+            if all(v > 0 for v in values):
+                inv_values = [w[i] / v for i, v in enumerate(values)]
+                index = sum(w) / sum(inv_values) if sum(inv_values) > 0 else 0.0
+            else:
+                index = sum(v * w[i] for i, v in enumerate(values))
+        else:
+            index = sum(v * w[i] for i, v in enumerate(values))
+
+        indices.append(index * 100)
+
+    df_result['indeks_hama'] = indices
+
+    for indicator_name, weight in weights.items():
+        df_result[f'waga_{indicator_name}'] = weight
+
+    return df_result
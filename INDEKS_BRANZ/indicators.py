@@ -12,242 +12,225 @@ Definiuje i oblicza wskaźniki dla każdej branży:
 8. Trendy wyszukiwań
 9. Nowe firmy
 10. Produktywność
+
+Obliczenia kolumnowe: każde źródło jest indeksowane po PKD raz, a każdy wskaźnik
+liczony jednym wyrażeniem NumPy dla wszystkich branż naraz
 """
 
+import re
 import pandas as pd
 import numpy as np
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from config import BRANZE_PKD
 
+# Kolejność kolumn wynikowych
+INDICATOR_COLUMNS = [
+    'dynamika_przychodow',
+    'rentownosc',
+    'zadluzenie',
+    'szkodowosc',
+    'dynamika_eksportu',
+    'inwestycje',
+    'nastroje_konsumenckie',
+    'trendy_wyszukiwan',
+    'nowe_firmy',
+    'produktywnosc',
+]
+
 
 class IndustryIndicators:
     """Klasa do obliczania wskaźników branżowych"""
     
-    def __init__(self):
-        self.branze = BRANZE_PKD
+    def __init__(self, branze: Optional[Dict[str, Dict]] = None):
+        """
+        Args:
+            branze: Słownik branż {pkd: {'nazwa': ...}} (domyślnie BRANZE_PKD z config)
+        """
+        self.branze = branze if branze is not None else BRANZE_PKD
     
-    def calculate_all_indicators(self, data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    def calculate_all_indicators(self, data: Dict[str, pd.DataFrame], year: int = 2023) -> pd.DataFrame:
         """
         Oblicza wszystkie wskaźniki dla wszystkich branż
         
         Args:
             data: Dict z DataFrame dla każdego źródła (gus, krs, trends, npk)
+            year: Rok bieżący (dynamiki liczone względem year - 1)
         
         Returns:
             DataFrame z wskaźnikami dla każdej branży
         """
         print("\n[INFO] Obliczanie wskaznikow branzowych...")
         
-        # Przygotuj dane
-        gus_df = data.get('gus', pd.DataFrame())
-        krs_df = data.get('krs', pd.DataFrame())
-        trends_df = data.get('trends', pd.DataFrame())
-        npk_df = data.get('npk', pd.DataFrame())
-        
-        # Zbuduj wynikowy DataFrame
-        results = []
-        
-        for pkd in self.branze.keys():
-            indicators = {
-                'pkd': pkd,
-                'nazwa': self.branze[pkd]['nazwa']
-            }
-            
-            # 1. Dynamika przychodów (YoY %)
-            indicators['dynamika_przychodow'] = self._calculate_revenue_growth(gus_df, pkd)
-            
-            # 2. Rentowność (marża zysku - symulowana)
-            indicators['rentownosc'] = self._calculate_profitability(gus_df, pkd)
-            
-            # 3. Zadłużenie (D/E ratio - symulowane)
-            indicators['zadluzenie'] = self._calculate_debt_ratio(gus_df, pkd)
-            
-            # 4. Szkodowość (% upadłości)
-            indicators['szkodowosc'] = self._calculate_failure_rate(krs_df, pkd)
-            
-            # 5. Dynamika eksportu (YoY %)
-            indicators['dynamika_eksportu'] = self._calculate_export_growth(gus_df, pkd)
-            
-            # 6. Inwestycje (dynamika CAPEX)
-            indicators['inwestycje'] = self._calculate_investment_growth(gus_df, pkd)
-            
-            # 7. Nastroje konsumenckie (indeks)
-            indicators['nastroje_konsumenckie'] = self._calculate_consumer_sentiment(npk_df, pkd)
-            
-            # 8. Trendy wyszukiwań (Google Trends)
-            indicators['trendy_wyszukiwan'] = self._calculate_search_trends(trends_df, pkd)
-            
-            # 9. Nowe firmy (dynamika)
-            indicators['nowe_firmy'] = self._calculate_new_companies_growth(krs_df, pkd)
-            
-            # 10. Produktywność (przychód/etat)
-            indicators['produktywnosc'] = self._calculate_productivity(gus_df, pkd)
-            
-            results.append(indicators)
+        df = self._compute_indicators(data, year)
         
-        df = pd.DataFrame(results)
         print(f"[OK] Obliczono wskazniki dla {len(df)} branz\n")
-        
         return df
     
-    def _calculate_revenue_growth(self, gus_df: pd.DataFrame, pkd: str) -> float:
-        """Oblicza dynamikę przychodów YoY (%)"""
-        if gus_df.empty or pkd not in gus_df['pkd'].values:
-            return np.nan
-        
-        row = gus_df[gus_df['pkd'] == pkd].iloc[0]
-        
-        if pd.isna(row.get('przychody_2023')) or pd.isna(row.get('przychody_2022')):
-            return np.nan
-        
-        if row['przychody_2022'] == 0:
-            return 0.0
-        
-        growth = ((row['przychody_2023'] - row['przychody_2022']) / row['przychody_2022']) * 100
-        return growth
-    
-    def _calculate_profitability(self, gus_df: pd.DataFrame, pkd: str) -> float:
-        """
-        Oblicza rentowność (marża zysku %)
-        
-        W produkcji: zysk_netto / przychody * 100
-        Tutaj: symulujemy na podstawie przychodów
+    def calculate_indicator_panel(self, data: Dict[str, pd.DataFrame],
+                                  years: Optional[List[int]] = None) -> pd.DataFrame:
         """
-        if gus_df.empty or pkd not in gus_df['pkd'].values:
-            return np.nan
+        Oblicza wskaźniki dla wielu lat (panel w formacie długim: pkd, nazwa, rok, wskaźniki)
         
-        row = gus_df[gus_df['pkd'] == pkd].iloc[0]
-        
-        if pd.isna(row.get('przychody_2023')):
-            return np.nan
-        
-        # Symulacja: większe branże mają niższą marżę (konkurencja)
-        # Zakres: 2-15%
-        base_margin = 8.0
-        size_factor = min(row['przychody_2023'] / 1e12, 1.0)  # Normalizacja
-        margin = base_margin * (1 - size_factor * 0.5) + np.random.uniform(-2, 2)
-        
-        return max(2.0, min(15.0, margin))
-    
-    def _calculate_debt_ratio(self, gus_df: pd.DataFrame, pkd: str) -> float:
-        """
-        Oblicza wskaźnik zadłużenia (D/E)
+        Args:
+            data: Dict z DataFrame dla każdego źródła (kolumny <miara>_<rok>)
+            years: Lata do obliczenia (domyślnie wszystkie lata GUS z danymi za rok poprzedni)
         
-        W produkcji: dług / kapitał własny
-        Tutaj: symulujemy
+        Returns:
+            DataFrame z wierszem na parę (branża, rok)
         """
-        if gus_df.empty or pkd not in gus_df['pkd'].values:
-            return np.nan
-        
-        # Symulacja: zakres 0.3-2.5 (zdrowe: <1.0, ryzykowne: >1.5)
-        debt_ratio = np.random.uniform(0.3, 2.5)
-        return debt_ratio
+        if years is None:
+            years = self._available_years(data.get('gus'))
+        
+        frames = []
+        for year in years:
+            frame = self._compute_indicators(data, year)
+            frame.insert(2, 'rok', year)
+            frames.append(frame)
+        
+        if not frames:
+            return pd.DataFrame(columns=['pkd', 'nazwa', 'rok'] + INDICATOR_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
     
-    def _calculate_failure_rate(self, krs_df: pd.DataFrame, pkd: str) -> float:
-        """Oblicza szkodowość (% upadłości)"""
-        if krs_df.empty or pkd not in krs_df['pkd'].values:
-            return np.nan
-        
-        row = krs_df[krs_df['pkd'] == pkd].iloc[0]
-        
-        if pd.isna(row.get('upadlosci_2023')) or pd.isna(row.get('liczba_podmiotow_2023')):
-            return np.nan
-        
-        if row['liczba_podmiotow_2023'] == 0:
-            return 0.0
-        
-        failure_rate = (row['upadlosci_2023'] / row['liczba_podmiotow_2023']) * 100
-        return failure_rate
+    @staticmethod
+    def required_columns(year: int = 2023) -> Dict[str, List[str]]:
+        """Kolumny źródeł używane przez wskaźniki danego roku (projekcja przy odczycie)"""
+        previous = year - 1
+        return {
+            'gus': ['pkd', f'przychody_{year}', f'przychody_{previous}', f'eksport_{year}', f'eksport_{previous}',
+                    f'inwestycje_{year}', f'inwestycje_{previous}', f'zatrudnienie_{year}'],
+            'krs': ['pkd', f'upadlosci_{year}', f'liczba_podmiotow_{year}',
+                    f'nowe_firmy_{year}', f'nowe_firmy_{previous}'],
+            'trends': ['pkd', 'trend_wyszukiwan'],
+            'npk': ['pkd', 'indeks_nastrojow'],
+        }
     
-    def _calculate_export_growth(self, gus_df: pd.DataFrame, pkd: str) -> float:
-        """Oblicza dynamikę eksportu YoY (%)"""
-        if gus_df.empty or pkd not in gus_df['pkd'].values:
-            return np.nan
+    def _compute_indicators(self, data: Dict[str, pd.DataFrame], year: int) -> pd.DataFrame:
+        """Wszystkie wskaźniki dla jednego roku - wyrażenia kolumnowe zamiast pętli po PKD"""
+        pkds = pd.Index([str(pkd) for pkd in self.branze.keys()], name='pkd')
+        previous = year - 1
         
-        row = gus_df[gus_df['pkd'] == pkd].iloc[0]
+        # Źródła indeksowane po PKD raz (pierwszy wiersz dla powtórzonego kodu)
+        gus, gus_present = self._index_by_pkd(data.get('gus'), pkds)
+        krs, krs_present = self._index_by_pkd(data.get('krs'), pkds)
+        trends, trends_present = self._index_by_pkd(data.get('trends'), pkds)
+        npk, npk_present = self._index_by_pkd(data.get('npk'), pkds)
         
-        if pd.isna(row.get('eksport_2023')) or pd.isna(row.get('eksport_2022')):
-            return np.nan
+        revenue = self._column(gus, f'przychody_{year}')
+        employment = self._column(gus, f'zatrudnienie_{year}')
         
-        if row['eksport_2022'] == 0:
-            return 0.0
-        
-        growth = ((row['eksport_2023'] - row['eksport_2022']) / row['eksport_2022']) * 100
-        return growth
+        indicators = {
+            # 1. Dynamika przychodów (YoY %)
+            'dynamika_przychodow': self._growth(revenue, self._column(gus, f'przychody_{previous}')),
+            # 2-3. Rentowność i zadłużenie (symulowane)
+            **self._simulated_financials(revenue, gus_present),
+            # 4. Szkodowość (% upadłości)
+            'szkodowosc': self._ratio(
+                self._column(krs, f'upadlosci_{year}'), self._column(krs, f'liczba_podmiotow_{year}')
+            ) * 100,
+            # 5. Dynamika eksportu (YoY %)
+            'dynamika_eksportu': self._growth(
+                self._column(gus, f'eksport_{year}'), self._column(gus, f'eksport_{previous}')
+            ),
+            # 6. Inwestycje (dynamika CAPEX)
+            'inwestycje': self._growth(
+                self._column(gus, f'inwestycje_{year}'), self._column(gus, f'inwestycje_{previous}')
+            ),
+            # 7. Nastroje konsumenckie (0-200, 100 = neutralne)
+            'nastroje_konsumenckie': self._with_default(npk, npk_present, 'indeks_nastrojow', 100.0),
+            # 8. Trendy wyszukiwań (0-100, 50 = średnie)
+            'trendy_wyszukiwan': self._with_default(trends, trends_present, 'trend_wyszukiwan', 50.0),
+            # 9. Nowe firmy (dynamika)
+            'nowe_firmy': self._growth(
+                self._column(krs, f'nowe_firmy_{year}'), self._column(krs, f'nowe_firmy_{previous}')
+            ),
+            # 10. Produktywność (przychód/etat w tys. PLN)
+            'produktywnosc': self._ratio(revenue, employment) / 1000,
+        }
+        
+        df = pd.DataFrame({
+            'pkd': pkds.to_numpy(dtype=object),
+            'nazwa': [self.branze[pkd]['nazwa'] for pkd in self.branze.keys()],
+        })
+        for name in INDICATOR_COLUMNS:
+            df[name] = indicators[name]
+        return df
     
-    def _calculate_investment_growth(self, gus_df: pd.DataFrame, pkd: str) -> float:
-        """Oblicza dynamikę inwestycji YoY (%)"""
-        if gus_df.empty or pkd not in gus_df['pkd'].values:
-            return np.nan
-        
-        row = gus_df[gus_df['pkd'] == pkd].iloc[0]
-        
-        if pd.isna(row.get('inwestycje_2023')) or pd.isna(row.get('inwestycje_2022')):
-            return np.nan
-        
-        if row['inwestycje_2022'] == 0:
-            return 0.0
-        
-        growth = ((row['inwestycje_2023'] - row['inwestycje_2022']) / row['inwestycje_2022']) * 100
-        return growth
+    @staticmethod
+    def _index_by_pkd(frame: Optional[pd.DataFrame], pkds: pd.Index) -> Tuple[pd.DataFrame, np.ndarray]:
+        """Źródło wyrównane do listy PKD (kod jako tekst) i maska branż obecnych w źródle"""
+        if frame is None or frame.empty or 'pkd' not in frame.columns:
+            return pd.DataFrame(index=pkds), np.zeros(len(pkds), dtype=bool)
+        
+        # Kody z CSV bywają wczytane jako liczby - porównanie po tekście
+        keys = frame['pkd'].astype(str)
+        unique = ~keys.duplicated().to_numpy()
+        indexed = frame.loc[unique].set_axis(pd.Index(keys[unique], name='pkd'), axis=0)
+        return indexed.reindex(pkds), pkds.isin(indexed.index)
     
-    def _calculate_consumer_sentiment(self, npk_df: pd.DataFrame, pkd: str) -> float:
-        """
-        Oblicza wskaźnik nastrojów konsumenckich
-        
-        Skala: 0-200 (100 = neutralne)
-        """
-        if npk_df.empty or pkd not in npk_df['pkd'].values:
-            return 100.0  # Neutralne
-        
-        row = npk_df[npk_df['pkd'] == pkd].iloc[0]
-        return row.get('indeks_nastrojow', 100.0)
+    @staticmethod
+    def _column(frame: pd.DataFrame, name: str) -> np.ndarray:
+        """Kolumna liczbowa (brak kolumny lub wartości = NaN)"""
+        if name not in frame.columns:
+            return np.full(len(frame), np.nan)
+        return pd.to_numeric(frame[name], errors='coerce').to_numpy(dtype=float)
     
-    def _calculate_search_trends(self, trends_df: pd.DataFrame, pkd: str) -> float:
-        """
-        Oblicza wskaźnik trendów wyszukiwań (Google Trends)
-        
-        Skala: 0-100 (50 = średnie)
-        """
-        if trends_df.empty or pkd not in trends_df['pkd'].values:
-            return 50.0  # Średnie
-        
-        row = trends_df[trends_df['pkd'] == pkd].iloc[0]
-        return row.get('trend_wyszukiwan', 50.0)
+    @staticmethod
+    def _growth(current: np.ndarray, previous: np.ndarray) -> np.ndarray:
+        """Dynamika r/r (%) - NaN przy brakach, 0 przy zerowej bazie"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            growth = ((current - previous) / previous) * 100
+        growth = np.where(previous == 0, 0.0, growth)
+        return np.where(np.isnan(current) | np.isnan(previous), np.nan, growth)
     
-    def _calculate_new_companies_growth(self, krs_df: pd.DataFrame, pkd: str) -> float:
-        """Oblicza dynamikę liczby nowych firm YoY (%)"""
-        if krs_df.empty or pkd not in krs_df['pkd'].values:
-            return np.nan
-        
-        row = krs_df[krs_df['pkd'] == pkd].iloc[0]
-        
-        if pd.isna(row.get('nowe_firmy_2023')) or pd.isna(row.get('nowe_firmy_2022')):
-            return np.nan
-        
-        if row['nowe_firmy_2022'] == 0:
-            return 0.0
-        
-        growth = ((row['nowe_firmy_2023'] - row['nowe_firmy_2022']) / row['nowe_firmy_2022']) * 100
-        return growth
+    @staticmethod
+    def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+        """Iloraz - NaN przy brakach, 0 przy zerowym mianowniku"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = numerator / denominator
+        ratio = np.where(denominator == 0, 0.0, ratio)
+        return np.where(np.isnan(numerator) | np.isnan(denominator), np.nan, ratio)
     
-    def _calculate_productivity(self, gus_df: pd.DataFrame, pkd: str) -> float:
-        """
-        Oblicza produktywność (przychód na etat w tys. PLN)
+    def _with_default(self, frame: pd.DataFrame, present: np.ndarray, name: str, default: float) -> np.ndarray:
+        """Wartość ze źródła, a dla branż spoza źródła (lub bez kolumny) - wartość neutralna"""
+        if name not in frame.columns:
+            return np.full(len(frame), default)
+        return np.where(present, self._column(frame, name), default)
+    
+    @staticmethod
+    def _simulated_financials(revenue: np.ndarray, gus_present: np.ndarray) -> Dict[str, np.ndarray]:
         """
-        if gus_df.empty or pkd not in gus_df['pkd'].values:
-            return np.nan
-        
-        row = gus_df[gus_df['pkd'] == pkd].iloc[0]
+        Rentowność (marża zysku %) i zadłużenie (D/E) - symulowane
         
-        if pd.isna(row.get('przychody_2023')) or pd.isna(row.get('zatrudnienie_2023')):
-            return np.nan
+        W produkcji: zysk_netto / przychody * 100 oraz dług / kapitał własny.
+        Losowania w tej samej kolejności co dla kolejnych branż (marża, potem D/E) -
+        przy ustalonym np.random.seed wyniki zgodne z obliczeniem branża po branży.
+        """
+        n = len(revenue)
+        has_margin = gus_present & ~np.isnan(revenue)
+        draws = has_margin.astype(int) + gus_present.astype(int)
+        offsets = np.cumsum(draws) - draws
+        uniform = np.random.random_sample(int(draws.sum()))
+        
+        # Symulacja: większe branże mają niższą marżę (konkurencja), zakres 2-15%
+        margin = np.full(n, np.nan)
+        noise = -2.0 + (2.0 - -2.0) * uniform[offsets[has_margin]]
+        size_factor = np.minimum(revenue[has_margin] / 1e12, 1.0)  # Normalizacja
+        margin[has_margin] = np.clip(8.0 * (1 - size_factor * 0.5) + noise, 2.0, 15.0)
         
-        if row['zatrudnienie_2023'] == 0:
-            return 0.0
+        # Symulacja: zakres 0.3-2.5 (zdrowe: <1.0, ryzykowne: >1.5)
+        debt_ratio = np.full(n, np.nan)
+        debt_ratio[gus_present] = 0.3 + (2.5 - 0.3) * uniform[(offsets + has_margin)[gus_present]]
         
-        productivity = (row['przychody_2023'] / row['zatrudnienie_2023']) / 1000  # w tys. PLN
-        return productivity
+        return {'rentownosc': margin, 'zadluzenie': debt_ratio}
+    
+    @staticmethod
+    def _available_years(gus_df: Optional[pd.DataFrame]) -> List[int]:
+        """Lata z kolumną przychodów za dany i poprzedni rok (przychody_<rok>)"""
+        if gus_df is None or gus_df.empty:
+            return []
+        years = {int(match.group(1)) for match in
+                 (re.fullmatch(r'przychody_(\d{4})', str(column)) for column in gus_df.columns) if match}
+        return sorted(year for year in years if year - 1 in years)
 
 
 if __name__ == "__main__":
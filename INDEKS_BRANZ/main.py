@@ -58,11 +58,11 @@ def main():
         collector = DataCollector()
         data = collector.collect_all_data()
     else:
-        # Załaduj istniejące dane
+        # Załaduj istniejące dane (tylko kolumny potrzebne do wskaźników)
         collector = DataCollector()
         data = {}
-        for source in ['gus', 'krs', 'trends', 'npk']:
-            df = collector.load_raw_data(source)
+        for source, columns in IndustryIndicators.required_columns().items():
+            df = collector.load_raw_data(source, columns=columns)
             if df is not None:
                 data[source] = df
         
@@ -0,0 +1,221 @@
+"""
+🗄️ Magazyn surowych danych HAMA Diamond-Indeks Branż
+
+Partycje według źródła i daty pobrania (Parquet/Feather, bez pyarrow - CSV):
+    raw/source=gus/date=2024-05-01/gus_20240501_101500.parquet
+Mały manifest (manifest.json) wskazuje najnowszy snapshot każdego źródła - odczyt bez
+skanowania katalogów; historia snapshotów w source=<źródło>/snapshots.jsonl.
+Odczyt z projekcją kolumn (tylko potrzebne kolumny).
+
+Aktualizacja manifestu (odczyt-modyfikacja-zapis) chroniona blokadą pliku manifest.lock
+(fcntl/msvcrt) - kilka procesów kolektora nie gubi wzajemnie wpisów.
+"""
+
+import os
+import json
+import threading
+import contextlib
+import pandas as pd
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Iterator
+
+try:
+    import pyarrow  # noqa: F401 - silnik Parquet/Feather dla pandas
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Blokada plikowa między procesami: fcntl (Linux/macOS) albo msvcrt (Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = "manifest.lock"
+HISTORY_NAME = "snapshots.jsonl"
+FORMAT_EXTENSIONS = {"parquet": ".parquet", "feather": ".feather", "csv": ".csv"}
+
+
+class RawDataStore:
+    """Partycjonowany magazyn snapshotów surowych danych z manifestem najnowszych wersji"""
+
+    def __init__(self, root: Path, data_format: str = "parquet"):
+        """
+        Args:
+            root: Katalog magazynu (także starsze pliki {źródło}_{timestamp}.csv sprzed magazynu)
+            data_format: parquet, feather (wymagają pyarrow) lub csv
+        """
+        if data_format not in FORMAT_EXTENSIONS:
+            raise ValueError(f"Nieznany format magazynu: {data_format}")
+        if data_format != "csv" and not PYARROW_AVAILABLE:
+            print(f"[WARNING] pyarrow nie jest zainstalowany - surowe dane zapisywane jako CSV zamiast {data_format}")
+            data_format = "csv"
+
+        self.root = Path(root)
+        self.data_format = data_format
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def save(self, source: str, df: pd.DataFrame, collected_at: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Zapis snapshotu źródła i aktualizacja manifestu
+
+        Returns:
+            Wpis snapshotu (ścieżka względna, format, liczba wierszy, kolumny)
+        """
+        collected_at = collected_at or datetime.now()
+        extension = FORMAT_EXTENSIONS[self.data_format]
+        partition = self.root / f"source={source}" / f"date={collected_at.strftime('%Y-%m-%d')}"
+        partition.mkdir(parents=True, exist_ok=True)
+
+        snapshot_id = f"{source}_{collected_at.strftime('%Y%m%d_%H%M%S')}"
+        path = partition / f"{snapshot_id}{extension}"
+        suffix = 1
+        while path.exists():
+            path = partition / f"{snapshot_id}_{suffix}{extension}"
+            suffix += 1
+
+        # Zapis przez plik tymczasowy - czytelnik nigdy nie widzi niepełnego snapshotu
+        temp_path = path.with_name(path.name + ".tmp")
+        self._write_frame(df, temp_path)
+        os.replace(temp_path, path)
+
+        entry = {
+            "source": source,
+            "snapshot_id": path.stem,
+            "collected_at": collected_at.isoformat(),
+            "path": path.relative_to(self.root).as_posix(),
+            "format": self.data_format,
+            "rows": int(len(df)),
+            "columns": [str(column) for column in df.columns]
+        }
+
+        with self._manifest_lock():
+            history = self.root / f"source={source}" / HISTORY_NAME
+            with open(history, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            manifest = self._load_manifest()
+            manifest["sources"][source] = entry
+            manifest["updated_at"] = datetime.now().isoformat()
+            self._write_manifest(manifest)
+        return entry
+
+    def latest(self, source: str) -> Optional[Dict[str, Any]]:
+        """Wpis najnowszego snapshotu źródła (z manifestu) albo None"""
+        with self._manifest_lock():
+            entry = self._load_manifest()["sources"].get(source)
+        return dict(entry) if entry else None
+
+    def snapshots(self, source: str) -> List[Dict[str, Any]]:
+        """Historia snapshotów źródła (od najstarszego)"""
+        history = self.root / f"source={source}" / HISTORY_NAME
+        if not history.exists():
+            return []
+        with open(history, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def sources(self) -> List[str]:
+        with self._manifest_lock():
+            return sorted(self._load_manifest()["sources"])
+
+    def load(self, source: str, columns: Optional[List[str]] = None,
+             snapshot_id: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Odczyt snapshotu (domyślnie najnowszego)
+
+        Args:
+            source: Nazwa źródła (gus, krs, trends, npk)
+            columns: Projekcja - wczytywane kolumny (nieobecne w snapshocie są pomijane)
+            snapshot_id: Konkretny snapshot z historii (None = najnowszy z manifestu,
+                a bez snapshotu - najnowszy starszy plik {źródło}_{timestamp}.csv)
+
+        Returns:
+            DataFrame albo None, jeśli źródło nie ma danych
+        """
+        if snapshot_id is None:
+            entry = self.latest(source)
+            if entry is None:
+                return self._load_legacy(source, columns)
+        else:
+            entry = next((item for item in self.snapshots(source) if item["snapshot_id"] == snapshot_id), None)
+        if entry is None:
+            return None
+
+        path = self.root / entry["path"]
+        if not path.exists():
+            print(f"[WARNING] Brak pliku snapshotu {entry['path']} - pomijam")
+            return None
+
+        if columns is not None:
+            available = set(entry.get("columns", []))
+            columns = [column for column in columns if column in available]
+        return self._read_frame(path, entry.get("format", self.data_format), columns)
+
+    def _load_legacy(self, source: str, columns: Optional[List[str]]) -> Optional[pd.DataFrame]:
+        """Dane zapisane przed wprowadzeniem magazynu: {źródło}_{timestamp}.csv w katalogu głównym"""
+        files = list(self.root.glob(f"{source}_*.csv"))
+        if not files:
+            return None
+        latest_file = max(files, key=lambda p: p.stat().st_mtime)
+        wanted = set(columns) if columns is not None else None
+        return pd.read_csv(
+            latest_file, encoding='utf-8-sig', dtype={'pkd': str},
+            usecols=(lambda column: column in wanted) if wanted is not None else None
+        )
+
+    @contextlib.contextmanager
+    def _manifest_lock(self) -> Iterator[None]:
+        """Blokada manifestu - wątki procesu (threading.Lock) i inne procesy (blokada pliku)"""
+        with self._lock:
+            with open(self.root / LOCK_NAME, "a+b") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                elif msvcrt is not None:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                    elif msvcrt is not None:
+                        lock_file.seek(0)
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _write_frame(self, df: pd.DataFrame, path: Path):
+        if self.data_format == "parquet":
+            df.to_parquet(path, index=False)
+        elif self.data_format == "feather":
+            df.reset_index(drop=True).to_feather(path)
+        else:
+            df.to_csv(path, index=False, encoding='utf-8-sig')
+
+    @staticmethod
+    def _read_frame(path: Path, data_format: str, columns: Optional[List[str]]) -> pd.DataFrame:
+        if data_format == "parquet":
+            return pd.read_parquet(path, columns=columns)
+        if data_format == "feather":
+            return pd.read_feather(path, columns=columns)
+        # CSV: kody PKD jako tekst (bez utraty zer wiodących i typu int)
+        return pd.read_csv(path, encoding='utf-8-sig', usecols=columns, dtype={'pkd': str})
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        """Manifest z dysku - jeden wpis na źródło, rozmiar niezależny od historii"""
+        path = self.root / MANIFEST_NAME
+        if not path.exists():
+            return {"format_version": 1, "sources": {}}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        path = self.root / MANIFEST_NAME
+        temp_path = path.with_name(path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
@@ -0,0 +1,105 @@
+"""
+🧪 Testy równoległego zbierania źródeł - lokalne atrapy źródeł, limity czasu i limiter zapytań
+Uruchomienie: python -m pytest INDEKS_BRANZ/test_collection.py
+"""
+
+import os
+import sys
+import time
+import subprocess
+import threading
+
+import pandas as pd
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from collection import SourceTimeout, TokenBucket, collect_sources, map_items
+
+
+def _slow_source(delay: float, rows: int = 3):
+    def source():
+        time.sleep(delay)
+        return pd.DataFrame({'pkd': [f"{i:02d}" for i in range(rows)]})
+    return source
+
+
+def _failing_source():
+    raise ConnectionError("serwer niedostepny")
+
+
+def test_sources_run_concurrently():
+    start = time.monotonic()
+    result = collect_sources({name: _slow_source(0.3) for name in ("gus", "krs", "npk")})
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.6  # Najwolniejsze źródło, nie suma (0.9 s)
+    assert result['errors'] == {}
+    assert {name: len(df) for name, df in result['data'].items()} == {"gus": 3, "krs": 3, "npk": 3}
+    assert all(duration >= 0.3 for duration in result['durations'].values())
+
+
+def test_failing_source_keeps_other_results():
+    result = collect_sources({'gus': _slow_source(0.05), 'krs': _failing_source})
+
+    assert len(result['data']['gus']) == 3
+    assert result['data']['krs'].empty
+    assert result['errors'] == {'krs': "ConnectionError: serwer niedostepny"}
+
+
+def test_source_timeout_keeps_other_results():
+    start = time.monotonic()
+    result = collect_sources(
+        {'trends': _slow_source(2.0), 'gus': _slow_source(0.05)},
+        timeouts={'trends': 0.2}
+    )
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 1.0
+    assert result['data']['trends'].empty
+    assert "limit czasu" in result['errors']['trends']
+    assert len(result['data']['gus']) == 3
+    assert 'gus' not in result['errors']
+
+
+def test_timed_out_source_does_not_delay_process_exit():
+    script = (
+        "import sys, time; sys.path.insert(0, sys.argv[1]);"
+        "from collection import collect_sources;"
+        "collect_sources({'wolne': lambda: time.sleep(5)}, timeouts={'wolne': 0.1})"
+    )
+    start = time.monotonic()
+    subprocess.run([sys.executable, "-c", script, HERE], check=True, timeout=30)
+    assert time.monotonic() - start < 3.0
+
+
+def test_map_items_respects_rate_limit_and_order():
+    calls = []
+    lock = threading.Lock()
+
+    def fetch(item):
+        with lock:
+            calls.append(time.monotonic())
+        return item * 10
+
+    limiter = TokenBucket(rate=20.0, capacity=1)
+    start = time.monotonic()
+    results = map_items(fetch, range(6), workers=3, limiter=limiter)
+
+    assert results == [0, 10, 20, 30, 40, 50]
+    # Pierwszy token od razu, kolejne co 1/20 s
+    assert time.monotonic() - start >= 5 / 20 - 0.02
+    calls.sort()
+    assert all(b - a >= 1 / 20 - 0.02 for a, b in zip(calls, calls[1:]))
+
+
+def test_map_items_deadline_raises_source_timeout():
+    with pytest.raises(SourceTimeout):
+        map_items(lambda item: time.sleep(1.0), range(4), workers=2, deadline=time.monotonic() + 0.1)
+
+
+def test_token_bucket_acquire_times_out():
+    limiter = TokenBucket(rate=1.0, capacity=1)
+    assert limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0.05)
@@ -0,0 +1,112 @@
+"""
+🧪 Testy równoważności kolumnowych wskaźników branżowych z implementacją iteracyjną (po PKD)
+Uruchomienie: python -m pytest INDEKS_BRANZ/test_indicators.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import indicators_reference as reference
+from indicators import IndustryIndicators
+
+SEEDS = range(40)
+
+SOURCE_COLUMNS = {
+    'gus': ['przychody_2023', 'przychody_2022', 'eksport_2023', 'eksport_2022',
+            'inwestycje_2023', 'inwestycje_2022', 'zatrudnienie_2023'],
+    'krs': ['upadlosci_2023', 'liczba_podmiotow_2023', 'nowe_firmy_2023', 'nowe_firmy_2022'],
+    'trends': ['trend_wyszukiwan'],
+    'npk': ['indeks_nastrojow'],
+}
+
+
+def _random_branze(rng: np.random.Generator) -> dict:
+    n = int(rng.choice([1, 2, 5, 13, 60]))
+    codes = rng.choice(10000, size=n, replace=False)
+    return {f"{code // 100:02d}.{code % 100:02d}": {'nazwa': f"Branza {i}"} for i, code in enumerate(codes)}
+
+
+def _random_source(rng: np.random.Generator, pkds: list, columns: list) -> pd.DataFrame:
+    """Źródło z brakami: kody spoza źródła, obce kody, duplikaty, NaN, zerowe bazy i brakujące kolumny"""
+    if rng.random() < 0.1:
+        return pd.DataFrame()
+    present = [pkd for pkd in pkds if rng.random() < 0.8]
+    foreign = [f"99.{i:02d}" for i in range(int(rng.integers(0, 3)))]
+    duplicated = [pkd for pkd in present if rng.random() < 0.2]
+    codes = present + foreign + duplicated
+    n = len(codes)
+
+    df = pd.DataFrame({'pkd': pd.Series(codes, dtype=object)})
+    for column in columns:
+        if rng.random() < 0.1:
+            continue
+        values = rng.uniform(1, 1e6, n) if rng.random() < 0.5 else rng.integers(0, 500, n).astype(float)
+        values[rng.random(n) < 0.15] = np.nan
+        values[rng.random(n) < 0.15] = 0.0
+        df[column] = values
+    # Kolejność wierszy losowa - dla duplikatu liczy się pierwszy wiersz w ramce
+    return df.iloc[rng.permutation(n)].reset_index(drop=True)
+
+
+def _random_data(rng: np.random.Generator, pkds: list) -> dict:
+    return {name: _random_source(rng, pkds, columns) for name, columns in SOURCE_COLUMNS.items()}
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_indicators_match_reference(seed):
+    rng = np.random.default_rng(seed)
+    branze = _random_branze(rng)
+    data = _random_data(rng, list(branze))
+
+    # Symulowana rentowność i zadłużenie - te same losowania z globalnego generatora
+    np.random.seed(seed)
+    expected = reference.IndustryIndicators(branze).calculate_all_indicators(data)
+    np.random.seed(seed)
+    actual = IndustryIndicators(branze).calculate_all_indicators(data)
+
+    pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+
+def test_missing_sources_and_duplicates():
+    branze = {"01.11": {'nazwa': "A"}, "10.20": {'nazwa': "B"}, "47.11": {'nazwa': "C"}}
+    data = {
+        'gus': pd.DataFrame({
+            'pkd': ["10.20", "01.11", "01.11"],
+            'przychody_2023': [200.0, 0.0, 999.0],
+            'przychody_2022': [100.0, 0.0, 1.0],
+            'zatrudnienie_2023': [0.0, 5.0, 1.0],
+        }),
+        'npk': pd.DataFrame({'pkd': ["47.11"], 'indeks_nastrojow': [np.nan]}),
+    }
+
+    np.random.seed(0)
+    expected = reference.IndustryIndicators(branze).calculate_all_indicators(data)
+    np.random.seed(0)
+    actual = IndustryIndicators(branze).calculate_all_indicators(data)
+    pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+    # Pierwszy wiersz powtórzonego kodu, zerowa baza = 0, brak źródła = NaN / wartość neutralna
+    assert actual['dynamika_przychodow'].tolist()[:2] == [0.0, 100.0]
+    assert actual['produktywnosc'].tolist()[:2] == [0.0, 0.0]
+    assert actual['szkodowosc'].isna().all()
+    assert actual['trendy_wyszukiwan'].tolist() == [50.0, 50.0, 50.0]
+    assert np.isnan(actual['nastroje_konsumenckie'].iloc[2])
+
+
+def test_numeric_pkd_codes_match_text_codes():
+    branze = {"10": {'nazwa': "Produkcja"}, "47": {'nazwa': "Handel"}}
+    text = pd.DataFrame({'pkd': ["10", "47"], 'przychody_2023': [2.0, 3.0], 'przychody_2022': [1.0, 1.0]})
+    numeric = text.assign(pkd=[10, 47])  # Kody wczytane z CSV jako liczby
+
+    np.random.seed(1)
+    expected = IndustryIndicators(branze).calculate_all_indicators({'gus': text})
+    np.random.seed(1)
+    actual = IndustryIndicators(branze).calculate_all_indicators({'gus': numeric})
+    pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+    assert actual['dynamika_przychodow'].tolist() == [100.0, 200.0]
@@ -0,0 +1,110 @@
+"""
+🧪 Testy magazynu surowych danych - manifest, projekcja kolumn, starsze pliki CSV, Parquet
+Uruchomienie: python -m pytest INDEKS_BRANZ/test_raw_store.py
+"""
+
+import os
+import sys
+import multiprocessing
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from raw_store import RawDataStore
+
+
+def _frame(value: float) -> pd.DataFrame:
+    return pd.DataFrame({
+        'pkd': ["01", "10", "47"],
+        'nazwa': ["Rolnictwo", "Produkcja", "Handel"],
+        'przychody_2023': [value, value * 2, value * 3],
+        'eksport_2023': [1.0, 2.0, 3.0]
+    })
+
+
+def test_csv_latest_snapshot_from_manifest(tmp_path):
+    store = RawDataStore(tmp_path, "csv")
+    first = store.save("gus", _frame(1.0), collected_at=datetime(2024, 5, 1, 10, 0, 0))
+    second = store.save("gus", _frame(5.0), collected_at=datetime(2024, 5, 2, 10, 0, 0))
+
+    assert first['path'] == "source=gus/date=2024-05-01/gus_20240501_100000.csv"
+    assert store.latest("gus")['snapshot_id'] == second['snapshot_id']
+    assert store.sources() == ["gus"]
+    assert [entry['snapshot_id'] for entry in store.snapshots("gus")] == [first['snapshot_id'], second['snapshot_id']]
+
+    df = store.load("gus")
+    assert df['przychody_2023'].tolist() == [5.0, 10.0, 15.0]
+    # Kody PKD jako tekst - zera wiodące zachowane
+    assert df['pkd'].tolist() == ["01", "10", "47"]
+
+    older = store.load("gus", snapshot_id=first['snapshot_id'])
+    assert older['przychody_2023'].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_csv_column_projection(tmp_path):
+    store = RawDataStore(tmp_path, "csv")
+    store.save("gus", _frame(1.0))
+
+    df = store.load("gus", columns=['pkd', 'przychody_2023', 'brak_kolumny'])
+    assert list(df.columns) == ['pkd', 'przychody_2023']
+    assert df['pkd'].tolist() == ["01", "10", "47"]
+
+
+def test_same_second_snapshots_do_not_overwrite(tmp_path):
+    store = RawDataStore(tmp_path, "csv")
+    moment = datetime(2024, 5, 1, 10, 0, 0)
+    first = store.save("krs", _frame(1.0), collected_at=moment)
+    second = store.save("krs", _frame(2.0), collected_at=moment)
+    assert first['path'] != second['path']
+    assert store.load("krs")['przychody_2023'].tolist() == [2.0, 4.0, 6.0]
+
+
+def test_legacy_csv_used_when_no_snapshot(tmp_path):
+    _frame(7.0).to_csv(tmp_path / "gus_20230101_120000.csv", index=False, encoding='utf-8-sig')
+    store = RawDataStore(tmp_path, "csv")
+
+    df = store.load("gus", columns=['pkd', 'przychody_2023'])
+    assert list(df.columns) == ['pkd', 'przychody_2023']
+    assert df['pkd'].tolist() == ["01", "10", "47"]
+    assert store.load("krs") is None
+
+    # Snapshot magazynu ma pierwszeństwo przed starszym plikiem
+    store.save("gus", _frame(1.0))
+    assert store.load("gus")['przychody_2023'].tolist() == [1.0, 2.0, 3.0]
+
+
+@pytest.mark.parametrize('data_format', ["parquet", "feather"])
+def test_columnar_formats(tmp_path, data_format):
+    pytest.importorskip("pyarrow")
+    store = RawDataStore(tmp_path, data_format)
+    entry = store.save("trends", _frame(3.0))
+
+    assert entry['path'].endswith("." + data_format)
+    df = store.load("trends", columns=['pkd', 'eksport_2023'])
+    assert list(df.columns) == ['pkd', 'eksport_2023']
+    assert df['pkd'].tolist() == ["01", "10", "47"]
+
+
+def _save_sources(root: str, prefix: str, count: int):
+    store = RawDataStore(root, "csv")
+    for i in range(count):
+        store.save(f"{prefix}{i}", _frame(float(i)))
+
+
+def test_manifest_updates_from_several_processes(tmp_path):
+    processes = [
+        multiprocessing.Process(target=_save_sources, args=(str(tmp_path), prefix, 15))
+        for prefix in ("a", "b", "c")
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    sources = RawDataStore(tmp_path, "csv").sources()
+    assert len(sources) == 45
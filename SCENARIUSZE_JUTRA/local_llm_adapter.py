@@ -2,11 +2,23 @@
 Adapter dla lokalnych modeli LLM (Ollama/Llama)
 Zamiast OpenAI używamy lokalnych modeli open-source
 """
+import os
+import sys
+import functools
 import requests
 from requests.exceptions import Timeout as RequestsTimeout
 from typing import Dict, Any, Optional
 import logging
 
+# Wspólna bramka LLM (AIWSLUZBIE/llm_gateway.py) - limity Ollama dla całego procesu
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'AIWSLUZBIE'))
+try:
+    from llm_gateway import get_gateway
+    from response_cache import make_cache_key
+    GATEWAY_AVAILABLE = True
+except ImportError:
+    GATEWAY_AVAILABLE = False
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -65,6 +77,9 @@ WAZNE: Odpowiedz TYLKO w formacie JSON, bez dodatkowego tekstu."""
                     "num_predict": max_tokens
                 }
             }
+            if use_json_mode:
+                # Natywny tryb JSON Ollama - dekodowanie ograniczone do poprawnego JSON
+                payload["format"] = "json"
             
             logger.info(f"Wysylam prompt do Ollama (model: {self.model_name}, dlugosc: {len(prompt)} znakow, max_tokens: {max_tokens})...")
             if self.model_name == "mistral":
@@ -72,11 +87,21 @@ WAZNE: Odpowiedz TYLKO w formacie JSON, bez dodatkowego tekstu."""
             
             import time
             start_time = time.time()
-            response = requests.post(
+            post = functools.partial(
+                requests.post,
                 f"{self.base_url}/api/generate",
                 json=payload,
                 timeout=120  # 2 minuty timeout - jeśli trwa dłużej, jest problem
             )
+            if GATEWAY_AVAILABLE:
+                # Limit współbieżności Ollama + łączenie identycznych zapytań w locie
+                response = get_gateway().call(
+                    "ollama", post,
+                    priority=kwargs.get('priority', 'interactive'),
+                    coalesce_key=make_cache_key(prompt, self.model_name, payload['options'])
+                )
+            else:
+                response = post()
             elapsed = time.time() - start_time
             logger.info(f"Otrzymano odpowiedz z Ollama po {elapsed:.1f} sekundach (status: {response.status_code})")
             
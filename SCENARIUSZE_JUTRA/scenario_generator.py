@@ -14,6 +14,16 @@ import json
 import logging
 from collections import deque
 
+# Wspólna warstwa odpowiedzi strukturalnych (jeśli dostępna)
+try:
+    # Próbuj zaimportować z AIWSLUZBIE
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'AIWSLUZBIE'))
+    from structured_output import extract_json
+    STRUCTURED_OUTPUT_AVAILABLE = True
+except ImportError:
+    STRUCTURED_OUTPUT_AVAILABLE = False
+    extract_json = None
+
 # Importy HAMA Diamond (Background IP)
 try:
     from hama_part5 import CognitiveAgent, EnhancedCognitiveAgent
@@ -41,6 +51,21 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Oczekiwany kształt odpowiedzi modelu (walidacja w _parse_scenario_response)
+SCENARIO_SCHEMA = {
+    "type": "object",
+    "required": ["title", "description"],
+    "properties": {
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "key_events": {"type": "array"},
+        "probabilities": {"type": "object"},
+        "impacts": {"type": "object"},
+        "recommendations": {"type": "array"},
+        "reasoning": {"type": "object"}
+    }
+}
+
 
 @dataclass
 class Scenario:
@@ -187,7 +212,8 @@ class ScenarioGenerator:
         if self.use_gqpa and self.gemini_adapter:
             response = self.gemini_adapter.cognitive_query(
                 prompt, 
-                context=cognitive_context
+                context=cognitive_context,
+                json_mode=True
             )
             scenario_text = response.get('response', '')
         else:
@@ -381,14 +407,19 @@ Odpowiedz TYLKO w formacie JSON, bez dodatkowego tekstu.
         """Parsuje odpowiedź LLM do obiektu Scenario"""
         
         try:
-            # Próba wyciągnięcia JSON z odpowiedzi
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                json_text = response_text[json_start:json_end]
-                data = json.loads(json_text)
+            if STRUCTURED_OUTPUT_AVAILABLE:
+                # Obiekt JSON z odpowiedzi (parser przyrostowy + walidacja schematu)
+                data = extract_json(response_text, SCENARIO_SCHEMA)
+                if data is None:
+                    raise ValueError("Nie znaleziono poprawnego JSON w odpowiedzi")
             else:
-                raise ValueError("Nie znaleziono JSON w odpowiedzi")
+                # Próba wyciągnięcia JSON z odpowiedzi
+                json_start = response_text.find('{')
+                json_end = response_text.rfind('}') + 1
+                if json_start >= 0 and json_end > json_start:
+                    data = json.loads(response_text[json_start:json_end])
+                else:
+                    raise ValueError("Nie znaleziono JSON w odpowiedzi")
         except Exception as e:
             logger.warning(f"Błąd parsowania JSON: {e}. Używam domyślnych wartości.")
             data = {
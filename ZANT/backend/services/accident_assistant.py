@@ -13,6 +13,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'AI
 
 try:
     from local_model_adapter import LocalModelAdapter
+    from structured_output import extract_json
     LLM_AVAILABLE = True
 except ImportError:
     LLM_AVAILABLE = False
@@ -24,6 +25,16 @@ from backend.config import ZUS_ACCIDENT_REPORT_TEMPLATE, TEMPERATURE_ANALYSIS, G
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Schemat odpowiedzi oceny pól zgłoszenia (uproszczony JSON Schema - structured_output)
+FIELD_REVIEW_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "suggestions": {"type": "array", "items": {"type": "string"}},
+        "errors": {"type": "array", "items": {"type": "string"}},
+        "quality_score": {"type": "number", "minimum": 0, "maximum": 1}
+    }
+}
+
 
 class AccidentAssistant:
     """
@@ -151,12 +162,10 @@ Odpowiedz w formacie JSON:
             
             response = result.get('response', '') if isinstance(result, dict) else str(result)
             
-            # Parsowanie JSON
-            import json
-            import re
-            json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(0))
+            # Parsowanie JSON (parser przyrostowy + walidacja schematu)
+            review = extract_json(response, FIELD_REVIEW_SCHEMA)
+            if review is not None:
+                return review
         except Exception as e:
             logger.error(f"Błąd podczas analizy LLM: {e}")
         
@@ -7,8 +7,6 @@ import sys
 import os
 from typing import Dict, List, Any, Optional
 import logging
-import json
-import re
 import time
 
 # Dodaj ścieżki do adapterów
@@ -16,6 +14,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..', 'AI
 
 try:
     from local_model_adapter import LocalModelAdapter
+    from structured_output import extract_json
     LLM_AVAILABLE = True
 except ImportError:
     LLM_AVAILABLE = False
@@ -27,6 +26,29 @@ from backend.config import ACCIDENT_DEFINITION, DECISION_RULES, TEMPERATURE_ANAL
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Schemat odpowiedzi analizy HAMA (uproszczony JSON Schema - structured_output)
+_CONDITION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "potwierdzone": {"type": "boolean"},
+        "pewnosc": {"type": "number", "minimum": 0, "maximum": 1}
+    }
+}
+HAMA_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "required": ["rekomendacja"],
+    "properties": {
+        "zdarzenie_nagłe": _CONDITION_SCHEMA,
+        "przyczyna_zewnetrzna": _CONDITION_SCHEMA,
+        "uraz_lub_smierc": _CONDITION_SCHEMA,
+        "zwiazek_z_praca": _CONDITION_SCHEMA,
+        "czynniki_wykluczajace": {"type": "array"},
+        "ogolna_pewnosc": {"type": "number", "minimum": 0, "maximum": 1},
+        "rekomendacja": {"type": "string", "enum": ["recognize", "not_recognize", "needs_review"]},
+        "uzasadnienie": {"type": "string"}
+    }
+}
+
 
 class DecisionEngine:
     """
@@ -150,10 +172,11 @@ Odpowiedz TYLKO w formacie JSON:
             
             response = result.get('response', '') if isinstance(result, dict) else str(result)
             
-            # Parsowanie JSON
-            json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group(0))
+            # Parsowanie JSON (parser przyrostowy + walidacja schematu)
+            analysis = extract_json(response, HAMA_ANALYSIS_SCHEMA)
+            if analysis is not None:
+                return analysis
+            logger.warning("Odpowiedź LLM bez poprawnego obiektu JSON - używam analizy regułowej")
         except Exception as e:
             logger.error(f"Błąd podczas analizy HAMA Diamond: {e}")
         
@@ -41,14 +41,40 @@ export const fetchPerformanceMetrics = async () => {
   return response.data
 }
 
+// Analiza i generowanie decyzji działają jako zadania w tle - odpytywanie statusu zadania
+const JOB_POLL_INTERVAL_MS = 1000
+
+export const fetchJob = async (jobId: string) => {
+  const response = await api.get(`/api/jobs/${jobId}`)
+  return response.data
+}
+
+export const cancelJob = async (jobId: string) => {
+  const response = await api.post(`/api/jobs/${jobId}/cancel`)
+  return response.data
+}
+
+const waitForJob = async (jobId: string) => {
+  for (;;) {
+    const job = await fetchJob(jobId)
+    if (job.status === 'completed') {
+      return job.result
+    }
+    if (job.status === 'failed' || job.status === 'cancelled') {
+      throw new Error(job.error || `Zadanie ${jobId}: ${job.status}`)
+    }
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+  }
+}
+
 export const analyzeCase = async (caseId: string) => {
   const response = await api.post(`/api/cases/${caseId}/analyze`)
-  return response.data
+  return waitForJob(response.data.job_id)
 }
 
 export const generateDecision = async (caseId: string, decisionType: string = 'pozytywna') => {
   const response = await api.post(`/api/cases/${caseId}/generate-decision?decision_type=${decisionType}`)
-  return response.data
+  return waitForJob(response.data.job_id)
 }
 
 export const initDemoData = async () => {
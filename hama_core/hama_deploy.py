@@ -169,8 +169,11 @@ class AgentStateManager:
     
     def _serialize_adapter_state(self):
         """Serializacja stanu adaptera"""
+        log = self.adapter.interaction_log
         return {
-            'interaction_log': self.adapter.interaction_log[-50:],  # Last 50
+            'interaction_log': list(log)[-50:],  # Last 50
+            # Liczniki od startu - statystyki nie zawężają się do 50 zapisanych wpisów
+            'interaction_counters': log.counters() if hasattr(log, 'counters') else None,
             'conversation_history': self.adapter.conversation_history[-20:]  # Last 20
         }
     
@@ -184,8 +187,18 @@ class AgentStateManager:
         # Note: episodic memory można dodać, ale wymaga rekonstrukcji Episode obiektów
     
     def _deserialize_adapter_state(self, state):
-        """Deserializacja stanu adaptera"""
-        self.adapter.interaction_log = state['interaction_log']
+        """
+        Deserializacja stanu adaptera
+
+        Statystyki interakcji wracają z zapisanych liczników; checkpoint bez liczników
+        (starszy format) albo z histogramem innego logu - statystyki tylko z 50 wpisów
+        """
+        log = self.adapter.interaction_log
+        log.clear()
+        log.extend(state['interaction_log'])
+        counters = state.get('interaction_counters')
+        if counters and hasattr(log, 'restore_counters'):
+            log.restore_counters(counters)
         self.adapter.conversation_history = state['conversation_history']
     
     def create_checkpoint(self, name=None):
@@ -87,6 +87,90 @@ except ImportError:
         def generate(self, prompt, **kwargs):
             return "[LLM ADAPTER NIE DOSTEPNY] Uruchom Ollama: ollama serve"
 
+# Ograniczony log interakcji (jeśli dostępny)
+try:
+    # Próbuj zaimportować z AIWSLUZBIE
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'AIWSLUZBIE'))
+    from interaction_log import InteractionLog  # type: ignore
+    INTERACTION_LOG_AVAILABLE = True
+except ImportError:
+    INTERACTION_LOG_AVAILABLE = False
+    from collections import deque
+    # Fallback - ostatnie interakcje w ograniczonej kolejce, statystyki jako liczniki
+    # (ten sam interfejs co AIWSLUZBIE/interaction_log.py, bez histogramu i dziennika)
+    class InteractionLog:  # type: ignore
+        def __init__(self, capacity: int = 500):
+            self.capacity = capacity
+            self._entries = deque(maxlen=capacity)
+            self._reset_counters()
+        def append(self, interaction: Dict[str, Any]):
+            self._entries.append(interaction)
+            self.total += 1
+            if interaction.get('cached'):
+                self.cached += 1
+            if interaction.get('success'):
+                response = interaction.get('response')
+                self.successful += 1
+                self.latency_total += interaction.get('latency', 0.0)
+                # Wpisy z checkpointu prawdziwego logu mają tylko długość i liczbę słów odpowiedzi
+                if response is None:
+                    self.tokens_estimate += interaction.get('response_tokens', 0)
+                    self.response_chars += interaction.get('response_length', 0)
+                else:
+                    self.tokens_estimate += len(str(response).split())
+                    self.response_chars += len(str(response))
+        def extend(self, interactions: List[Dict[str, Any]]):
+            for interaction in interactions:
+                self.append(interaction)
+        def recent(self, n: Optional[int] = None) -> List[Dict[str, Any]]:
+            entries = list(self._entries)
+            return entries[-n:] if n else entries
+        def clear(self):
+            self._entries.clear()
+            self._reset_counters()
+        def counters(self) -> Dict[str, Any]:
+            return {
+                'total': self.total,
+                'successful': self.successful,
+                'cached': self.cached,
+                'response_chars': self.response_chars,
+                'tokens_estimate': self.tokens_estimate,
+                'latency_total': self.latency_total
+            }
+        def restore_counters(self, counters: Dict[str, Any]) -> bool:
+            self.total = counters['total']
+            self.successful = counters['successful']
+            self.cached = counters.get('cached', 0)
+            self.response_chars = counters['response_chars']
+            self.tokens_estimate = counters['tokens_estimate']
+            self.latency_total = counters['latency_total']
+            return True
+        def _reset_counters(self):
+            self.total = 0
+            self.successful = 0
+            self.cached = 0
+            self.latency_total = 0.0
+            self.tokens_estimate = 0
+            self.response_chars = 0
+        def __len__(self):
+            return len(self._entries)
+        def __iter__(self):
+            return iter(self.recent())
+        def __getitem__(self, index):
+            return self.recent()[index]
+        def __bool__(self):
+            return self.total > 0
+        def get_stats(self) -> Dict[str, Any]:
+            return {
+                'total_interactions': self.total,
+                'successful': self.successful,
+                'failed': self.total - self.successful,
+                'cached': self.cached,
+                'avg_latency': self.latency_total / self.successful if self.successful else 0,
+                'total_tokens_estimate': self.tokens_estimate,
+                'avg_response_length': self.response_chars / self.successful if self.successful else 0
+            }
+
 # ============================================================================
 # LLM COGNITIVE ADAPTER (dla Llama/Ollama)
 # ============================================================================
@@ -100,7 +184,8 @@ class GeminiCognitiveAdapter:
         # gemini_model może być None - używamy lokalnego adaptera
         self.agent = cognitive_agent
         self.conversation_history = []
-        self.interaction_log = []
+        # Stała pojemność w pamięci - skróty odpowiedzi zamiast treści, statystyki bez przeglądania logu
+        self.interaction_log = InteractionLog()
         
         # Inicjalizacja lokalnego adaptera LLM
         if LLM_ADAPTER_AVAILABLE:
@@ -108,7 +193,8 @@ class GeminiCognitiveAdapter:
         else:
             self.llm_adapter = None
 
-    def cognitive_query(self, prompt: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def cognitive_query(self, prompt: str, context: Optional[Dict[str, Any]] = None,
+                        priority: str = "interactive", json_mode: bool = False) -> Dict[str, Any]:
         cognitive_context = self._prepare_cognitive_context(context)
 
         enriched_prompt = f"""
@@ -129,10 +215,13 @@ Odpowiedz uwzględniając powyższy kontekst kognitywny agenta.
         try:
             # Użyj lokalnego adaptera LLM zamiast Gemini
             if self.llm_adapter:
+                # priority: kolejka wspólnej bramki LLM (interactive/batch)
                 response_text = self.llm_adapter.generate(
                     enriched_prompt,
                     temperature=0.3,
-                    max_tokens=2000
+                    max_tokens=2000,
+                    priority=priority,
+                    json_mode=json_mode
                 )
                 success = True
                 error = None
@@ -221,19 +310,7 @@ Cognitive Complexity: {cognitive_complexity:.3f}
         if not self.interaction_log:
             return {}
 
-        successful = [i for i in self.interaction_log if i['success']]
-
-        latencies = [i['latency'] for i in successful]
-        response_lengths = [len(i['response']) for i in successful]
-        
-        return {
-            'total_interactions': len(self.interaction_log),
-            'successful': len(successful),
-            'failed': len(self.interaction_log) - len(successful),
-            'avg_latency': np.mean(latencies) if latencies else 0,
-            'total_tokens_estimate': sum(len(i['response'].split()) for i in successful),
-            'avg_response_length': np.mean(response_lengths) if response_lengths else 0
-        }
+        return self.interaction_log.get_stats()
 
 print("OK LLM Cognitive Adapter zdefiniowany")
 
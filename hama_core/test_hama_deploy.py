@@ -0,0 +1,102 @@
+"""
+🧪 Testy checkpointu adaptera - przywracanie logu interakcji (także bez AIWSLUZBIE)
+Uruchomienie: python -m pytest hama_core/test_hama_deploy.py
+"""
+
+import os
+import sys
+import pickle
+import importlib.util
+from types import SimpleNamespace
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, '..', 'AIWSLUZBIE'))
+
+from hama_deploy import AgentStateManager
+from interaction_log import InteractionLog
+
+
+def _fallback_interaction_log_class():
+    """Klasa InteractionLog z hama_part6 załadowanego bez dostępu do AIWSLUZBIE"""
+    saved = sys.modules.get('interaction_log')
+    sys.modules['interaction_log'] = None  # import interaction_log -> ImportError
+    try:
+        spec = importlib.util.spec_from_file_location('hama_part6_fallback', os.path.join(HERE, 'hama_part6.py'))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        if saved is None:
+            del sys.modules['interaction_log']
+        else:
+            sys.modules['interaction_log'] = saved
+    assert not module.INTERACTION_LOG_AVAILABLE
+    return module.InteractionLog
+
+
+@pytest.fixture(scope='module')
+def fallback_log_class():
+    return _fallback_interaction_log_class()
+
+
+def _adapter(log):
+    for i in range(80):
+        log.append({
+            'prompt': f"p{i}",
+            'response': "slowo " * (i % 7 + 1) if i % 5 else None,
+            'success': bool(i % 5),
+            'latency': 0.01 * (i % 9 + 1),
+            'cached': i % 3 == 0
+        })
+    return SimpleNamespace(interaction_log=log, conversation_history=[{'role': 'user', 'content': 'x'}])
+
+
+def _restore(state, log):
+    manager = AgentStateManager.__new__(AgentStateManager)
+    manager.adapter = SimpleNamespace(interaction_log=log, conversation_history=[])
+    manager._deserialize_adapter_state(pickle.loads(pickle.dumps(state)))
+    return manager.adapter
+
+
+def _checkpoint(adapter):
+    manager = AgentStateManager.__new__(AgentStateManager)
+    manager.adapter = adapter
+    return manager._serialize_adapter_state()
+
+
+def test_fallback_log_restores_checkpoint(fallback_log_class):
+    adapter = _adapter(fallback_log_class())
+    restored = _restore(_checkpoint(adapter), fallback_log_class())
+    log = restored.interaction_log
+    assert len(log) == 50
+    assert log[0]['prompt'] == "p30" and log[-1]['prompt'] == "p79"
+    assert [entry['prompt'] for entry in log.recent(2)] == ["p78", "p79"]
+    assert log.get_stats() == adapter.interaction_log.get_stats()
+    assert log.get_stats()['total_interactions'] == 80
+    assert restored.conversation_history == adapter.conversation_history
+
+
+def test_real_log_restores_counters():
+    adapter = _adapter(InteractionLog(capacity=100))
+    restored = _restore(_checkpoint(adapter), InteractionLog(capacity=100))
+    assert len(restored.interaction_log) == 50
+    assert restored.interaction_log.get_stats() == adapter.interaction_log.get_stats()
+
+
+def test_real_checkpoint_restores_into_fallback(fallback_log_class):
+    adapter = _adapter(InteractionLog(capacity=100))
+    expected = adapter.interaction_log.get_stats()
+    stats = _restore(_checkpoint(adapter), fallback_log_class()).interaction_log.get_stats()
+    for key in ('total_interactions', 'successful', 'failed', 'cached', 'total_tokens_estimate'):
+        assert stats[key] == expected[key]
+    assert stats['avg_latency'] == pytest.approx(expected['avg_latency'])
+    assert stats['avg_response_length'] == pytest.approx(expected['avg_response_length'])
+
+
+def test_checkpoint_without_counters_keeps_restored_entries_only(fallback_log_class):
+    state = _checkpoint(_adapter(fallback_log_class()))
+    del state['interaction_counters']  # Starszy format checkpointu
+    log = _restore(state, fallback_log_class()).interaction_log
+    assert log.get_stats()['total_interactions'] == 50